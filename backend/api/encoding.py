@@ -0,0 +1,238 @@
+# api/encoding.py
+# Content negotiation and compact encodings for time-series responses
+
+import gzip
+import json
+import struct
+
+import numpy as np
+import pandas as pd
+from fastapi import Request
+from fastapi.responses import Response
+
+from config import Config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional
+    pa = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+MEDIA_JSON = "application/json"
+MEDIA_ARROW = "application/vnd.apache.arrow.stream"
+MEDIA_MSGPACK = "application/msgpack"
+MEDIA_F32 = "application/octet-stream"
+
+ACCEPTED_MEDIA = {
+    MEDIA_JSON: "json",
+    MEDIA_ARROW: "arrow",
+    MEDIA_MSGPACK: "msgpack",
+    "application/x-msgpack": "msgpack",
+    MEDIA_F32: "f32",
+}
+
+FORMAT_MEDIA = {"json": MEDIA_JSON, "arrow": MEDIA_ARROW, "msgpack": MEDIA_MSGPACK, "f32": MEDIA_F32}
+
+ROW_TYPES = ("history", "forecast")
+
+
+def _available(fmt):
+    return {
+        "json": True,
+        "f32": True,
+        "msgpack": msgpack is not None,
+        "arrow": pa is not None,
+    }[fmt]
+
+
+def _parse_header_list(value):
+    """
+    Parses 'a/b;q=0.5, c/d' into [(token, q)] sorted by q (stable).
+    """
+    items = []
+    for position, part in enumerate((value or "").split(",")):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, val = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(val)
+                except ValueError:
+                    q = 0.0
+        items.append((token.strip().lower(), q, position))
+    items.sort(key=lambda item: (-item[1], item[2]))
+    return [(token, q) for token, q, _ in items if q > 0]
+
+
+def negotiate_format(accept_header):
+    """
+    Picks the best supported response format from an Accept header;
+    JSON when nothing better is requested or available.
+    """
+    for media, _ in _parse_header_list(accept_header):
+        fmt = ACCEPTED_MEDIA.get(media)
+        if fmt and _available(fmt):
+            return fmt
+    return "json"
+
+
+def rows_to_columns(rows):
+    """
+    Row dicts (as returned by run_forecast) → dict of column lists.
+    """
+    if not rows:
+        return {}
+    return {key: [row[key] for row in rows] for key in rows[0]}
+
+
+def _typed_columns(columns):
+    """
+    Converts columns to compact typed arrays:
+      timestamp → float64 epoch milliseconds
+      type      → uint8 codes (see ROW_TYPES)
+      others    → float32
+    """
+    typed = {}
+    for name, values in columns.items():
+        if name == "timestamp":
+            ns = pd.DatetimeIndex(values).as_unit("ns").asi8
+            typed[name] = (ns / 1e6).astype("<f8")
+        elif name == "type":
+            typed[name] = np.array([ROW_TYPES.index(v) for v in values], dtype="u1")
+        else:
+            typed[name] = np.asarray(values, dtype="<f4")
+    return typed
+
+
+def encode_json(body):
+    if orjson is not None:
+        return orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(body, default=str).encode("utf-8")
+
+
+def encode_f32(meta, columns):
+    """
+    Raw little-endian buffers behind a small JSON header:
+
+        uint32 header_length | header JSON | padding to 8 | buffers
+
+    Column offsets in the header are relative to the buffer section, which
+    starts at the first multiple of 8 after the header; every buffer is
+    8-byte aligned so the client can wrap it in a typed array directly.
+    """
+    typed = _typed_columns(columns)
+    layout = []
+    offset = 0
+    for name, array in typed.items():
+        layout.append({
+            "name": name,
+            "dtype": array.dtype.str,
+            "length": int(len(array)),
+            "offset": offset,
+        })
+        offset += -(-array.nbytes // 8) * 8
+
+    header = encode_json({**meta, "row_types": list(ROW_TYPES), "columns": layout})
+    parts = [struct.pack("<I", len(header)), header, b"\0" * (-(4 + len(header)) % 8)]
+    for array in typed.values():
+        raw = array.tobytes()
+        parts.append(raw)
+        parts.append(b"\0" * (-len(raw) % 8))
+    return b"".join(parts)
+
+
+def encode_msgpack(meta, columns):
+    typed = _typed_columns(columns)
+    return msgpack.packb({
+        **meta,
+        "row_types": list(ROW_TYPES),
+        "columns": {
+            name: {"dtype": array.dtype.str, "data": array.tobytes()}
+            for name, array in typed.items()
+        },
+    })
+
+
+def encode_arrow(meta, columns):
+    """
+    Arrow IPC stream; non-columnar fields travel as schema metadata (JSON).
+    """
+    typed = _typed_columns(columns)
+    arrays, names = [], []
+    for name, array in typed.items():
+        if name == "timestamp":
+            arrays.append(pa.array(array.astype("i8"), type=pa.timestamp("ms")))
+        elif name == "type":
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array(array, type=pa.uint8()), pa.array(ROW_TYPES)
+            ))
+        else:
+            arrays.append(pa.array(array))
+        names.append(name)
+
+    batch = pa.record_batch(arrays, names=names)
+    schema = batch.schema.with_metadata({"meta": encode_json(meta)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(batch.replace_schema_metadata(schema.metadata))
+    return sink.getvalue().to_pybytes()
+
+
+def _compress(body, accept_encoding):
+    """
+    gzip/brotli above RESPONSE_COMPRESSION_MIN_BYTES, per Accept-Encoding.
+    """
+    if len(body) < Config.RESPONSE_COMPRESSION_MIN_BYTES:
+        return body, None
+    for coding, _ in _parse_header_list(accept_encoding):
+        if coding == "br" and brotli is not None:
+            return brotli.compress(body, quality=4), "br"
+        if coding == "gzip":
+            return gzip.compress(body, compresslevel=5), "gzip"
+    return body, None
+
+
+def encode_response(request: Request, meta, columns, json_body, headers=None):
+    """
+    Builds the negotiated response for a time-series payload.
+
+    Args:
+        meta (dict): non-columnar fields (ids, diagnostics)
+        columns (dict): column name → list/array (timestamp as ISO strings)
+        json_body (dict): body for the JSON path (kept in its existing shape)
+    """
+    fmt = negotiate_format(request.headers.get("accept"))
+
+    if fmt == "arrow":
+        body = encode_arrow(meta, columns)
+    elif fmt == "msgpack":
+        body = encode_msgpack(meta, columns)
+    elif fmt == "f32":
+        body = encode_f32(meta, columns)
+    else:
+        body = encode_json(json_body)
+
+    body, coding = _compress(body, request.headers.get("accept-encoding"))
+
+    response_headers = {"Vary": "Accept, Accept-Encoding", **(headers or {})}
+    if coding:
+        response_headers["Content-Encoding"] = coding
+
+    return Response(content=body, media_type=FORMAT_MEDIA[fmt], headers=response_headers)
@@ -1,87 +1,190 @@
-from fastapi import APIRouter, UploadFile, Form, HTTPException, Depends
+import asyncio
+import math
+from datetime import datetime, timezone
+from fastapi import APIRouter, UploadFile, Form, HTTPException, Depends, Query, Request
 from fastapi.responses import JSONResponse
 from utils.auth import verify_token
 from domain.stability_profiles import STABILITY_PROFILES
-from ingestion.csv_loader import load_temperature_csv, CSVSchemaError, CSVIngestionError
-from services.forecast_service import run_forecast, ForecastModelViolation
-from services.report_service import generate_investigation_report, ReportGenerationError
-from persistence.investigation_repo import (
+from services.forecast_service import ForecastModelViolation
+from services.forecast_jobs import forecast_pool, UploadIngestionError
+from services.admission import admit, admission_metrics, forecast_cost, AdmissionRejected
+from services.report_service import (
+    generate_investigation_report,
+    get_report_content,
+    ReportGenerationError,
+    ReportNotReady,
+)
+from services.batch_report_service import start_batch_reports, get_batch_job, BatchReportError
+from services.shelf_life_service import shelf_life_query, ShelfLifeQueryError
+from services.series_service import get_investigation_series, SeriesQueryError
+from services.forecast_cache import (
+    hash_upload,
+    forecast_cache_key,
+    get_cached_forecast,
+    store_forecast,
+)
+from persistence.async_investigation_repo import (
     create_investigation,
-    save_temperature_readings,
     save_calculation,
 )
+from services.readings_writer import readings_writer
 from utils.ids import generate_investigation_id
-from persistence.mongo import reports
+from persistence.async_mongo import async_collection
 from fastapi import APIRouter, Depends
 from fastapi.responses import Response
 from services.tts_service import synthesize_speech
-from config import db
-from .schema import TTSRequest
+from .schema import TTSRequest, ShelfLifeRequest, BatchReportRequest
+from .encoding import encode_response, rows_to_columns
 router = APIRouter()
 
+
+def _too_many_requests(e: AdmissionRejected):
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": str(math.ceil(e.retry_after))},
+    )
+
+
+def _forecast_response(request: Request, payload: dict, cache_status: str):
+    return encode_response(
+        request,
+        meta={
+            "investigation_id": payload["investigation_id"],
+            "preprocessing": payload["preprocessing"],
+        },
+        columns=rows_to_columns(payload["results"]),
+        json_body=payload,
+        headers={"X-Forecast-Cache": cache_status},
+    )
+
+
 @router.post("/api/forecast")
 async def forecast(
+    request: Request,
     file: UploadFile,
     time_column:str | None = Form(None),
     temperature_column: str | None = Form(None),
     temperature_unit: str = Form("C"),
     stability_profile: str = Form(...),
+    smoothing_alpha: float = Form(0.1),
+    resample_minutes: float | None = Form(None),
+    max_gap_minutes: float = Form(60.0),
+    interpolate_gaps: bool = Form(False),
+    integration: str = Form("exact"),
+    tolerance: float = Form(1e-6),
+    quadrature_nodes: int = Form(4),
+    forecast_hours: float = Form(0.0),
+    forecast_model: str = Form("holt"),
     token_payload: dict = Depends(verify_token),
 ):
     user_sub = token_payload["sub"]
 
-    # CSV ingestion
-    file.file.seek(0)
+    # Cache lookup (content hash + every result-affecting parameter)
+    cache_key = forecast_cache_key(
+        content_hash=await asyncio.to_thread(hash_upload, file.file),
+        user_sub=user_sub,
+        params={
+            "time_column": time_column,
+            "temperature_column": temperature_column,
+            "temperature_unit": temperature_unit,
+            "stability_profile": stability_profile,
+            "smoothing_alpha": smoothing_alpha,
+            "resample_minutes": resample_minutes,
+            "max_gap_minutes": max_gap_minutes,
+            "interpolate_gaps": interpolate_gaps,
+            "integration": integration,
+            "tolerance": tolerance,
+            "quadrature_nodes": quadrature_nodes,
+            "forecast_hours": forecast_hours,
+            "forecast_model": forecast_model,
+        },
+    )
+    cached = await get_cached_forecast(cache_key)
+    if cached:
+        return _forecast_response(request, cached["payload"], f"hit-{cached['tier']}")
 
+    # Ingestion (CSV / compressed CSV / Parquet / Arrow IPC), preprocessing
+    # (de-duplication, gaps, resampling) and forecast, in a worker process
+    # once admitted (per-user fair share of the forecast slots)
     try:
-        if file.filename.lower().endswith(".csv"):
-            df = load_temperature_csv(
-                file_obj=file.file,
-                time_column=time_column,
-                temperature_column=temperature_column,
-                temperature_unit=temperature_unit,
+        async with admit("forecast", user_sub, cost=forecast_cost(file.size)):
+            job = await forecast_pool.run(
+                file.file,
+                file.filename,
+                ingest_params={
+                    "time_column": time_column,
+                    "temperature_column": temperature_column,
+                    "temperature_unit": temperature_unit,
+                },
+                preprocess_params={
+                    "resolution_minutes": resample_minutes,
+                    "max_gap_minutes": max_gap_minutes,
+                    "interpolate_gaps": interpolate_gaps,
+                },
+                forecast_params={
+                    "stability_profile_key": stability_profile,
+                    "smoothing_alpha": smoothing_alpha,
+                    "integration": integration,
+                    "tolerance": tolerance,
+                    "quadrature_nodes": quadrature_nodes,
+                    "forecast_hours": forecast_hours,
+                    "forecast_model": forecast_model,
+                },
             )
-    except Exception as e:
-        import traceback
-        print("Document ingestion error:", str(e))
-        traceback.print_exc()
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
+    except UploadIngestionError as e:
         raise HTTPException(
             status_code=400,
             detail=f"Failed to extract data from document: {str(e)}"
         )
-
-
-    df = df.sort_values("timestamp").reset_index(drop=True)
-    timestamps = df["timestamp"].tolist()
-    sensor_temps = df["air_temp"].tolist()
-
-    # Forecast
-    try:
-        results, metrics = run_forecast(
-            timestamps=timestamps,
-            sensor_temps=sensor_temps,
-            stability_profile_key=stability_profile,
-        )
     except ForecastModelViolation as e:
         raise HTTPException(status_code=500, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    # Persistence
-    investigation_id = generate_investigation_id()
-    create_investigation(investigation_id, user_sub)
-    save_temperature_readings(investigation_id, timestamps, sensor_temps,user_sub)
-    save_calculation(
-        investigation_id=investigation_id,
-        profile_key=stability_profile,
-        Ea=metrics.get("Ea"),
-        A=metrics.get("A"),
-        alpha=0.1,
-        metrics=metrics,
-        user_sub=user_sub
-    )
+    # The job's shared-memory blocks are released when this block exits
+    with job:
+        results = await asyncio.to_thread(job.results)
+        preprocessing = job.preprocessing
+        metrics = job.metrics
+
+        # Persistence
+        profile = STABILITY_PROFILES[stability_profile]
+        investigation_id = generate_investigation_id()
+        # The calculation is committed before responding; raw readings are
+        # spooled and written behind (status COMPUTED → PERSISTED)
+        _, calculation_id = await asyncio.gather(
+            create_investigation(investigation_id, user_sub),
+            save_calculation(
+                investigation_id=investigation_id,
+                profile_key=stability_profile,
+                Ea=profile["Ea"],
+                A=profile["A"],
+                alpha=smoothing_alpha,
+                metrics=metrics,
+                user_sub=user_sub,
+                reading_facts=job.reading_facts,
+                integration={
+                    "mode": integration,
+                    "tolerance": tolerance,
+                    "quadrature_nodes": quadrature_nodes,
+                },
+            ),
+        )
+        await readings_writer.enqueue(
+            investigation_id, job.series["time_ns"], job.series["temperature_c"], user_sub
+        )
+
+    payload = {
+        "investigation_id": investigation_id,
+        "results": results,
+        "preprocessing": preprocessing,
+    }
+    await store_forecast(cache_key, payload, calculation_id, user_sub)
 
-    return JSONResponse({"investigation_id": investigation_id, "results": results})
+    return _forecast_response(request, payload, "miss")
 
 
 @router.get("/api/investigation_report/{investigation_id}")
@@ -92,13 +195,134 @@ async def investigation_report(
     user_sub = token_payload["sub"]
 
     try:
-        report = generate_investigation_report(investigation_id, user_sub)
+        async with admit("report", user_sub):
+            report = await generate_investigation_report(investigation_id, user_sub)
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
+    except ReportNotReady as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ReportGenerationError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
     return JSONResponse({"investigation_id": investigation_id, "report": report})
 
 
+@router.post("/api/reports/batch", status_code=202)
+async def batch_reports(
+    payload: BatchReportRequest,
+    token_payload: dict = Depends(verify_token),
+):
+    """
+    Starts report generation for many investigations; poll the returned
+    job_id for progress.
+    """
+    user_sub = token_payload["sub"]
+
+    try:
+        job = await start_batch_reports(
+            user_sub=user_sub,
+            investigation_ids=payload.investigation_ids,
+            created_from=_as_utc_naive(payload.created_from),
+            created_to=_as_utc_naive(payload.created_to),
+            force=payload.force,
+        )
+    except BatchReportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return job
+
+
+@router.get("/api/reports/batch/{job_id}")
+async def batch_report_progress(
+    job_id: str,
+    token_payload: dict = Depends(verify_token),
+):
+    user_sub = token_payload["sub"]
+
+    try:
+        job = await get_batch_job(job_id, user_sub)
+    except BatchReportError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return job
+
+
+@router.post("/api/investigations/{investigation_id}/shelf_life")
+async def investigation_shelf_life(
+    investigation_id: str,
+    payload: ShelfLifeRequest,
+    token_payload: dict = Depends(verify_token),
+):
+    user_sub = token_payload["sub"]
+
+    try:
+        answer = await shelf_life_query(
+            investigation_id=investigation_id,
+            user_sub=user_sub,
+            threshold_percent=payload.threshold_percent,
+            temperature_c=payload.temperature_c,
+            segments=[seg.model_dump() for seg in payload.scenario or []],
+            include_thermal_lag=payload.include_thermal_lag,
+        )
+    except ShelfLifeQueryError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return answer
+
+
+def _as_utc_naive(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.get("/api/investigations/{investigation_id}/series")
+async def investigation_series(
+    request: Request,
+    investigation_id: str,
+    start: datetime | None = Query(None),
+    end: datetime | None = Query(None),
+    max_points: int = Query(2000, ge=2, le=200000),
+    token_payload: dict = Depends(verify_token),
+):
+    """
+    Columnar, optionally downsampled window of a stored investigation.
+    """
+    user_sub = token_payload["sub"]
+
+    try:
+        series = await get_investigation_series(
+            investigation_id=investigation_id,
+            user_sub=user_sub,
+            start=_as_utc_naive(start),
+            end=_as_utc_naive(end),
+            max_points=max_points,
+        )
+    except SeriesQueryError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    columns = series.pop("columns")
+    return encode_response(
+        request,
+        meta=series,
+        columns=columns,
+        json_body={**series, "columns": columns},
+    )
+
+
+@router.get("/api/admission")
+async def get_admission_metrics(token_payload: dict = Depends(verify_token)):
+    """
+    Queue depth and admission counters per work class (this worker), plus
+    the caller's own running / queued requests.
+    """
+    return admission_metrics(token_payload["sub"])
+
+
 @router.get("/api/stability_profiles")
 async def get_stability_profiles():
     return {
@@ -121,7 +345,7 @@ async def get_reports_history(token_payload: dict = Depends(verify_token)):
     print("Token payload:", token_payload)
     print("User sub from token:", user_sub)
 
-    user_reports = reports.find(
+    user_reports = await async_collection("reports").find(
         {"user_sub": user_sub},
         {
             "_id": 0,
@@ -132,7 +356,7 @@ async def get_reports_history(token_payload: dict = Depends(verify_token)):
             "created_at": 1,
             "content": 1,
         },
-    ).sort("created_at", -1)
+    ).sort("created_at", -1).to_list(None)
 
     reports_list = []
     for r in user_reports:
@@ -157,7 +381,7 @@ async def tts_report(payload: TTSRequest):
     investigation_id = payload.investigation_id
 
     # Fetch report from DB
-    report = db.reports.find_one(
+    report = await async_collection("reports").find_one(
         {"investigation_id": investigation_id},
         {"content": 1}
     )
@@ -173,7 +397,7 @@ async def tts_report(payload: TTSRequest):
     print(f"[Route] Report found, content length: {len(report_text)}")
 
     try:
-        audio_bytes = synthesize_speech(report_text)
+        audio_bytes = await asyncio.to_thread(synthesize_speech, report_text)
         print("[Route] TTS audio bytes generated, length:", len(audio_bytes))
     except Exception as e:
         print("[Route] TTS generation failed:", str(e))
@@ -197,16 +421,9 @@ async def get_single_report(
     user_sub = token_payload["sub"]
 
     # Find the specific report belonging to this user
-    report_data = reports.find_one(
-        {
-            "user_sub": user_sub,
-            "report_id": report_id,
-            "investigation_id": investigation_id
-        },
-        {"_id": 0, "content": 1}
-    )
+    content = await get_report_content(report_id, investigation_id, user_sub)
 
-    if not report_data:
+    if content is None:
         raise HTTPException(status_code=404, detail="Report not found")
 
-    return {"content": report_data.get("content", "")}
\ No newline at end of file
+    return {"content": content}
\ No newline at end of file
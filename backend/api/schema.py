@@ -72,3 +72,30 @@ class ReportResponse(BaseModel):
 
 class TTSRequest(BaseModel):
     investigation_id: str
+
+
+# ===============================
+# Shelf-life / threshold queries
+# ===============================
+
+class ScenarioSegment(BaseModel):
+    hours: float = Field(..., ge=0)
+    temperature_c: float
+
+
+class ShelfLifeRequest(BaseModel):
+    threshold_percent: float = Field(95.0, gt=0, lt=100)
+    temperature_c: Optional[float] = None # Constant ambient temperature to evaluate
+    include_thermal_lag: bool = False
+    scenario: Optional[List[ScenarioSegment]] = None # Piecewise-constant future profile
+
+
+# ===============================
+# Batch report generation
+# ===============================
+
+class BatchReportRequest(BaseModel):
+    investigation_ids: Optional[List[str]] = None # Explicit selection
+    created_from: Optional[datetime] = None # and/or investigations created in a range
+    created_to: Optional[datetime] = None
+    force: bool = False # Regenerate even when a report for the latest calculation exists
@@ -1,15 +1,53 @@
 # app.py
 
+import asyncio
+from contextlib import asynccontextmanager
+
+import numpy as np
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.routes import router as api_router
+from persistence.mongo import ensure_indexes
+from persistence.async_mongo import close_async_client
+from services.readings_writer import readings_writer
+from services.forecast_jobs import forecast_pool
+from config import Config, open_clients, close_clients
+from domain.degradation import profile_degradation_rates
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Per worker: clients are opened after fork and closed on shutdown
+    open_clients()
+    await asyncio.to_thread(ensure_indexes)
+    await readings_writer.start()
+    forecast_pool.start()
+    yield
+    forecast_pool.stop()
+    await readings_writer.stop(timeout=Config.READINGS_DRAIN_TIMEOUT_SECONDS)
+    await close_async_client()
+    close_clients()
+
+
+def warm_up():
+    """
+    Fills import-time and per-profile caches in the master process, so
+    forked workers share them copy-on-write instead of warming up cold.
+    """
+    profile_degradation_rates(np.array([5.0]))
+    try:
+        import pyarrow.ipc  # noqa: F401  (Parquet / Arrow uploads)
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        pass
+
 
 def create_app() -> FastAPI:
     """
     Application factory for FastAPI.
     Keeps app creation deterministic and testable.
     """
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
 
     # ---- Middleware ----
     app.add_middleware(
@@ -29,5 +67,7 @@ def create_app() -> FastAPI:
 app = create_app()
 
 if __name__ == "__main__":
+    # Development server; for production run several workers with
+    #   gunicorn -c gunicorn.conf.py app:app
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=5001, log_level="info")
@@ -11,6 +11,21 @@ class Config:
     MONGO_URI = os.getenv("MONGO_URIII")
     MONGO_DB_NAME = os.getenv("MONGO_DB")
 
+    # "mongo" for a real server, "memory" for the in-process mongomock backend (tests)
+    MONGO_BACKEND = os.getenv("MONGO_BACKEND", "mongo")
+
+    # Connection pool and timeouts (shared by the sync and async clients)
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 4))
+    MONGO_MAX_CONNECTING = int(os.getenv("MONGO_MAX_CONNECTING", 4))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 60000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 30000))
+
+    # Readings are inserted in concurrent chunks of this many documents
+    MONGO_INSERT_BATCH_SIZE = int(os.getenv("MONGO_INSERT_BATCH_SIZE", 5000))
+
     AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION")
     AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
     AZURE_OPENAI_KEY = os.getenv("AZURE_OPENAI_KEY")
@@ -22,18 +37,157 @@ class Config:
     DEBUG_PRINT = True
     PRINT_EVERY_N = 60
 
+    # Shared cache for forecast, report, TTS and auth (JWKS) entries:
+    # "memory" (per worker) or "sqlite" (one file shared by the workers on a node)
+    SHARED_CACHE_BACKEND = os.getenv("SHARED_CACHE_BACKEND", "memory")
+    SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", os.path.join("var", "shared_cache.sqlite3"))
+    SHARED_CACHE_MAX_BYTES = int(os.getenv("SHARED_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+    JWKS_CACHE_TTL_SECONDS = int(os.getenv("JWKS_CACHE_TTL_SECONDS", 3600))
+    # Unknown key ids force at most one JWKS refetch per interval, and are
+    # then rejected without refetching for a while
+    JWKS_MIN_REFETCH_SECONDS = int(os.getenv("JWKS_MIN_REFETCH_SECONDS", 60))
+    JWKS_UNKNOWN_KID_TTL_SECONDS = int(os.getenv("JWKS_UNKNOWN_KID_TTL_SECONDS", 300))
+    TTS_CACHE_TTL_SECONDS = int(os.getenv("TTS_CACHE_TTL_SECONDS", 24 * 3600))
+
+    # Ingestion + forecasting run in this many processes per web worker
+    # (0: a thread pool in the web worker); series travel via shared memory
+    FORECAST_PROCESS_WORKERS = int(os.getenv("FORECAST_PROCESS_WORKERS", 2))
+    FORECAST_PROCESS_START_METHOD = os.getenv("FORECAST_PROCESS_START_METHOD", "forkserver")
+
+    # Per-user admission control for /api/forecast and report generation
+    # (per web worker): concurrent slots, per-user caps, per-user request
+    # rates (token bucket: rate per minute + burst) and queue bounds.
+    # ADMISSION_USER_WEIGHTS ("sub=2,other=0.5") skews the fair share.
+    ADMISSION_FORECAST_SLOTS = int(os.getenv("ADMISSION_FORECAST_SLOTS", max(FORECAST_PROCESS_WORKERS, 1)))
+    ADMISSION_FORECAST_PER_USER = int(os.getenv("ADMISSION_FORECAST_PER_USER", 1))
+    ADMISSION_FORECAST_PER_MINUTE = float(os.getenv("ADMISSION_FORECAST_PER_MINUTE", 30))
+    ADMISSION_FORECAST_BURST = float(os.getenv("ADMISSION_FORECAST_BURST", 10))
+    ADMISSION_FORECAST_COST_BYTES = int(os.getenv("ADMISSION_FORECAST_COST_BYTES", 1024 * 1024))
+    ADMISSION_REPORT_SLOTS = int(os.getenv("ADMISSION_REPORT_SLOTS", 4))
+    ADMISSION_REPORT_PER_USER = int(os.getenv("ADMISSION_REPORT_PER_USER", 1))
+    ADMISSION_REPORT_PER_MINUTE = float(os.getenv("ADMISSION_REPORT_PER_MINUTE", 10))
+    ADMISSION_REPORT_BURST = float(os.getenv("ADMISSION_REPORT_BURST", 5))
+    ADMISSION_MAX_QUEUE_PER_USER = int(os.getenv("ADMISSION_MAX_QUEUE_PER_USER", 8))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 256))
+    ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", 30))
+    ADMISSION_USER_WEIGHTS = os.getenv("ADMISSION_USER_WEIGHTS", "")
+
+    # Forecast result cache (shared cache + Mongo tier)
+    FORECAST_CACHE_MAX_DOC_BYTES = int(os.getenv("FORECAST_CACHE_MAX_DOC_BYTES", 8 * 1024 * 1024))
+
+    # Write-behind readings persistence (spooled to disk until written)
+    READINGS_SPOOL_DIR = os.getenv("READINGS_SPOOL_DIR", os.path.join("var", "readings_spool"))
+    READINGS_QUEUE_MAX_JOBS = int(os.getenv("READINGS_QUEUE_MAX_JOBS", 64))
+    READINGS_WRITER_WORKERS = int(os.getenv("READINGS_WRITER_WORKERS", 2))
+    READINGS_WRITE_RETRIES = int(os.getenv("READINGS_WRITE_RETRIES", 5))
+    READINGS_RETRY_BASE_SECONDS = float(os.getenv("READINGS_RETRY_BASE_SECONDS", 0.5))
+    # A job failing this many times is quarantined (investigation PERSIST_FAILED)
+    READINGS_MAX_JOB_ATTEMPTS = int(os.getenv("READINGS_MAX_JOB_ATTEMPTS", 10))
+    READINGS_DRAIN_TIMEOUT_SECONDS = float(os.getenv("READINGS_DRAIN_TIMEOUT_SECONDS", 30))
+
+    # Upper bound on the estimated report prompt size (≈4 characters per token)
+    REPORT_PROMPT_MAX_TOKENS = int(os.getenv("REPORT_PROMPT_MAX_TOKENS", 3000))
+
+    REPORT_MAX_COMPLETION_TOKENS = int(os.getenv("REPORT_MAX_COMPLETION_TOKENS", 2000))
+
+    # Batch report generation: concurrency and Azure OpenAI rate limits
+    REPORT_BATCH_CONCURRENCY = int(os.getenv("REPORT_BATCH_CONCURRENCY", 4))
+    REPORT_BATCH_FLUSH_SIZE = int(os.getenv("REPORT_BATCH_FLUSH_SIZE", 20))
+    REPORT_BATCH_MAX_INVESTIGATIONS = int(os.getenv("REPORT_BATCH_MAX_INVESTIGATIONS", 1000))
+    OPENAI_REQUESTS_PER_MINUTE = float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", 60))
+    OPENAI_TOKENS_PER_MINUTE = float(os.getenv("OPENAI_TOKENS_PER_MINUTE", 80000))
+
+    # Responses smaller than this are sent uncompressed
+    RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", 64 * 1024))
+
+
+def mongo_client_options():
+    return {
+        "maxPoolSize": Config.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": Config.MONGO_MIN_POOL_SIZE,
+        "maxConnecting": Config.MONGO_MAX_CONNECTING,
+        "maxIdleTimeMS": Config.MONGO_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": Config.MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": Config.MONGO_SOCKET_TIMEOUT_MS,
+    }
+
 
-mongo_client = MongoClient(Config.MONGO_URI)
+# Clients. The Mongo client connects lazily (connect=False), so it is safe to
+# create before a pre-forking server forks; OpenAI and Speech clients are
+# opened per worker from the application lifespan (open_clients).
+if Config.MONGO_BACKEND == "memory":
+    import mongomock
+    mongo_client = mongomock.MongoClient()
+else:
+    mongo_client = MongoClient(Config.MONGO_URI, connect=False, **mongo_client_options())
 db = mongo_client[Config.MONGO_DB_NAME]
 
-openai_client = AzureOpenAI(
-    api_version=Config.AZURE_OPENAI_API_VERSION,
-    azure_endpoint=Config.AZURE_OPENAI_ENDPOINT,
-    api_key=Config.AZURE_OPENAI_KEY,
-)
+openai_client = None
+speech_config = None
+
+# Stand-ins for external clients (load tests, local runs), keyed by
+# "mongo" (async client), "openai", "speech" and "auth"; see override_client
+client_overrides = {}
+
+
+def override_client(name, client):
+    """
+    Replaces an external client for this process. Must run before the app
+    starts serving (e.g. at import time of a launcher module).
+    """
+    if name not in ("mongo", "openai", "speech", "auth"):
+        raise ValueError(f"Unknown client: {name}")
+    client_overrides[name] = client
+
+
+def get_openai_client():
+    global openai_client
+    if "openai" in client_overrides:
+        return client_overrides["openai"]
+    if openai_client is None:
+        openai_client = AzureOpenAI(
+            api_version=Config.AZURE_OPENAI_API_VERSION,
+            azure_endpoint=Config.AZURE_OPENAI_ENDPOINT,
+            api_key=Config.AZURE_OPENAI_KEY,
+        )
+    return openai_client
+
+
+def get_speech_config():
+    global speech_config
+    if speech_config is None:
+        import azure.cognitiveservices.speech as speechsdk
+        speech_config = speechsdk.SpeechConfig(
+            subscription=os.getenv("AZURE_SPEECH_KEY"),
+            region=os.getenv("AZURE_SPEECH_REGION"),
+        )
+        speech_config.speech_synthesis_voice_name = "en-US-RyanMultilingualNeural"
+        speech_config.set_speech_synthesis_output_format(
+            speechsdk.SpeechSynthesisOutputFormat.Riff24Khz16BitMonoPcm
+        )
+    return speech_config
+
+
+def open_clients():
+    """
+    Opens the per-worker API clients; called from the app lifespan.
+    """
+    get_openai_client()
+    if os.getenv("AZURE_SPEECH_KEY") and "speech" not in client_overrides:
+        get_speech_config()
+
+
+def close_clients():
+    global openai_client, speech_config
+    if openai_client is not None:
+        openai_client.close()
+        openai_client = None
+    speech_config = None
+    mongo_client.close()
 
 
 azure_di_client = DocumentAnalysisClient(
     endpoint=Config.AZURE_ADI_ENDPOINT,
     credential=AzureKeyCredential(Config.AZURE_ADI_KEY),
-)
\ No newline at end of file
+)
@@ -3,6 +3,11 @@
 
 import math
 
+import numpy as np
+
+ABSOLUTE_ZERO_C = -273.15
+
+
 def degradation_rate(product_temp, A=1e13, Ea=90000):
     """
     Calculate the reaction rate using the Arrhenius equation.
@@ -17,9 +22,99 @@ def degradation_rate(product_temp, A=1e13, Ea=90000):
 
     Returns:
         float: Degradation rate (1/hour)
+
+    Raises:
+        ValueError: product_temp at or below absolute zero
     """
     R = 8.314
-    T_kelvin = product_temp + 273.15
+    T_kelvin = product_temp - ABSOLUTE_ZERO_C
+    if not T_kelvin > 0:
+        raise ValueError(f"Temperature {product_temp} °C is at or below absolute zero")
 
     k = A * math.exp(-Ea / (R * T_kelvin))
     return k
+
+
+def degradation_rates(product_temps, A=1e13, Ea=90000):
+    """
+    Vectorized degradation_rate for an array of product temperatures (°C).
+
+    Returns:
+        np.ndarray: Degradation rates (1/hour)
+
+    Raises:
+        ValueError: any temperature at or below absolute zero
+    """
+    R = 8.314
+    T_kelvin = np.asarray(product_temps, dtype=float) - ABSOLUTE_ZERO_C
+    if np.any(T_kelvin <= 0):
+        raise ValueError(
+            f"Temperature {float(np.min(product_temps)):.2f} °C is at or below absolute zero"
+        )
+    return A * np.exp(-Ea / (R * T_kelvin))
+
+
+_PROFILE_RATE_CACHE = {"fingerprint": None, "keys": (), "A": None, "Ea": None}
+
+
+def _profile_rate_constants():
+    """
+    Per-profile Arrhenius constants as aligned arrays.
+
+    Cached in memory; the cache is rebuilt whenever the (A, Ea) entries of
+    STABILITY_PROFILES change, so edits to the profiles take effect on the
+    next call without an explicit invalidation.
+    """
+    from domain.stability_profiles import STABILITY_PROFILES
+
+    fingerprint = tuple(
+        (key, profile["A"], profile["Ea"])
+        for key, profile in STABILITY_PROFILES.items()
+    )
+    if fingerprint != _PROFILE_RATE_CACHE["fingerprint"]:
+        _PROFILE_RATE_CACHE.update({
+            "fingerprint": fingerprint,
+            "keys": tuple(key for key, _, _ in fingerprint),
+            "A": np.array([A for _, A, _ in fingerprint], dtype=float),
+            "Ea": np.array([Ea for _, _, Ea in fingerprint], dtype=float),
+        })
+    return _PROFILE_RATE_CACHE
+
+
+def profile_degradation_rates(product_temps, profile_keys=None):
+    """
+    Degradation rates for several stability profiles at once.
+
+    Evaluates A_p * exp(-Ea_p / (R*T)) as one broadcast (profiles × samples)
+    array operation instead of one exp per sample and profile. Each row is
+    bit-for-bit what degradation_rates returns for that profile.
+
+    Args:
+        product_temps (array-like): product temperatures (°C)
+        profile_keys (list[str] | None): profiles to evaluate (default: all)
+
+    Returns:
+        (tuple[str], np.ndarray): profile keys and rates of shape
+            (len(profile_keys), len(product_temps)) in 1/hour
+
+    Raises:
+        ValueError: unknown profile, or a temperature at or below absolute zero
+    """
+    constants = _profile_rate_constants()
+    keys = constants["keys"] if profile_keys is None else tuple(profile_keys)
+
+    unknown = set(keys) - set(constants["keys"])
+    if unknown:
+        raise ValueError(f"Unknown stability profile(s): {sorted(unknown)}")
+
+    T_kelvin = np.asarray(product_temps, dtype=float) - ABSOLUTE_ZERO_C
+    if np.any(T_kelvin <= 0):
+        raise ValueError(
+            f"Temperature {float(np.min(product_temps)):.2f} °C is at or below absolute zero"
+        )
+
+    R = 8.314
+    rows = [constants["keys"].index(key) for key in keys]
+    A = constants["A"][rows][:, None]
+    Ea = constants["Ea"][rows][:, None]
+    return keys, A * np.exp(-Ea / (R * T_kelvin[None, :]))
@@ -0,0 +1,220 @@
+# domain/exposure.py
+# Cold-chain exposure aggregates (MKT, time in range, degree-hours)
+# smoothing → thermal → degradation → exposure → forecasting → Flask
+
+import math
+
+import numpy as np
+
+R = 8.314
+
+
+def accumulate_exposure(
+    delta_hours,
+    sensor_temps,
+    product_temps,
+    storage_min,
+    storage_max,
+    Ea,
+):
+    """
+    Computes mergeable exposure accumulators for one chunk of a series in a
+    single vectorized pass.
+
+    Each sample i is treated as representing the interval that ends at it
+    (length delta_hours[i]), matching how run_forecast integrates damage.
+    For the first chunk of a series delta_hours[0] is 0; for later chunks it
+    is the gap to the last sample of the previous chunk.
+
+    Args:
+        delta_hours (array-like): interval length per sample (hours)
+        sensor_temps (array-like): recorded air temperatures (°C)
+        product_temps (array-like): estimated product temperatures (°C)
+        storage_min (float): lower labeled storage limit (°C)
+        storage_max (float): upper labeled storage limit (°C)
+        Ea (float): activation energy used for MKT (J/mol)
+
+    Returns:
+        dict: raw accumulators; combine with merge_exposure and turn into
+              reportable metrics with finalize_exposure
+    """
+    dt = np.asarray(delta_hours, dtype=float)
+    sensor = np.asarray(sensor_temps, dtype=float)
+    product = np.asarray(product_temps, dtype=float)
+
+    if not (len(dt) == len(sensor) == len(product)):
+        raise ValueError("delta_hours, sensor_temps and product_temps must align")
+
+    if len(sensor) == 0:
+        return empty_exposure(Ea)
+
+    above = np.maximum(sensor - storage_max, 0.0)
+    below = np.maximum(storage_min - sensor, 0.0)
+
+    # exp(-Ea/RT) is shifted by the chunk's own maximum so that very cold
+    # profiles do not underflow; merge_exposure re-aligns the shifts.
+    log_weights = -Ea / (R * (sensor + 273.15))
+    log_shift = float(log_weights.max())
+
+    return {
+        "Ea": Ea,
+        "samples": int(len(sensor)),
+        "total_hours": float(dt.sum()),
+        "hours_in_range": float(dt[(above == 0.0) & (below == 0.0)].sum()),
+        "hours_above_range": float(dt[above > 0.0].sum()),
+        "hours_below_range": float(dt[below > 0.0].sum()),
+        "degree_hours_above": float((above * dt).sum()),
+        "degree_hours_below": float((below * dt).sum()),
+        "mkt_log_shift": log_shift,
+        "mkt_weight_sum": float((np.exp(log_weights - log_shift) * dt).sum()),
+        "peak_sensor_temp_c": float(sensor.max()),
+        "min_sensor_temp_c": float(sensor.min()),
+        "peak_product_temp_c": float(product.max()),
+        "min_product_temp_c": float(product.min()),
+    }
+
+
+def empty_exposure(Ea):
+    """
+    Identity element for merge_exposure.
+    """
+    return {
+        "Ea": Ea,
+        "samples": 0,
+        "total_hours": 0.0,
+        "hours_in_range": 0.0,
+        "hours_above_range": 0.0,
+        "hours_below_range": 0.0,
+        "degree_hours_above": 0.0,
+        "degree_hours_below": 0.0,
+        "mkt_log_shift": -math.inf,
+        "mkt_weight_sum": 0.0,
+        "peak_sensor_temp_c": -math.inf,
+        "min_sensor_temp_c": math.inf,
+        "peak_product_temp_c": -math.inf,
+        "min_product_temp_c": math.inf,
+    }
+
+
+def merge_exposure(a, b):
+    """
+    Combines the accumulators of two chunks (order independent).
+    """
+    if a["Ea"] != b["Ea"]:
+        raise ValueError("Cannot merge exposure accumulators with different Ea")
+
+    shift = max(a["mkt_log_shift"], b["mkt_log_shift"])
+
+    def rescaled(acc):
+        if acc["mkt_weight_sum"] == 0.0:
+            return 0.0
+        return acc["mkt_weight_sum"] * math.exp(acc["mkt_log_shift"] - shift)
+
+    merged = {"Ea": a["Ea"], "samples": a["samples"] + b["samples"]}
+    for key in (
+        "total_hours",
+        "hours_in_range",
+        "hours_above_range",
+        "hours_below_range",
+        "degree_hours_above",
+        "degree_hours_below",
+    ):
+        merged[key] = a[key] + b[key]
+
+    merged["mkt_log_shift"] = shift
+    merged["mkt_weight_sum"] = rescaled(a) + rescaled(b)
+    merged["peak_sensor_temp_c"] = max(a["peak_sensor_temp_c"], b["peak_sensor_temp_c"])
+    merged["min_sensor_temp_c"] = min(a["min_sensor_temp_c"], b["min_sensor_temp_c"])
+    merged["peak_product_temp_c"] = max(a["peak_product_temp_c"], b["peak_product_temp_c"])
+    merged["min_product_temp_c"] = min(a["min_product_temp_c"], b["min_product_temp_c"])
+    return merged
+
+
+def finalize_exposure(acc):
+    """
+    Converts raw accumulators into QA-facing exposure metrics.
+
+    Mean Kinetic Temperature (time weighted, sensor temperature):
+        MKT = (Ea / R) / -ln( Σ Δt·exp(-Ea / (R·T)) / Σ Δt )
+
+    Returns:
+        dict: MKT, time in/above/below range (hours) and degree-hours
+    """
+    total = acc["total_hours"]
+    Ea = acc["Ea"]
+
+    if total > 0.0 and acc["mkt_weight_sum"] > 0.0:
+        log_mean = math.log(acc["mkt_weight_sum"] / total) + acc["mkt_log_shift"]
+        mkt_c = (Ea / R) / -log_mean - 273.15
+    elif acc["samples"] > 0:
+        # Zero elapsed time: MKT degenerates to the (single) recorded value
+        mkt_c = acc["peak_sensor_temp_c"]
+    else:
+        mkt_c = None
+
+    return {
+        "mean_kinetic_temp_c": mkt_c,
+        "total_duration_hours": total,
+        "time_in_range_hours": acc["hours_in_range"],
+        "time_above_range_hours": acc["hours_above_range"],
+        "time_below_range_hours": acc["hours_below_range"],
+        "time_in_range_percent": (
+            100.0 * acc["hours_in_range"] / total if total > 0.0 else None
+        ),
+        "degree_hours_above_limit": acc["degree_hours_above"],
+        "degree_hours_below_limit": acc["degree_hours_below"],
+    }
+
+
+def excursion_intervals(hours, temps, storage_min, storage_max):
+    """
+    Contiguous runs of samples outside the labeled storage range.
+
+    Runs are found from the change points of the in/above/below state in one
+    vectorized pass. As in accumulate_exposure, sample i covers the interval
+    (hours[i-1], hours[i]], so a run i..j spans hours[i-1] → hours[j].
+
+    Args:
+        hours (array-like): sample times (hours, increasing)
+        temps (array-like): recorded air temperatures (°C)
+
+    Returns:
+        list[dict]: per excursion — direction ("above"/"below"), start/end
+                    sample indices, start/end hours, duration, extreme
+                    temperature and degree-hours beyond the limit
+    """
+    hours = np.asarray(hours, dtype=float)
+    temps = np.asarray(temps, dtype=float)
+    if len(temps) == 0:
+        return []
+
+    state = np.where(temps > storage_max, 1, np.where(temps < storage_min, -1, 0))
+    run_starts = np.flatnonzero(np.diff(state, prepend=state[0] - 1))
+    run_ends = np.append(run_starts[1:] - 1, len(state) - 1)
+
+    dt = np.diff(hours, prepend=hours[0])
+    beyond = np.where(state > 0, temps - storage_max, storage_min - temps) * dt
+
+    # Reductions over every run (in-range ones included), then keep excursions
+    degree_hours = np.add.reduceat(beyond, run_starts)
+    highs = np.maximum.reduceat(temps, run_starts)
+    lows = np.minimum.reduceat(temps, run_starts)
+    run_state = state[run_starts]
+
+    intervals = []
+    for n in np.flatnonzero(run_state != 0).tolist():
+        i = int(run_starts[n])
+        j = int(run_ends[n])
+        above = run_state[n] > 0
+        start_hours = hours[i - 1] if i > 0 else hours[i]
+        intervals.append({
+            "direction": "above" if above else "below",
+            "start_index": i,
+            "end_index": j,
+            "start_hours": float(start_hours),
+            "end_hours": float(hours[j]),
+            "duration_hours": float(hours[j] - start_hours),
+            "extreme_temp_c": float(highs[n] if above else lows[n]),
+            "degree_hours": float(degree_hours[n]),
+        })
+    return intervals
@@ -1,27 +1,246 @@
 # domain/forecasting.py
 # smoothing → thermal → degradation → forecasting → Flask
 
-
-# domain/forecasting.py
+from collections import deque
 
 import numpy as np
 
-def forecast_future_temps(recent_temps, hours):
+from domain.degradation import degradation_rates
+
+FORECAST_MODELS = ("holt", "linear")
+
+
+class RollingLinearTrend:
+    """
+    Least-squares line over a sliding time window with O(1) updates.
+
+    Keeps running sums (n, Σx, Σy, Σxy, Σx²) and subtracts points as they
+    leave the window, so the trend never has to be refit from scratch.
+    """
+
+    def __init__(self, window_hours=6.0):
+        if window_hours <= 0:
+            raise ValueError("window_hours must be positive")
+        self.window_hours = window_hours
+        self._points = deque()
+        self._n = 0
+        self._sx = self._sy = self._sxy = self._sxx = 0.0
+
+    def update(self, x, y):
+        """
+        Adds an observation (x in hours, y in °C) and evicts expired ones.
+        """
+        x = float(x)
+        y = float(y)
+        self._points.append((x, y))
+        self._add(x, y, 1)
+
+        while self._points and x - self._points[0][0] > self.window_hours:
+            old_x, old_y = self._points.popleft()
+            self._add(old_x, old_y, -1)
+
+    def _add(self, x, y, sign):
+        self._n += sign
+        self._sx += sign * x
+        self._sy += sign * y
+        self._sxy += sign * x * y
+        self._sxx += sign * x * x
+
+    @property
+    def slope(self):
+        """Trend in °C per hour (0 until two distinct times are seen)."""
+        denom = self._n * self._sxx - self._sx * self._sx
+        if self._n < 2 or denom <= 1e-12:
+            return 0.0
+        return (self._n * self._sxy - self._sx * self._sy) / denom
+
+    @property
+    def level(self):
+        """Fitted value at the most recent observation time."""
+        if self._n == 0:
+            raise ValueError("No observations in window")
+        last_x = self._points[-1][0]
+        mean_x = self._sx / self._n
+        mean_y = self._sy / self._n
+        return mean_y + self.slope * (last_x - mean_x)
+
+    def project(self, horizons_hours):
+        """
+        Vectorized projection at many horizons past the last observation.
+        """
+        h = np.asarray(horizons_hours, dtype=float)
+        return self.level + self.slope * h
+
+
+class HoltTrend:
+    """
+    Holt (double) exponential smoothing for irregularly sampled series.
+
+    alpha and beta are the smoothing weights for one reference_hours
+    interval. Each update rescales them to the actual sample spacing,
+    w = 1 - (1 - weight) ** (delta_hours / reference_hours), so the level
+    and trend respond on the same time scale whether readings arrive every
+    second or every hour; with fixed per-sample weights the level-change
+    term (divided by delta_hours) turns sensor noise on dense data into a
+    large spurious trend. Trend is kept in °C per hour.
+    """
+
+    def __init__(self, alpha=0.1, beta=0.05, level=None, trend=0.0, reference_hours=1.0):
+        if not (0 < alpha <= 1):
+            raise ValueError("alpha must be in (0, 1]")
+        if not (0 <= beta <= 1):
+            raise ValueError("beta must be in [0, 1]")
+        if reference_hours <= 0:
+            raise ValueError("reference_hours must be positive")
+        self.alpha = alpha
+        self.beta = beta
+        self.reference_hours = reference_hours
+        self.level = level
+        self.trend = trend
+
+    def _weight(self, weight, delta_hours):
+        return 1.0 - (1.0 - weight) ** (delta_hours / self.reference_hours)
+
+    def update(self, y, delta_hours):
+        y = float(y)
+        if self.level is None:
+            self.level = y
+            return
+        if delta_hours <= 0:
+            # Same timestamp: no time has passed for the state to move
+            return
+
+        alpha = self._weight(self.alpha, delta_hours)
+        beta = self._weight(self.beta, delta_hours)
+        predicted = self.level + self.trend * delta_hours
+        new_level = alpha * y + (1 - alpha) * predicted
+        self.trend = (
+            beta * (new_level - self.level) / delta_hours
+            + (1 - beta) * self.trend
+        )
+        self.level = new_level
+
+    @property
+    def slope(self):
+        return self.trend
+
+    def project(self, horizons_hours):
+        """
+        Vectorized projection at many horizons past the last observation.
+        """
+        if self.level is None:
+            raise ValueError("No observations seen")
+        h = np.asarray(horizons_hours, dtype=float)
+        return self.level + self.trend * h
+
+
+def fit_trend_model(hours, temps, model="holt", alpha=0.1, beta=0.05, window_hours=6.0):
     """
-    Predict future product temperatures using a linear trend.
+    Streams a series through the chosen trend model.
 
     Args:
-        recent_temps (list of float): last few smoothed or product temps
-        hours_ahead (int): number of hours to predict
+        hours (array-like): sample times (hours, increasing)
+        temps (array-like): sensor temperatures (°C)
+        model (str): "holt" or "linear" (rolling least squares)
 
     Returns:
-        list of float: predicted temperatures
+        HoltTrend | RollingLinearTrend: fitted model
     """
-    x = np.arange(len(recent_temps))
-    y = recent_temps
-    if len(x) > 1:
-        slope = np.polyfit(x, y, 1)[0]
+    if model not in FORECAST_MODELS:
+        raise ValueError(f"Unknown forecast model: {model}")
+
+    if model == "holt":
+        fitted = HoltTrend(alpha=alpha, beta=beta)
+        prev = None
+        for x, y in zip(hours, temps):
+            fitted.update(y, 0.0 if prev is None else x - prev)
+            prev = x
     else:
-        slope = 0.0
-    last_temp = recent_temps[-1]
-    return [last_temp + slope * (i + 1) for i in range(hours)]
+        fitted = RollingLinearTrend(window_hours=window_hours)
+        for x, y in zip(hours, temps):
+            fitted.update(x, y)
+
+    return fitted
+
+
+def project_product_temps(product_temp, sensor_level, sensor_slope, horizons_hours, k=0.25):
+    """
+    Product temperature under a linearly projected sensor temperature.
+
+    For Ts(h) = level + slope*h, Newton's law of cooling has the closed form
+        T(h) = Ts(h) - slope/k + (T0 - level + slope/k) * exp(-k h)
+    which is evaluated for all horizons at once.
+    """
+    h = np.asarray(horizons_hours, dtype=float)
+    lag = sensor_slope / k
+    return (
+        sensor_level + sensor_slope * h - lag
+        + (product_temp - sensor_level + lag) * np.exp(-k * h)
+    )
+
+
+def projected_damage(
+    product_temp,
+    sensor_level,
+    sensor_slope,
+    horizons_hours,
+    A,
+    Ea,
+    k=0.25,
+    resolution_hours=0.1,
+):
+    """
+    Damage accumulated from now until each horizon under a linear sensor
+    projection.
+
+    Damage is the trapezoidal integral of the Arrhenius rate along the
+    closed-form product trajectory on one shared grid, interpolated at the
+    requested horizons, so any number of horizons costs a single pass.
+
+    Returns:
+        np.ndarray: damage increment at each horizon
+    """
+    h = np.asarray(horizons_hours, dtype=float)
+    if np.any(h < 0):
+        raise ValueError("horizons must be non-negative")
+
+    horizon_max = float(h.max()) if h.size else 0.0
+    n_grid = max(int(np.ceil(horizon_max / resolution_hours)), 1) + 1
+    grid = np.linspace(0.0, horizon_max, n_grid)
+
+    grid_temps = project_product_temps(product_temp, sensor_level, sensor_slope, grid, k=k)
+    rates = degradation_rates(grid_temps, A=A, Ea=Ea)
+    grid_damage = np.concatenate([
+        [0.0],
+        np.cumsum(0.5 * (rates[1:] + rates[:-1]) * np.diff(grid)),
+    ])
+
+    return np.interp(h, grid, grid_damage)
+
+
+def project_potency(
+    product_temp,
+    cumulative_damage,
+    sensor_level,
+    sensor_slope,
+    horizons_hours,
+    A,
+    Ea,
+    k=0.25,
+    resolution_hours=0.1,
+):
+    """
+    Potency at arbitrary horizons under the projected temperatures.
+
+    Returns:
+        (np.ndarray, np.ndarray): product temperatures and potency (%)
+    """
+    damage = cumulative_damage + projected_damage(
+        product_temp, sensor_level, sensor_slope, horizons_hours,
+        A, Ea, k=k, resolution_hours=resolution_hours,
+    )
+    return (
+        project_product_temps(product_temp, sensor_level, sensor_slope, horizons_hours, k=k),
+        100.0 * np.exp(-damage),
+    )
+
@@ -0,0 +1,34 @@
+# gunicorn.conf.py
+# Production launcher: N uvicorn workers behind one gunicorn master.
+#
+#   gunicorn -c gunicorn.conf.py app:app
+#
+# The app is imported once in the master (preload_app) and warmed up before
+# workers fork. Each worker then runs the FastAPI lifespan, which opens its
+# own Mongo/OpenAI/Speech clients. Set SHARED_CACHE_BACKEND=sqlite so the
+# forecast, report, TTS and JWKS caches are shared by the workers on a node.
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:5001")
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+timeout = int(os.getenv("WORKER_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 45))
+keepalive = 5
+
+# Recycle workers now and then to bound memory growth
+max_requests = int(os.getenv("MAX_REQUESTS", 2000))
+max_requests_jitter = 200
+
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported, before fork
+    from app import warm_up
+    warm_up()
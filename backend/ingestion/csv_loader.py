@@ -1,10 +1,61 @@
 # ingestion/csv_loader.py
 
+import io
+import re
+from datetime import datetime
+
 import pandas as pd
 from config import azure_di_client
+from domain.degradation import ABSOLUTE_ZERO_C
 from fastapi import HTTPException
 import difflib
 
+SNIFF_BYTES = 64 * 1024
+SNIFF_SAMPLE_ROWS = 200
+
+TIME_COLUMN_HINTS = [
+    "timestamp", "time", "datetime", "date_time", "date",
+    "recorded_at", "logged_at", "measurement_time", "sample_time",
+]
+
+TEMPERATURE_COLUMN_HINTS = [
+    "temperature", "temp", "air_temp", "air_temperature", "temperature_c",
+    "temperature_celsius", "temp_c", "temperature_f", "temp_f", "celsius",
+]
+
+# Tried in order; the first format that parses every sampled value wins
+DATETIME_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%d %H:%M:%S%z",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y/%m/%d %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%Y %I:%M %p",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y %H:%M",
+    "%d-%m-%Y %H:%M:%S",
+    "%Y-%m-%d",
+    "%m/%d/%Y",
+    "%d/%m/%Y",
+]
+
+# Smallest magnitude of a plausible (post-1973) epoch value per unit
+EPOCH_UNITS = [("ns", 1e17), ("us", 1e14), ("ms", 1e11), ("s", 1e8)]
+
+# Unparseable timestamps quoted in the error message
+MAX_REPORTED_BAD_TIMESTAMPS = 5
+
 class CSVSchemaError(Exception):
     """Raised when required columns are missing or malformed."""
     pass
@@ -15,36 +66,272 @@ class CSVIngestionError(Exception):
     pass
 
 
+def _normalize_name(name):
+    return re.sub(r"[^a-z0-9]+", "_", str(name).strip().lower()).strip("_")
+
+
+def _rank_columns(columns, hints):
+    """
+    Orders columns by how closely their names match the hints: exact match,
+    then difflib similarity, then hint substrings (e.g. "Temp (C)").
+    """
+    ranked = []
+    for col in columns:
+        name = _normalize_name(col)
+        if name in hints:
+            score = 2.0
+        else:
+            close = difflib.get_close_matches(name, hints, n=1, cutoff=0.75)
+            if close:
+                score = 1.0 + difflib.SequenceMatcher(None, name, close[0]).ratio() / 10
+            elif any(hint in name.split("_") for hint in hints):
+                score = 0.5
+            else:
+                continue
+        ranked.append((score, col))
+    return [col for _, col in sorted(ranked, key=lambda x: -x[0])]
+
+
+def infer_datetime_format(values):
+    """
+    Infers one explicit strptime format (or epoch unit) from sample values,
+    falling back to {"format": "mixed"} (per-value parsing, e.g. ISO with and
+    without fractions or offsets) when no single format fits but pandas
+    parses every value.
+
+    Returns:
+        dict | None: {"format": str} or {"epoch_unit": str}
+    """
+    sample = [v for v in values if v is not None and str(v).strip() != ""]
+    if not sample:
+        return None
+
+    numeric = pd.to_numeric(pd.Series(sample), errors="coerce")
+    if numeric.notna().all():
+        magnitude = numeric.abs().median()
+        for unit, floor in EPOCH_UNITS:
+            if magnitude >= floor:
+                return {"epoch_unit": unit}
+        return None
+
+    text = [str(v).strip() for v in sample]
+    for fmt in DATETIME_FORMATS:
+        try:
+            for v in text:
+                datetime.strptime(v, fmt)
+        except ValueError:
+            continue
+        return {"format": fmt}
+
+    if _parse_mixed(pd.Series(text)).notna().all():
+        return {"format": "mixed"}
+
+    return None
+
+
+def _parse_mixed(values):
+    return pd.to_datetime(values, format="mixed", errors="coerce", utc=True)
+
+
+def sniff_csv(file_obj, time_column=None, temperature_column=None):
+    """
+    Reads the first SNIFF_BYTES of a CSV to pick the time / temperature
+    columns (when not given) and infer the timestamp format.
+
+    Leaves file_obj at position 0.
+
+    Returns:
+        dict: columns, time_column, temperature_column, timestamp_format
+    """
+    file_obj.seek(0)
+    head = file_obj.read(SNIFF_BYTES)
+    file_obj.seek(0)
+
+    if isinstance(head, bytes):
+        head = head.decode("utf-8-sig", errors="replace")
+
+    # Drop a trailing partial line unless the whole file fit in the sniff
+    if len(head) >= SNIFF_BYTES and "\n" in head:
+        head = head[:head.rfind("\n")]
+
+    try:
+        sample = pd.read_csv(io.StringIO(head), nrows=SNIFF_SAMPLE_ROWS, dtype=str)
+    except Exception as e:
+        raise CSVIngestionError(f"Failed to read CSV header: {str(e)}")
+
+    columns = list(sample.columns)
+    time_column, temperature_column, timestamp_format = detect_columns(
+        sample, time_column, temperature_column
+    )
+
+    return {
+        "columns": columns,
+        "time_column": time_column,
+        "temperature_column": temperature_column,
+        "timestamp_format": timestamp_format,
+    }
+
+
+def detect_columns(sample: pd.DataFrame, time_column=None, temperature_column=None):
+    """
+    Picks the time / temperature columns of a small sample frame (when not
+    given) and infers the timestamp format. Shared by every reader in
+    ingestion/readers.py.
+
+    Returns:
+        (str, str, dict | None): time column, temperature column, format
+    """
+    columns = list(sample.columns)
+
+    # ---- Time column ----
+    if time_column is None:
+        candidates = _rank_columns(columns, TIME_COLUMN_HINTS)
+        candidates += [c for c in columns if c not in candidates]
+        for col in candidates:
+            if _is_datetime_column(sample[col]):
+                time_column = col
+                break
+        else:
+            raise CSVSchemaError(
+                f"Could not detect a timestamp column among: {columns}"
+            )
+
+    # ---- Temperature column ----
+    if temperature_column is None:
+        for col in _rank_columns(columns, TEMPERATURE_COLUMN_HINTS):
+            if col == time_column:
+                continue
+            if pd.to_numeric(sample[col].dropna(), errors="coerce").notna().all():
+                temperature_column = col
+                break
+        else:
+            raise CSVSchemaError(
+                f"Could not detect a temperature column among: {columns}"
+            )
+
+    timestamp_format = None
+    if time_column in sample.columns and not pd.api.types.is_datetime64_any_dtype(sample[time_column]):
+        timestamp_format = infer_datetime_format(sample[time_column].dropna().tolist())
+
+    return time_column, temperature_column, timestamp_format
+
+
+def _is_datetime_column(values: pd.Series):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return True
+    return infer_datetime_format(values.dropna().tolist()) is not None
+
+
+def parse_timestamps(values: pd.Series, timestamp_format=None) -> pd.Series:
+    """
+    Parses a timestamp column with an explicit format or epoch unit when one
+    was inferred, falling back to pandas' generic parser if the full column
+    does not match it. Timezone-aware values are converted to UTC-naive.
+
+    With the "mixed" format, values are parsed one by one and those that do
+    not parse are NaT; offset-less values are taken as UTC.
+    """
+    parsed = None
+    if timestamp_format and timestamp_format.get("format") == "mixed":
+        parsed = _parse_mixed(values)
+    elif timestamp_format and "epoch_unit" in timestamp_format:
+        parsed = pd.to_datetime(
+            pd.to_numeric(values, errors="raise"),
+            unit=timestamp_format["epoch_unit"],
+            errors="raise",
+        )
+    elif timestamp_format:
+        fmt = timestamp_format["format"]
+        try:
+            parsed = pd.to_datetime(values, format=fmt, errors="raise", utc="%z" in fmt)
+        except (ValueError, TypeError):
+            parsed = None
+
+    if parsed is None:
+        parsed = pd.to_datetime(values, errors="raise")
+
+    if getattr(parsed.dt, "tz", None) is not None:
+        parsed = parsed.dt.tz_convert("UTC").dt.tz_localize(None)
+
+    return parsed
+
+
 def load_temperature_csv(
     file_obj,
-    time_column: str,
-    temperature_column: str,
+    time_column: str | None = None,
+    temperature_column: str | None = None,
     temperature_unit: str = "C",
 ) -> pd.DataFrame:
     """
     Loads and validates a temperature time-series CSV.
 
+    Missing column names are detected from the header and the timestamp
+    format is inferred once from a sample (see sniff_csv), so the full
+    column is parsed with a fixed format and only two columns are read.
+
     Returns a DataFrame with canonical columns:
       - timestamp (datetime, UTC-naive)
       - air_temp (float, Celsius)
     """
 
-    try:
-        df = pd.read_csv(file_obj)
-    except Exception as e:
-        raise CSVIngestionError(f"Failed to read CSV: {str(e)}")
+    sniffed = sniff_csv(file_obj, time_column, temperature_column)
+    time_column = sniffed["time_column"]
+    temperature_column = sniffed["temperature_column"]
 
     # ---- Validate required columns ----
-    missing = {time_column, temperature_column} - set(df.columns)
+    missing = {time_column, temperature_column} - set(sniffed["columns"])
     if missing:
         raise CSVSchemaError(f"Missing required columns: {missing}")
 
+    try:
+        df = pd.read_csv(
+            file_obj,
+            usecols=[time_column, temperature_column],
+            dtype={time_column: str},
+        )
+    except Exception as e:
+        raise CSVIngestionError(f"Failed to read CSV: {str(e)}")
+
+    return to_canonical_frame(
+        df,
+        time_column=time_column,
+        temperature_column=temperature_column,
+        temperature_unit=temperature_unit,
+        timestamp_format=sniffed["timestamp_format"],
+    )
+
+
+def to_canonical_frame(
+    df: pd.DataFrame,
+    time_column: str,
+    temperature_column: str,
+    temperature_unit: str = "C",
+    timestamp_format=None,
+) -> pd.DataFrame:
+    """
+    Parses, converts and validates the two source columns into the canonical
+    (timestamp, air_temp °C) frame every reader returns.
+    """
+    df = df[[time_column, temperature_column]].copy()
+    raw_timestamps = df[time_column]
+
     # ---- Parse timestamps ----
     try:
-        df["timestamp"] = pd.to_datetime(df[time_column], errors="raise")
+        if pd.api.types.is_datetime64_any_dtype(df[time_column]):
+            df["timestamp"] = parse_timestamps(df[time_column])
+        else:
+            df["timestamp"] = parse_timestamps(df[time_column], timestamp_format)
     except Exception:
         raise CSVSchemaError(f"Invalid timestamp format in column '{time_column}'")
 
+    unparsed = df["timestamp"].isna()
+    if unparsed.any():
+        examples = raw_timestamps[unparsed].astype(str).unique()[:MAX_REPORTED_BAD_TIMESTAMPS]
+        raise CSVSchemaError(
+            f"{int(unparsed.sum())} timestamp(s) in column '{time_column}' could not be "
+            f"parsed, e.g. {', '.join(repr(v) for v in examples)}"
+        )
+
     # ---- Parse temperatures ----
     try:
         temps = pd.to_numeric(df[temperature_column], errors="raise")
@@ -60,7 +347,7 @@ def load_temperature_csv(
     elif unit == "F":
         df["air_temp"] = (temps - 32.0) * (5.0 / 9.0)
     elif unit == "K":
-        df["air_temp"] = temps - 273.15
+        df["air_temp"] = temps + ABSOLUTE_ZERO_C
     else:
         raise CSVSchemaError(f"Unsupported temperature unit: {temperature_unit}")
 
@@ -68,9 +355,16 @@ def load_temperature_csv(
     if df["air_temp"].isna().any():
         raise CSVIngestionError("Temperature column contains NaN values")
 
-    if df["timestamp"].isna().any():
-        raise CSVIngestionError("Timestamp column contains NaT values")
-
-    return df[["timestamp", "air_temp"]].copy()
-
+    if (df["air_temp"] <= ABSOLUTE_ZERO_C).any():
+        raise CSVIngestionError(
+            f"Temperature values at or below absolute zero ({ABSOLUTE_ZERO_C} °C) "
+            f"in column '{temperature_column}'; check temperature_unit"
+        )
 
+    out = df[["timestamp", "air_temp"]].copy()
+    out.attrs["ingestion"] = {
+        "time_column": time_column,
+        "temperature_column": temperature_column,
+        "timestamp_format": timestamp_format,
+    }
+    return out
@@ -0,0 +1,156 @@
+# ingestion/preprocessing.py
+# Sits between load_temperature_csv and run_forecast:
+# de-duplication → gap handling → time-weighted resampling
+
+import numpy as np
+import pandas as pd
+
+MAX_REPORTED_GAPS = 20
+MAX_INTERPOLATED_POINTS = 500_000
+
+
+def preprocess_series(
+    df: pd.DataFrame,
+    resolution_minutes: float | None = None,
+    max_gap_minutes: float = 60.0,
+    interpolate_gaps: bool = False,
+):
+    """
+    Cleans a canonical (timestamp, air_temp) series before simulation.
+
+    Conventions:
+        Sample i represents the interval (t[i-1], t[i]] at a constant
+        temperature, which is how run_forecast integrates it. Averages below
+        are therefore taken over that step function.
+
+    Args:
+        df (pd.DataFrame): output of load_temperature_csv
+        resolution_minutes (float | None): target resolution; the series is
+            only resampled when it is sampled faster than this
+        max_gap_minutes (float): intervals longer than this are flagged as gaps
+        interpolate_gaps (bool): linearly fill flagged gaps instead of holding
+            the post-gap reading across them
+
+    Returns:
+        (pd.DataFrame, dict): cleaned series and diagnostics for the response
+    """
+    if resolution_minutes is not None and resolution_minutes <= 0:
+        raise ValueError("resolution_minutes must be positive")
+    if max_gap_minutes <= 0:
+        raise ValueError("max_gap_minutes must be positive")
+
+    input_rows = int(len(df))
+
+    # ---- De-duplicate timestamps (mean of repeated readings) ----
+    deduped = (
+        df.groupby("timestamp", sort=True, as_index=False)["air_temp"].mean()
+    )
+
+    t_ns = deduped["timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    t = (t_ns - t_ns[0]) / 3.6e12 if len(t_ns) else np.empty(0)  # hours
+    values = deduped["air_temp"].to_numpy(dtype=float)
+
+    intervals = np.diff(t)
+    median_interval_h = float(np.median(intervals)) if len(intervals) else 0.0
+
+    # ---- Gap detection ----
+    max_gap_h = max_gap_minutes / 60.0
+    gap_idx = np.flatnonzero(intervals > max_gap_h)
+    gaps = [
+        {
+            "start": deduped["timestamp"].iloc[i].isoformat(),
+            "end": deduped["timestamp"].iloc[i + 1].isoformat(),
+            "duration_minutes": float(intervals[i] * 60.0),
+        }
+        for i in gap_idx[:MAX_REPORTED_GAPS]
+    ]
+
+    # ---- Gap interpolation ----
+    interpolated_points = 0
+    if interpolate_gaps and len(gap_idx):
+        fill_step = median_interval_h
+        if resolution_minutes is not None:
+            fill_step = max(fill_step, resolution_minutes / 60.0)
+
+        fill_counts = np.floor(intervals[gap_idx] / fill_step - 1e-9).astype(np.int64)
+        if fill_counts.sum() > MAX_INTERPOLATED_POINTS:
+            raise ValueError(
+                "Gap interpolation would insert too many points; "
+                "increase resolution_minutes or disable interpolate_gaps"
+            )
+
+        fill_t = np.concatenate([
+            t[i] + fill_step * np.arange(1, n + 1)
+            for i, n in zip(gap_idx, fill_counts)
+        ])
+        fill_v = np.interp(fill_t, t, values)
+
+        order = np.argsort(np.concatenate([t, fill_t]), kind="stable")
+        t = np.concatenate([t, fill_t])[order]
+        values = np.concatenate([values, fill_v])[order]
+        interpolated_points = int(len(fill_t))
+
+    # ---- Time-weighted resampling ----
+    resampled = (
+        resolution_minutes is not None
+        and len(t) > 2
+        and median_interval_h < resolution_minutes / 60.0
+    )
+    if resampled:
+        t, values = _time_weighted_resample(t, values, resolution_minutes / 60.0)
+
+    if resampled or interpolated_points:
+        out = pd.DataFrame({
+            "timestamp": pd.to_datetime(
+                t_ns[0] + np.rint(t * 3.6e12).astype(np.int64)
+            ),
+            "air_temp": values,
+        })
+    else:
+        out = deduped
+
+    diagnostics = {
+        "input_rows": input_rows,
+        "duplicate_timestamps_removed": input_rows - int(len(deduped)),
+        "median_interval_seconds": median_interval_h * 3600.0,
+        "max_gap_minutes": max_gap_minutes,
+        "gaps_detected": int(len(gap_idx)),
+        "gaps": gaps,
+        "longest_gap_minutes": float(intervals.max() * 60.0) if len(intervals) else 0.0,
+        "interpolated_points": interpolated_points,
+        "resampled": bool(resampled),
+        "resolution_minutes": resolution_minutes,
+        "output_rows": int(len(out)),
+        "reduction_factor": input_rows / len(out) if len(out) else None,
+    }
+
+    return out, diagnostics
+
+
+def _time_weighted_resample(t, values, resolution_h):
+    """
+    Averages the step function defined by (t, values) over fixed-width bins.
+
+    The running integral F(t) is piecewise linear between samples, so bin
+    averages are exact differences of np.interp lookups. Bins that contain
+    no samples (inside unfilled gaps) are merged into the next non-empty bin,
+    so gaps do not generate rows.
+    """
+    integral = np.concatenate([[0.0], np.cumsum(values[1:] * np.diff(t))])
+
+    n_bins = int(np.ceil((t[-1] - t[0]) / resolution_h))
+    edges = t[0] + resolution_h * np.arange(1, n_bins + 1)
+    edges[-1] = t[-1]
+
+    # Keep only bins that contain at least one sample
+    counts = np.diff(np.searchsorted(t, np.concatenate([[t[0]], edges]), side="right"))
+    edges = edges[counts > 0]
+
+    edge_integral = np.interp(edges, t, integral)
+    bounds = np.concatenate([[t[0]], edges])
+    averages = np.diff(np.concatenate([[0.0], edge_integral])) / np.diff(bounds)
+
+    return (
+        np.concatenate([[t[0]], edges]),
+        np.concatenate([[values[0]], averages]),
+    )
@@ -0,0 +1,237 @@
+# ingestion/readers.py
+# Format dispatch for uploads: CSV (plain / gzip / zstd), Parquet, Arrow IPC.
+# Every reader returns the canonical (timestamp, air_temp) frame.
+
+import gzip
+import mmap
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from .csv_loader import (
+    CSVIngestionError,
+    CSVSchemaError,
+    detect_columns,
+    load_temperature_csv,
+    to_canonical_frame,
+)
+
+SAMPLE_ROWS = 200
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+
+MAGIC_PARQUET = b"PAR1"
+MAGIC_ARROW_FILE = b"ARROW1"
+MAGIC_ARROW_STREAM = b"\xff\xff\xff\xff"
+MAGIC_GZIP = b"\x1f\x8b"
+MAGIC_ZSTD = b"\x28\xb5\x2f\xfd"
+
+EXTENSION_FORMATS = [
+    (".csv.gz", "csv_gzip"),
+    (".csv.zst", "csv_zstd"),
+    (".csv.zstd", "csv_zstd"),
+    (".gz", "csv_gzip"),
+    (".zst", "csv_zstd"),
+    (".parquet", "parquet"),
+    (".pq", "parquet"),
+    (".arrow", "arrow"),
+    (".feather", "arrow"),
+    (".ipc", "arrow"),
+    (".arrows", "arrow"),
+    (".csv", "csv"),
+]
+
+
+class UnsupportedFormatError(CSVIngestionError):
+    """Raised when an upload is not in a readable format."""
+    pass
+
+
+def detect_format(file_obj, filename: str | None = None) -> str:
+    """
+    Detects the upload format from magic bytes, falling back to the file
+    extension. Leaves file_obj at position 0.
+    """
+    file_obj.seek(0)
+    head = file_obj.read(8)
+    file_obj.seek(0)
+
+    if head.startswith(MAGIC_PARQUET):
+        return "parquet"
+    if head.startswith(MAGIC_ARROW_FILE) or head.startswith(MAGIC_ARROW_STREAM):
+        return "arrow"
+    if head.startswith(MAGIC_GZIP):
+        return "csv_gzip"
+    if head.startswith(MAGIC_ZSTD):
+        return "csv_zstd"
+
+    name = (filename or "").lower()
+    for suffix, fmt in EXTENSION_FORMATS:
+        if name.endswith(suffix):
+            return fmt
+
+    raise UnsupportedFormatError(
+        f"Unsupported file type: {filename!r} (expected CSV, gzip/zstd CSV, Parquet or Arrow IPC)"
+    )
+
+
+def load_temperature_file(
+    file_obj,
+    filename: str | None = None,
+    time_column: str | None = None,
+    temperature_column: str | None = None,
+    temperature_unit: str = "C",
+) -> pd.DataFrame:
+    """
+    Loads any supported upload into the canonical frame:
+      - timestamp (datetime, UTC-naive)
+      - air_temp (float, Celsius)
+    """
+    fmt = detect_format(file_obj, filename)
+
+    if fmt == "csv":
+        return load_temperature_csv(
+            file_obj, time_column, temperature_column, temperature_unit
+        )
+
+    if fmt == "csv_gzip":
+        with gzip.GzipFile(fileobj=file_obj, mode="rb") as stream:
+            return load_temperature_csv(
+                stream, time_column, temperature_column, temperature_unit
+            )
+
+    if fmt == "csv_zstd":
+        with _decompress_zstd(file_obj) as stream:
+            return load_temperature_csv(
+                stream, time_column, temperature_column, temperature_unit
+            )
+
+    table, time_column, temperature_column = _read_arrow_table(
+        file_obj, fmt, time_column, temperature_column
+    )
+    return _table_to_canonical(table, time_column, temperature_column, temperature_unit)
+
+
+def _decompress_zstd(file_obj):
+    """
+    zstd streams are not seekable, so decompress (streaming) into a spooled
+    temporary file the CSV sniffer can rewind.
+    """
+    try:
+        import zstandard
+    except ImportError:
+        raise UnsupportedFormatError("zstd-compressed CSV requires the 'zstandard' package")
+
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    file_obj.seek(0)
+    with zstandard.ZstdDecompressor().stream_reader(file_obj, closefd=False) as reader:
+        shutil.copyfileobj(reader, spool)
+    spool.seek(0)
+    return spool
+
+
+def _arrow_source(file_obj):
+    """
+    Memory-maps the upload when it is backed by a file on disk, otherwise
+    wraps the in-memory bytes without copying.
+    """
+    import pyarrow as pa
+
+    path = getattr(file_obj, "name", None)
+    if isinstance(path, str) and os.path.isfile(path):
+        return pa.memory_map(path, "r")
+
+    # SpooledTemporaryFile: BytesIO while small, anonymous temp file once rolled over
+    inner = getattr(file_obj, "_file", file_obj)
+    if hasattr(inner, "getbuffer"):
+        return pa.BufferReader(pa.py_buffer(inner.getbuffer()))
+    try:
+        inner.flush()
+        mapped = mmap.mmap(inner.fileno(), 0, access=mmap.ACCESS_READ)
+        return pa.BufferReader(pa.py_buffer(mapped))
+    except (AttributeError, OSError, ValueError):
+        pass
+
+    file_obj.seek(0)
+    return pa.BufferReader(file_obj.read())
+
+
+def _read_arrow_table(file_obj, fmt, time_column, temperature_column):
+    """
+    Reads only the time/temperature columns of a Parquet or Arrow IPC upload.
+    When a column is not given, it is detected from the schema and the
+    first rows, as for CSV.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise UnsupportedFormatError(f"{fmt} uploads require the 'pyarrow' package")
+
+    source = _arrow_source(file_obj)
+    try:
+        if fmt == "parquet":
+            parquet = pq.ParquetFile(source)
+            names = parquet.schema_arrow.names
+            if time_column is None or temperature_column is None:
+                sample = next(parquet.iter_batches(batch_size=SAMPLE_ROWS)).to_pandas()
+                time_column, temperature_column, _ = detect_columns(
+                    sample, time_column, temperature_column
+                )
+            _require_columns(names, time_column, temperature_column)
+            table = parquet.read(columns=[time_column, temperature_column])
+        else:
+            try:
+                reader = ipc.open_file(source)
+                names = reader.schema.names
+                batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            except pa.ArrowInvalid:
+                source.seek(0)
+                reader = ipc.open_stream(source)
+                names = reader.schema.names
+                batches = iter(reader)
+
+            first = next(batches, None)
+            if first is None:
+                raise CSVIngestionError("Arrow upload contains no record batches")
+            if time_column is None or temperature_column is None:
+                time_column, temperature_column, _ = detect_columns(
+                    first.slice(0, SAMPLE_ROWS).to_pandas(), time_column, temperature_column
+                )
+            _require_columns(names, time_column, temperature_column)
+            projection = [time_column, temperature_column]
+            table = pa.Table.from_batches(
+                [first.select(projection)] + [b.select(projection) for b in batches]
+            )
+    except (CSVIngestionError, CSVSchemaError):
+        raise
+    except Exception as e:
+        raise CSVIngestionError(f"Failed to read {fmt} upload: {str(e)}")
+
+    return table, time_column, temperature_column
+
+
+def _require_columns(names, time_column, temperature_column):
+    missing = {time_column, temperature_column} - set(names)
+    if missing:
+        raise CSVSchemaError(f"Missing required columns: {missing}")
+
+
+def _table_to_canonical(table, time_column, temperature_column, temperature_unit):
+    df = table.to_pandas()
+
+    timestamp_format = None
+    if not pd.api.types.is_datetime64_any_dtype(df[time_column]):
+        _, _, timestamp_format = detect_columns(
+            df.head(SAMPLE_ROWS), time_column, temperature_column
+        )
+
+    return to_canonical_frame(
+        df,
+        time_column=time_column,
+        temperature_column=temperature_column,
+        temperature_unit=temperature_unit,
+        timestamp_format=timestamp_format,
+    )
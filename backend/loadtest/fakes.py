@@ -0,0 +1,277 @@
+# loadtest/fakes.py
+# In-process stand-ins for Mongo, Auth0, Azure OpenAI and Azure Speech with
+# configurable latency and error rates.
+
+import asyncio
+import io
+import os
+import random
+import struct
+import time
+import types
+import uuid
+
+from fastapi import HTTPException
+from pymongo.errors import AutoReconnect
+
+from config import Config, db, override_client
+from persistence.memory_backend import MemoryAsyncClient
+
+FAKE_CLIENTS = ("mongo", "auth", "openai", "speech")
+
+DEFAULT_PROFILES = {
+    "mongo": {"latency_ms": 2.0, "jitter_ms": 1.0, "error_rate": 0.0},
+    "auth": {"latency_ms": 1.0, "jitter_ms": 0.5, "error_rate": 0.0},
+    "openai": {"latency_ms": 1500.0, "jitter_ms": 500.0, "error_rate": 0.0},
+    "speech": {"latency_ms": 400.0, "jitter_ms": 100.0, "error_rate": 0.0},
+}
+
+
+class FakeServiceError(Exception):
+    """Raised by a fake to simulate a failed upstream call."""
+    pass
+
+
+class FaultProfile:
+    """
+    Latency (mean ± uniform jitter, milliseconds) and error rate of a fake.
+    """
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=None):
+        if not (0.0 <= error_rate <= 1.0):
+            raise ValueError("error_rate must be in [0, 1]")
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def from_env(cls, name):
+        """
+        LOADTEST_<NAME>_LATENCY_MS / _JITTER_MS / _ERROR_RATE override the
+        defaults in DEFAULT_PROFILES.
+        """
+        defaults = DEFAULT_PROFILES[name]
+        prefix = f"LOADTEST_{name.upper()}_"
+        return cls(
+            latency_ms=float(os.getenv(prefix + "LATENCY_MS", defaults["latency_ms"])),
+            jitter_ms=float(os.getenv(prefix + "JITTER_MS", defaults["jitter_ms"])),
+            error_rate=float(os.getenv(prefix + "ERROR_RATE", defaults["error_rate"])),
+        )
+
+    def delay_seconds(self):
+        jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(self.latency_ms + jitter, 0.0) / 1000.0
+
+    def fails(self):
+        return self._rng.random() < self.error_rate
+
+    def __repr__(self):
+        return (
+            f"FaultProfile(latency_ms={self.latency_ms}, jitter_ms={self.jitter_ms}, "
+            f"error_rate={self.error_rate})"
+        )
+
+
+# ---- Mongo ----
+
+class _LatentCursor:
+    def __init__(self, cursor, profile):
+        self._cursor = cursor
+        self._profile = profile
+        self._started = False
+
+    def sort(self, *args, **kwargs):
+        self._cursor.sort(*args, **kwargs)
+        return self
+
+    def batch_size(self, size):
+        self._cursor.batch_size(size)
+        return self
+
+    def limit(self, count):
+        self._cursor.limit(count)
+        return self
+
+    async def _first_round_trip(self):
+        if not self._started:
+            self._started = True
+            await asyncio.sleep(self._profile.delay_seconds())
+            if self._profile.fails():
+                raise AutoReconnect("fake mongo: connection reset")
+
+    async def to_list(self, length=None):
+        await self._first_round_trip()
+        return await self._cursor.to_list(length)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self._first_round_trip()
+        return await self._cursor.__anext__()
+
+
+class _LatentCollection:
+    OPERATIONS = (
+        "insert_one", "insert_many", "update_one", "update_many",
+        "find_one", "count_documents", "delete_many",
+    )
+
+    def __init__(self, collection, profile):
+        self._collection = collection
+        self._profile = profile
+
+    def __getattr__(self, name):
+        operation = getattr(self._collection, name)
+        if name not in self.OPERATIONS:
+            return operation
+
+        async def call(*args, **kwargs):
+            await asyncio.sleep(self._profile.delay_seconds())
+            if self._profile.fails():
+                raise AutoReconnect("fake mongo: connection reset")
+            return await operation(*args, **kwargs)
+
+        return call
+
+    def find(self, *args, **kwargs):
+        return _LatentCursor(self._collection.find(*args, **kwargs), self._profile)
+
+
+class LatentMongoClient:
+    """
+    Async Mongo stand-in: the in-memory backend with a simulated round trip
+    (and optional AutoReconnect failures) on every operation.
+    """
+
+    def __init__(self, profile, database=None):
+        self._inner = MemoryAsyncClient(database if database is not None else db)
+        self._profile = profile
+
+    def __getitem__(self, name):
+        database = self._inner[name]
+        profile = self._profile
+
+        class _Database:
+            def __getitem__(self, collection):
+                return _LatentCollection(database[collection], profile)
+
+        return _Database()
+
+    async def close(self):
+        pass
+
+
+# ---- Auth0 ----
+
+class FakeTokenVerifier:
+    """
+    Accepts bearer tokens of the form "loadtest-<sub>" and returns a payload
+    shaped like an Auth0 access token.
+    """
+
+    PREFIX = "loadtest-"
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def verify(self, token):
+        time.sleep(self.profile.delay_seconds())
+        if self.profile.fails():
+            raise HTTPException(status_code=503, detail="fake auth: JWKS unavailable")
+        if not token.startswith(self.PREFIX):
+            raise HTTPException(status_code=401, detail="Token verification failed: not a load-test token")
+        return {"sub": token[len(self.PREFIX):], "aud": "loadtest", "iss": "loadtest"}
+
+
+# ---- Azure OpenAI ----
+
+class FakeChatCompletions:
+    def __init__(self, profile):
+        self.profile = profile
+
+    def create(self, model=None, messages=None, max_completion_tokens=None, **kwargs):
+        time.sleep(self.profile.delay_seconds())
+        if self.profile.fails():
+            raise FakeServiceError("fake openai: 429 Too Many Requests")
+
+        prompt_chars = sum(len(m.get("content", "")) for m in messages or [])
+        completion_tokens = min(max_completion_tokens or 2000, 900)
+        content = (
+            "TEMPERATURE DEVIATION INVESTIGATION REPORT\n\n"
+            f"(load-test report {uuid.uuid4().hex[:8]})\n\n"
+            + "Lorem ipsum dolor sit amet. " * (completion_tokens // 8)
+        )
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=content))],
+            usage=types.SimpleNamespace(
+                prompt_tokens=prompt_chars // 4,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_chars // 4 + completion_tokens,
+            ),
+        )
+
+
+class FakeOpenAI:
+    def __init__(self, profile):
+        self.chat = types.SimpleNamespace(completions=FakeChatCompletions(profile))
+
+    def close(self):
+        pass
+
+
+# ---- Azure Speech ----
+
+class FakeSpeechSynthesizer:
+    """
+    Returns a silent 24 kHz mono WAV roughly as long as the text would take
+    to read (about 15 characters per second).
+    """
+
+    SAMPLE_RATE = 24000
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def synthesize(self, text):
+        time.sleep(self.profile.delay_seconds())
+        if self.profile.fails():
+            raise HTTPException(status_code=500, detail="TTS failed: fake speech service error")
+
+        frames = int(self.SAMPLE_RATE * max(len(text) / 15.0, 0.5))
+        data_bytes = frames * 2
+        wav = io.BytesIO()
+        wav.write(b"RIFF" + struct.pack("<I", 36 + data_bytes) + b"WAVE")
+        wav.write(b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, self.SAMPLE_RATE, self.SAMPLE_RATE * 2, 2, 16))
+        wav.write(b"data" + struct.pack("<I", data_bytes))
+        wav.write(bytes(data_bytes))
+        return wav.getvalue()
+
+
+def install_fakes(names=FAKE_CLIENTS, profiles=None):
+    """
+    Registers the fakes through config.override_client.
+
+    Args:
+        names (iterable[str]): which clients to replace
+        profiles (dict[str, FaultProfile] | None): per-client faults
+            (default: FaultProfile.from_env for each)
+    """
+    profiles = profiles or {}
+    factories = {
+        "mongo": LatentMongoClient,
+        "auth": FakeTokenVerifier,
+        "openai": FakeOpenAI,
+        "speech": FakeSpeechSynthesizer,
+    }
+    installed = {}
+    for name in names:
+        if name not in factories:
+            raise ValueError(f"Unknown fake: {name}")
+        if name == "mongo" and Config.MONGO_BACKEND != "memory":
+            raise ValueError("The fake Mongo client requires MONGO_BACKEND=memory")
+        profile = profiles.get(name) or FaultProfile.from_env(name)
+        override_client(name, factories[name](profile))
+        installed[name] = profile
+    return installed
@@ -0,0 +1,248 @@
+# loadtest/run.py
+# Closed-loop scenario runner: N virtual users each pick a scenario from a
+# weighted mix, wait for the response, think, and repeat until the duration
+# is up. Reports p50/p95/p99 latency and throughput per endpoint.
+#
+#   python -m loadtest.run --base-url http://127.0.0.1:5001 --users 50 \
+#       --duration 60 --mix upload=4,report=1,history=4,tts=1
+#
+# Against loadtest.server any bearer token "loadtest-<sub>" is accepted; each
+# virtual user gets its own sub, so history listings stay per user.
+
+import argparse
+import asyncio
+import io
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+
+SCENARIOS = ("upload", "report", "history", "tts")
+DEFAULT_MIX = "upload=4,report=1,history=4,tts=1"
+PROFILES = ("Frozen", "Refrigerated", "Room Temperature")
+PROFILE_SETPOINTS = {"Frozen": -70.0, "Refrigerated": 5.0, "Room Temperature": 22.0}
+
+
+def parse_mix(text):
+    """
+    "upload=4,history=1" → {"upload": 4.0, "history": 1.0}
+    """
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("Scenario mix has no weight")
+    return mix
+
+
+def make_series_csv(rng, rows, profile):
+    """
+    Logger export around the profile's set point with a few excursions; the
+    random seed makes every body unique (a forecast cache miss).
+    """
+    setpoint = PROFILE_SETPOINTS[profile]
+    start = datetime(2025, 1, 1) + timedelta(minutes=rng.randrange(0, 525600))
+    out = io.StringIO()
+    out.write("timestamp,temperature_celsius\n")
+    temp = setpoint
+    excursion = 0
+    for i in range(rows):
+        if excursion == 0 and rng.random() < 0.01:
+            excursion = rng.randint(3, 24)
+        if excursion:
+            temp += rng.uniform(0.2, 1.0)
+            excursion -= 1
+        else:
+            temp += (setpoint - temp) * 0.2 + rng.gauss(0.0, 0.15)
+        stamp = start + timedelta(minutes=5 * i)
+        out.write(f"{stamp:%Y-%m-%d %H:%M:%S},{temp:.2f}\n")
+    return out.getvalue().encode()
+
+
+def percentile(sorted_values, q):
+    """
+    Nearest-rank percentile of an ascending list.
+    """
+    if not sorted_values:
+        return float("nan")
+    rank = max(math.ceil(q / 100.0 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint, seconds, status):
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+        if status == "exception" or status >= 400:
+            self.errors[endpoint] += 1
+
+    def summary(self, elapsed):
+        rows = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            rows[endpoint] = {
+                "requests": len(ordered),
+                "errors": self.errors[endpoint],
+                "throughput_rps": len(ordered) / elapsed if elapsed else 0.0,
+                "mean_ms": 1000 * sum(ordered) / len(ordered),
+                "p50_ms": 1000 * percentile(ordered, 50),
+                "p95_ms": 1000 * percentile(ordered, 95),
+                "p99_ms": 1000 * percentile(ordered, 99),
+                "max_ms": 1000 * ordered[-1],
+                "statuses": {str(k): v for k, v in self.statuses[endpoint].items()},
+            }
+        return rows
+
+
+class VirtualUser:
+    def __init__(self, index, client, stats, args, rng):
+        self.sub = f"vu{index:04d}"
+        self.client = client
+        self.stats = stats
+        self.args = args
+        self.rng = rng
+        self.headers = {"Authorization": f"Bearer {args.token_prefix}{self.sub}"}
+        self.investigations = []
+        self.reported = []
+        self.sent_bodies = []
+
+    async def _request(self, endpoint, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+            await response.aread()
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, "exception"
+        self.stats.record(endpoint, time.perf_counter() - started, status)
+        return response
+
+    async def upload(self):
+        if self.sent_bodies and self.rng.random() < self.args.repeat_ratio:
+            profile, body = self.rng.choice(self.sent_bodies)
+        else:
+            profile = self.rng.choice(PROFILES)
+            body = make_series_csv(self.rng, self.args.rows, profile)
+            self.sent_bodies = (self.sent_bodies + [(profile, body)])[-8:]
+
+        response = await self._request(
+            "POST /api/forecast", "POST", "/api/forecast",
+            files={"file": ("readings.csv", body, "text/csv")},
+            data={
+                "time_column": "timestamp",
+                "temperature_column": "temperature_celsius",
+                "stability_profile": profile,
+                "forecast_hours": str(self.args.forecast_hours),
+            },
+        )
+        if response is not None and response.status_code == 200:
+            investigation_id = response.json()["investigation_id"]
+            if investigation_id not in self.investigations:
+                self.investigations.append(investigation_id)
+
+    async def report(self):
+        if not self.investigations:
+            return await self.upload()
+        investigation_id = self.rng.choice(self.investigations)
+        response = await self._request(
+            "GET /api/investigation_report/{id}", "GET",
+            f"/api/investigation_report/{investigation_id}",
+        )
+        if response is not None and response.status_code == 200:
+            if investigation_id not in self.reported:
+                self.reported.append(investigation_id)
+
+    async def history(self):
+        await self._request("GET /api/reports", "GET", "/api/reports")
+
+    async def tts(self):
+        if not self.reported:
+            return await self.report()
+        await self._request(
+            "POST /api/tts-report", "POST", "/api/tts-report",
+            json={"investigation_id": self.rng.choice(self.reported)},
+        )
+
+    async def run(self, deadline, mix):
+        names = list(mix)
+        weights = [mix[n] for n in names]
+        # Stagger the start so users don't arrive in lockstep
+        await asyncio.sleep(self.rng.uniform(0, self.args.ramp_up))
+        while time.monotonic() < deadline:
+            scenario = self.rng.choices(names, weights)[0]
+            await getattr(self, scenario)()
+            if self.args.think_ms:
+                await asyncio.sleep(self.rng.expovariate(1000.0 / self.args.think_ms))
+
+
+async def run_load(args):
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        started = time.monotonic()
+        deadline = started + args.ramp_up + args.duration
+        users = [
+            VirtualUser(i, client, stats, args, random.Random(args.seed * 100003 + i))
+            for i in range(args.users)
+        ]
+        await asyncio.gather(*(u.run(deadline, args.mix) for u in users))
+        elapsed = time.monotonic() - started
+    return stats.summary(elapsed), elapsed
+
+
+def print_table(summary, elapsed):
+    header = f"{'endpoint':<36}{'reqs':>7}{'errs':>6}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    print("-" * len(header))
+    total = 0
+    for endpoint, row in summary.items():
+        total += row["requests"]
+        print(
+            f"{endpoint:<36}{row['requests']:>7}{row['errors']:>6}{row['throughput_rps']:>8.1f}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+        )
+    print("-" * len(header))
+    print(f"{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s); latencies in ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the potency API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5001")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of steady load")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which users start")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--rows", type=int, default=2000, help="readings per uploaded series")
+    parser.add_argument("--repeat-ratio", type=float, default=0.1,
+                        help="share of uploads that resend an earlier body (cache hits)")
+    parser.add_argument("--forecast-hours", type=float, default=0.0)
+    parser.add_argument("--think-ms", type=float, default=100.0, help="mean think time")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout (s)")
+    parser.add_argument("--token-prefix", default="loadtest-")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    summary, elapsed = asyncio.run(run_load(args))
+    if args.json:
+        print(json.dumps({"elapsed_s": elapsed, "endpoints": summary}, indent=2))
+    else:
+        print_table(summary, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+# loadtest/server.py
+# The API with every external client replaced by an in-process fake.
+#
+#   uvicorn loadtest.server:app --port 5001
+#   gunicorn -c gunicorn.conf.py loadtest.server:app
+#
+# Fault profiles come from LOADTEST_<MONGO|AUTH|OPENAI|SPEECH>_LATENCY_MS,
+# _JITTER_MS and _ERROR_RATE (see loadtest/fakes.py). LOADTEST_FAKES selects
+# which clients to replace (default: all). The fake Mongo keeps its data per
+# process, so multi-worker runs that read back earlier writes should keep
+# "mongo" out of LOADTEST_FAKES and point MONGO_URI at a real server.
+
+import os
+
+if "mongo" in os.getenv("LOADTEST_FAKES", "mongo"):
+    os.environ.setdefault("MONGO_BACKEND", "memory")
+
+from loadtest.fakes import FAKE_CLIENTS, install_fakes  # noqa: E402
+
+_names = [n.strip() for n in os.getenv("LOADTEST_FAKES", ",".join(FAKE_CLIENTS)).split(",") if n.strip()]
+for _name, _profile in install_fakes(_names).items():
+    print(f"[loadtest] {_name}: {_profile}")
+
+from app import app, warm_up  # noqa: E402,F401
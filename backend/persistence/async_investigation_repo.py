@@ -0,0 +1,132 @@
+# persistence/async_investigation_repo.py
+# Investigation, reading and calculation storage for request handlers.
+# Documents come from the builders in investigation_repo; every call awaits
+# the driver instead of blocking the event loop.
+
+import asyncio
+from datetime import datetime
+
+import numpy as np
+from pymongo.errors import BulkWriteError
+
+from config import Config
+from utils.ids import generate_calculation_id
+from .async_mongo import async_collection
+from .investigation_repo import (
+    DUPLICATE_KEY_ERROR,
+    investigation_document,
+    reading_documents,
+    calculation_document,
+    reading_query,
+)
+
+
+async def create_investigation(investigation_id, user_sub):
+    await async_collection("investigations").insert_one(
+        investigation_document(investigation_id, user_sub)
+    )
+
+
+async def save_temperature_readings(investigation_id, timestamps, temps, user_sub):
+    """
+    Inserts readings in unordered chunks issued concurrently, so a long
+    upload uses several pooled connections instead of one large round trip.
+    """
+    documents = reading_documents(investigation_id, timestamps, temps, user_sub)
+    if not documents:
+        return
+
+    size = Config.MONGO_INSERT_BATCH_SIZE
+    await asyncio.gather(*(
+        insert_reading_documents(documents[i:i + size])
+        for i in range(0, len(documents), size)
+    ))
+
+
+async def insert_reading_documents(documents):
+    """
+    Unordered insert that treats already-present readings as written, so a
+    retried or replayed batch is idempotent (readings carry deterministic ids).
+    """
+    try:
+        await async_collection("temperature_readings").insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != DUPLICATE_KEY_ERROR for err in errors):
+            raise
+
+
+async def set_investigation_status(investigation_id, status):
+    await async_collection("investigations").update_one(
+        {"investigation_id": investigation_id},
+        {"$set": {"status": status, "status_updated_at": datetime.utcnow()}},
+    )
+
+
+async def save_calculation(
+    investigation_id, profile_key, Ea, A, alpha, metrics, user_sub,
+    reading_facts=None, integration=None,
+):
+    calculation_id = generate_calculation_id()
+    await async_collection("calculations").insert_one(calculation_document(
+        calculation_id, investigation_id, profile_key, Ea, A, alpha, metrics, user_sub,
+        reading_facts=reading_facts, integration=integration,
+    ))
+    return calculation_id
+
+
+async def find_investigation(investigation_id, user_sub=None):
+    query = {"investigation_id": investigation_id}
+    if user_sub is not None:
+        query["user_sub"] = user_sub
+    return await async_collection("investigations").find_one(query)
+
+
+async def find_calculation(investigation_id, user_sub, projection=None):
+    """
+    Latest calculation for an investigation owned by user_sub.
+    """
+    return await async_collection("calculations").find_one(
+        {"investigation_id": investigation_id, "user_sub": user_sub},
+        projection or {"_id": 0},
+        sort=[("computed_at", -1)],
+    )
+
+
+async def count_temperature_readings(investigation_id, user_sub, start=None, end=None):
+    return await async_collection("temperature_readings").count_documents(
+        reading_query(investigation_id, user_sub, start=start, end=end)
+    )
+
+
+async def iter_temperature_readings(
+    investigation_id, user_sub, after=None, start=None, end=None, batch_size=10000
+):
+    """
+    Async generator of (timestamps, temps) numpy batches in time order.
+
+    after is an exclusive lower bound (used for warm starts from a
+    checkpoint), start an inclusive one; end is inclusive.
+    """
+    cursor = async_collection("temperature_readings").find(
+        reading_query(investigation_id, user_sub, after, start, end),
+        {"_id": 0, "time": 1, "temperature_c": 1}
+    ).sort("time", 1).batch_size(batch_size)
+
+    times, temps = [], []
+    async for doc in cursor:
+        times.append(doc["time"])
+        temps.append(doc["temperature_c"])
+        if len(times) >= batch_size:
+            yield np.array(times, dtype="datetime64[ns]"), np.array(temps, dtype=float)
+            times, temps = [], []
+
+    if times:
+        yield np.array(times, dtype="datetime64[ns]"), np.array(temps, dtype=float)
+
+
+async def save_report_facts(calculation_id, facts):
+    await async_collection("calculations").update_one(
+        {"calculation_id": calculation_id},
+        {"$set": {"report_facts": facts}},
+    )
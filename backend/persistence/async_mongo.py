@@ -0,0 +1,38 @@
+# persistence/async_mongo.py
+# Async database handle for request handlers (PyMongo async API).
+# The client is created lazily, inside the running event loop, and closed
+# from the application lifespan.
+
+from config import Config, db, mongo_client_options, client_overrides
+
+_client = None
+
+
+def _create_client():
+    if "mongo" in client_overrides:
+        return client_overrides["mongo"]
+
+    if Config.MONGO_BACKEND == "memory":
+        from .memory_backend import MemoryAsyncClient
+        return MemoryAsyncClient(db)
+
+    from pymongo import AsyncMongoClient
+    return AsyncMongoClient(Config.MONGO_URI, **mongo_client_options())
+
+
+def get_async_db():
+    global _client
+    if _client is None:
+        _client = _create_client()
+    return _client[Config.MONGO_DB_NAME]
+
+
+def async_collection(name):
+    return get_async_db()[name]
+
+
+async def close_async_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,63 @@
+# persistence/forecast_cache_repo.py
+import uuid
+from datetime import datetime
+from bson import Binary
+from .async_mongo import async_collection
+
+
+async def find_cached_forecast(cache_key):
+    """
+    The cache entry with its payload reassembled from chunks when it was
+    stored in several documents. An entry whose chunks are incomplete (a
+    concurrent rewrite) is returned without payload.
+    """
+    doc = await async_collection("forecast_cache").find_one({"cache_key": cache_key}, {"_id": 0})
+    if not doc or not doc.get("chunks"):
+        return doc
+
+    chunks = await async_collection("forecast_cache_chunks").find(
+        {"cache_key": cache_key, "generation": doc.get("generation")},
+        {"_id": 0, "n": 1, "data": 1},
+    ).sort("n", 1).to_list(None)
+    if [chunk["n"] for chunk in chunks] != list(range(doc["chunks"])):
+        doc["payload"] = None
+    else:
+        doc["payload"] = b"".join(bytes(chunk["data"]) for chunk in chunks)
+    return doc
+
+
+async def save_cached_forecast(cache_key, investigation_id, calculation_id, payload, user_sub, max_doc_bytes):
+    """
+    payload is the compressed response body. Bodies larger than
+    max_doc_bytes are split over forecast_cache_chunks documents, so the
+    body is always cached, not just the ids.
+    """
+    generation = uuid.uuid4().hex
+    chunks = [
+        payload[i:i + max_doc_bytes] for i in range(0, len(payload), max_doc_bytes)
+    ] if len(payload) > max_doc_bytes else []
+
+    if chunks:
+        await async_collection("forecast_cache_chunks").insert_many([
+            {"cache_key": cache_key, "generation": generation, "n": n, "data": Binary(data)}
+            for n, data in enumerate(chunks)
+        ])
+
+    # The entry is switched to the new chunks last, then older ones dropped
+    await async_collection("forecast_cache").update_one(
+        {"cache_key": cache_key},
+        {"$set": {
+            "cache_key": cache_key,
+            "investigation_id": investigation_id,
+            "calculation_id": calculation_id,
+            "payload": None if chunks else Binary(payload),
+            "chunks": len(chunks),
+            "generation": generation,
+            "user_sub": user_sub,
+            "created_at": datetime.utcnow(),
+        }},
+        upsert=True,
+    )
+    await async_collection("forecast_cache_chunks").delete_many(
+        {"cache_key": cache_key, "generation": {"$ne": generation}}
+    )
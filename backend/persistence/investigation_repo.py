@@ -1,35 +1,55 @@
 # persistence/investigation_repo.py
+# Document and query builders shared by async_investigation_repo and the
+# readings writer.
 from datetime import datetime
-import uuid
-from .mongo import investigations, temperature_readings, calculations
 
+DUPLICATE_KEY_ERROR = 11000
 
-def create_investigation(investigation_id, user_sub):
-    investigations.insert_one({
+
+def investigation_document(investigation_id, user_sub):
+    return {
         "investigation_id": investigation_id,
         "user_sub": user_sub,            # Add the user reference
         "created_at": datetime.utcnow(),
         "status": "COMPUTED",
         "source": "csv_upload",
         "schema_version": "1.0"
-    })
+    }
+
+
+def reading_id(investigation_id, index):
+    """
+    Deterministic _id, so re-inserting the same upload is idempotent.
+    """
+    return f"{investigation_id}:{index:08d}"
+
 
-def save_temperature_readings(investigation_id, timestamps, temps, user_sub):
-    temperature_readings.insert_many([
+def reading_documents(investigation_id, timestamps, temps, user_sub, start=0):
+    """
+    Reading documents for a slice of an upload; start is the index of the
+    slice's first reading (it determines the _id values).
+    """
+    ingested_at = datetime.utcnow()
+    return [
         {
+            "_id": reading_id(investigation_id, start + i),
             "investigation_id": investigation_id,
             "time": t.to_pydatetime(),
             "temperature_c": float(temp),
             "sensor_type": "air",
-            "ingested_at": datetime.utcnow(),
+            "ingested_at": ingested_at,
             "user_sub": user_sub
         }
-        for t, temp in zip(timestamps, temps)
-    ])
+        for i, (t, temp) in enumerate(zip(timestamps, temps))
+    ]
 
-def save_calculation(investigation_id, profile_key, Ea, A, alpha, metrics, user_sub):
-    calculations.insert_one({
-        "calculation_id": f"CALC-{uuid.uuid4().hex[:6]}",
+
+def calculation_document(
+    calculation_id, investigation_id, profile_key, Ea, A, alpha, metrics, user_sub,
+    reading_facts=None, integration=None,
+):
+    return {
+        "calculation_id": calculation_id,
         "investigation_id": investigation_id,
         "schema_version": "1.0",
         "model": {
@@ -40,11 +60,32 @@ def save_calculation(investigation_id, profile_key, Ea, A, alpha, metrics, user_
             "stability_profile": profile_key,
             "Ea": Ea,
             "A": A,
-            "smoothing_alpha": alpha
+            "smoothing_alpha": alpha,
+            # mode, tolerance, quadrature_nodes (None: "exact")
+            "integration": integration,
         },
         "results": metrics,
+        "reading_facts": reading_facts,
         "computed_at": datetime.utcnow(),
         "supersedes": None,
         "user_sub": user_sub
-    })
+    }
+
+
+def reading_query(investigation_id, user_sub, after=None, start=None, end=None):
+    query = {"investigation_id": investigation_id, "user_sub": user_sub}
+    time_filter = _reading_time_filter(after=after, start=start, end=end)
+    if time_filter:
+        query["time"] = time_filter
+    return query
+
 
+def _reading_time_filter(after=None, start=None, end=None):
+    time_filter = {}
+    if after is not None:
+        time_filter["$gt"] = after
+    elif start is not None:
+        time_filter["$gte"] = start
+    if end is not None:
+        time_filter["$lte"] = end
+    return time_filter
@@ -0,0 +1,82 @@
+# persistence/memory_backend.py
+# In-process async backend over mongomock, used when MONGO_BACKEND=memory.
+# Exposes the subset of the async PyMongo API the repositories use and
+# shares its data with the synchronous `config.db` handle.
+
+
+class MemoryAsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def batch_size(self, size):
+        self._cursor = self._cursor.batch_size(size)
+        return self
+
+    def limit(self, count):
+        self._cursor = self._cursor.limit(count)
+        return self
+
+    async def to_list(self, length=None):
+        docs = list(self._cursor)
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._cursor)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class MemoryAsyncCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    async def insert_one(self, document, **kwargs):
+        return self._collection.insert_one(document)
+
+    async def insert_many(self, documents, ordered=True, **kwargs):
+        return self._collection.insert_many(documents, ordered=ordered)
+
+    async def update_one(self, filter, update, upsert=False, **kwargs):
+        return self._collection.update_one(filter, update, upsert=upsert)
+
+    async def update_many(self, filter, update, upsert=False, **kwargs):
+        return self._collection.update_many(filter, update, upsert=upsert)
+
+    async def find_one(self, filter=None, projection=None, sort=None, **kwargs):
+        return self._collection.find_one(filter, projection, sort=sort)
+
+    async def count_documents(self, filter, **kwargs):
+        return self._collection.count_documents(filter)
+
+    async def delete_many(self, filter, **kwargs):
+        return self._collection.delete_many(filter)
+
+    def find(self, filter=None, projection=None, **kwargs):
+        return MemoryAsyncCursor(self._collection.find(filter, projection, **kwargs))
+
+
+class MemoryAsyncDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def __getitem__(self, name):
+        return MemoryAsyncCollection(self._database[name])
+
+
+class MemoryAsyncClient:
+    def __init__(self, database):
+        self._database = database
+
+    def __getitem__(self, name):
+        return MemoryAsyncDatabase(self._database.client[name])
+
+    async def close(self):
+        pass
@@ -4,3 +4,16 @@ investigations = db["investigations"]
 temperature_readings = db["temperature_readings"]
 calculations = db["calculations"]
 reports = db["reports"]
+forecast_cache = db["forecast_cache"]
+forecast_cache_chunks = db["forecast_cache_chunks"]
+
+
+def ensure_indexes():
+    """
+    Indexes for the range / lookup queries; safe to call repeatedly.
+    """
+    temperature_readings.create_index([("investigation_id", 1), ("time", 1)])
+    calculations.create_index([("investigation_id", 1), ("computed_at", -1)])
+    investigations.create_index("investigation_id")
+    forecast_cache.create_index("cache_key", unique=True)
+    forecast_cache_chunks.create_index([("cache_key", 1), ("generation", 1), ("n", 1)])
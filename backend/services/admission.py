@@ -0,0 +1,316 @@
+# services/admission.py
+# Per-user admission control for heavy endpoints.
+#
+# Each work class ("forecast": CPU-bound, "report": LLM-bound) has a fixed
+# number of slots per web worker. A request is admitted in three steps:
+#   1. the user's and the class's queue must have room,
+#   2. the user's token bucket (rate + burst) must have a token (requests
+#      rejected in step 1 do not spend one),
+#   3. it waits for a slot. Slots go to the waiting request with the lowest
+#      start tag (start-time fair queuing), skipping users already at their
+#      concurrency cap, so each backlogged user gets a share proportional
+#      to its weight whatever the size of their backlog.
+# Rejections raise AdmissionRejected with a Retry-After estimate.
+
+import asyncio
+import itertools
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+
+from config import Config
+from utils.rate_limit import TokenBucket
+
+EWMA_ALPHA = 0.2
+DEFAULT_SERVICE_SECONDS = 1.0
+PRUNE_EVERY = 1024
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is not admitted; retry_after is in seconds."""
+
+    def __init__(self, message, retry_after, reason):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+def parse_user_weights(text):
+    """
+    "sub-a=2,sub-b=0.5" → {"sub-a": 2.0, "sub-b": 0.5}
+    """
+    weights = {}
+    for part in (text or "").split(","):
+        sub, _, weight = part.strip().rpartition("=")
+        if sub:
+            weights[sub] = float(weight)
+            if weights[sub] <= 0:
+                raise ValueError(f"Admission weight for {sub} must be positive")
+    return weights
+
+
+class _UserState:
+    __slots__ = ("bucket", "weight", "waiting", "running", "last_finish_tag")
+
+    def __init__(self, bucket, weight):
+        self.bucket = bucket
+        self.weight = weight
+        self.waiting = deque()
+        self.running = 0
+        self.last_finish_tag = 0.0
+
+
+class FairScheduler:
+    """
+    Slots of one work class shared fairly between users (see module notes).
+    Runs on the event loop; not thread-safe.
+    """
+
+    def __init__(
+        self,
+        name,
+        slots,
+        per_user,
+        rate_per_minute,
+        burst,
+        max_queue_per_user,
+        max_queue,
+        max_wait_seconds,
+        weights=None,
+    ):
+        if slots < 1 or per_user < 1:
+            raise ValueError("slots and per_user must be at least 1")
+        self.name = name
+        self.slots = slots
+        self.per_user = per_user
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.max_queue_per_user = max_queue_per_user
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.weights = weights or {}
+
+        self._users = {}
+        self._backlogged = set()
+        self._running = 0
+        self._queued = 0
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+        self._admissions = 0
+
+        self.admitted = 0
+        self.rejected = Counter()
+        self._mean_wait = 0.0
+        self._mean_service = None
+
+    # ---- Users ----
+
+    def _user(self, sub):
+        user = self._users.get(sub)
+        if user is None:
+            user = _UserState(
+                TokenBucket(self.rate_per_minute, capacity=self.burst),
+                self.weights.get(sub, 1.0),
+            )
+            self._users[sub] = user
+        return user
+
+    def _prune(self):
+        """
+        Forgets idle users whose bucket has refilled (nothing to remember).
+        """
+        for sub in [
+            sub for sub, user in self._users.items()
+            if not user.running and not user.waiting and user.bucket.available >= user.bucket.capacity
+        ]:
+            del self._users[sub]
+
+    # ---- Scheduling ----
+
+    def _dispatch(self):
+        while self._running < self.slots:
+            chosen = None
+            for sub in self._backlogged:
+                user = self._users[sub]
+                if user.running >= self.per_user:
+                    continue
+                head = user.waiting[0]
+                if chosen is None or head[:2] < chosen[1][:2]:
+                    chosen = (sub, head)
+            if chosen is None:
+                return
+
+            sub, (start_tag, _, ticket) = chosen
+            user = self._users[sub]
+            user.waiting.popleft()
+            if not user.waiting:
+                self._backlogged.discard(sub)
+            self._queued -= 1
+            user.running += 1
+            self._running += 1
+            self._virtual_time = max(self._virtual_time, start_tag)
+            ticket.set_result(None)
+
+    def _withdraw(self, sub, entry, charge):
+        """
+        Drops a waiting entry and gives back its share (charge = cost / weight)
+        so the user's later requests are not tagged as if it had run.
+        """
+        user = self._users[sub]
+        index = user.waiting.index(entry)
+        del user.waiting[index]
+        for i in range(index, len(user.waiting)):
+            start_tag, sequence, ticket = user.waiting[i]
+            user.waiting[i] = (max(start_tag - charge, self._virtual_time), sequence, ticket)
+        user.last_finish_tag -= charge
+        if not user.waiting:
+            self._backlogged.discard(sub)
+        self._queued -= 1
+
+    def _release(self, sub, service_seconds):
+        user = self._users[sub]
+        user.running -= 1
+        self._running -= 1
+        if service_seconds is not None:
+            self._mean_service = (
+                service_seconds if self._mean_service is None
+                else (1 - EWMA_ALPHA) * self._mean_service + EWMA_ALPHA * service_seconds
+            )
+        self._dispatch()
+
+    def _estimated_wait(self):
+        service = self._mean_service or DEFAULT_SERVICE_SECONDS
+        return service * (self._queued + self._running + 1) / self.slots
+
+    def _reject(self, reason, message, retry_after):
+        self.rejected[reason] += 1
+        raise AdmissionRejected(message, max(retry_after, 1.0), reason)
+
+    @asynccontextmanager
+    async def admit(self, sub, cost=1.0):
+        """
+        Holds one slot of this class for the body of the `async with`.
+
+        Args:
+            sub (str): user id (token subject)
+            cost (float): relative size of the work; a user's share of the
+                slots is weight / cost over time
+
+        Raises:
+            AdmissionRejected: rate limited, queue full or waited too long
+        """
+        self._admissions += 1
+        if self._admissions % PRUNE_EVERY == 0:
+            self._prune()
+
+        user = self._user(sub)
+        if len(user.waiting) >= self.max_queue_per_user:
+            self._reject("user_queue_full", f"Too many queued {self.name} requests", self._estimated_wait())
+        if self._queued >= self.max_queue:
+            self._reject("queue_full", f"The {self.name} queue is full", self._estimated_wait())
+        retry_after = user.bucket.try_acquire(1)
+        if retry_after:
+            self._reject("rate_limited", f"Too many {self.name} requests", retry_after)
+
+        charge = cost / user.weight
+        start_tag = max(self._virtual_time, user.last_finish_tag)
+        user.last_finish_tag = start_tag + charge
+        ticket = asyncio.get_running_loop().create_future()
+        entry = (start_tag, next(self._sequence), ticket)
+        user.waiting.append(entry)
+        self._backlogged.add(sub)
+        self._queued += 1
+        self._dispatch()
+
+        enqueued = time.monotonic()
+        try:
+            await asyncio.wait({ticket}, timeout=self.max_wait_seconds)
+        except asyncio.CancelledError:
+            # Client went away: give back the slot or the queue position
+            if ticket.done():
+                self._release(sub, None)
+            else:
+                self._withdraw(sub, entry, charge)
+            raise
+        if not ticket.done():
+            self._withdraw(sub, entry, charge)
+            self._reject("wait_timeout", f"Timed out waiting for a {self.name} slot", self._estimated_wait())
+
+        waited = time.monotonic() - enqueued
+        self._mean_wait = (1 - EWMA_ALPHA) * self._mean_wait + EWMA_ALPHA * waited
+        self.admitted += 1
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(sub, time.monotonic() - started)
+
+    # ---- Metrics ----
+
+    def snapshot(self, sub=None):
+        depths = [len(self._users[s].waiting) for s in self._backlogged]
+        metrics = {
+            "slots": self.slots,
+            "running": self._running,
+            "queued": self._queued,
+            "backlogged_users": len(depths),
+            "max_user_queue_depth": max(depths, default=0),
+            "tracked_users": len(self._users),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "mean_wait_ms": round(self._mean_wait * 1000, 1),
+            "mean_service_ms": round((self._mean_service or 0.0) * 1000, 1),
+        }
+        if sub is not None:
+            user = self._users.get(sub)
+            metrics["user"] = {
+                "running": user.running if user else 0,
+                "queued": len(user.waiting) if user else 0,
+                "tokens_available": round(user.bucket.available, 2) if user else self.burst,
+                "weight": self.weights.get(sub, 1.0),
+            }
+        return metrics
+
+
+_weights = parse_user_weights(Config.ADMISSION_USER_WEIGHTS)
+
+schedulers = {
+    "forecast": FairScheduler(
+        "forecast",
+        slots=Config.ADMISSION_FORECAST_SLOTS,
+        per_user=Config.ADMISSION_FORECAST_PER_USER,
+        rate_per_minute=Config.ADMISSION_FORECAST_PER_MINUTE,
+        burst=Config.ADMISSION_FORECAST_BURST,
+        max_queue_per_user=Config.ADMISSION_MAX_QUEUE_PER_USER,
+        max_queue=Config.ADMISSION_MAX_QUEUE,
+        max_wait_seconds=Config.ADMISSION_MAX_WAIT_SECONDS,
+        weights=_weights,
+    ),
+    "report": FairScheduler(
+        "report",
+        slots=Config.ADMISSION_REPORT_SLOTS,
+        per_user=Config.ADMISSION_REPORT_PER_USER,
+        rate_per_minute=Config.ADMISSION_REPORT_PER_MINUTE,
+        burst=Config.ADMISSION_REPORT_BURST,
+        max_queue_per_user=Config.ADMISSION_MAX_QUEUE_PER_USER,
+        max_queue=Config.ADMISSION_MAX_QUEUE,
+        max_wait_seconds=Config.ADMISSION_MAX_WAIT_SECONDS,
+        weights=_weights,
+    ),
+}
+
+
+def admit(work_class, sub, cost=1.0):
+    return schedulers[work_class].admit(sub, cost)
+
+
+def forecast_cost(upload_bytes):
+    """
+    Forecast work grows with the upload; one unit per ADMISSION_FORECAST_COST_BYTES.
+    """
+    return 1.0 + (upload_bytes or 0) / Config.ADMISSION_FORECAST_COST_BYTES
+
+
+def admission_metrics(sub=None):
+    return {name: scheduler.snapshot(sub) for name, scheduler in schedulers.items()}
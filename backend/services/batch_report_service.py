@@ -0,0 +1,231 @@
+# services/batch_report_service.py
+# Month-end style report generation for many investigations at once
+
+import asyncio
+import traceback
+from datetime import datetime
+
+from config import Config
+from persistence.async_mongo import async_collection
+from services.admission import AdmissionRejected, admit
+from services.report_service import (
+    ReportGenerationError,
+    prepare_report,
+    complete_report,
+    report_document,
+    save_reports,
+)
+from utils.ids import generate_report_job_id
+
+# Keeps running batch tasks referenced until they finish
+_running = set()
+
+
+class BatchReportError(Exception):
+    """Raised when a batch report request cannot be started or found."""
+    pass
+
+
+async def _select_pending(investigation_ids, user_sub, force=False):
+    """
+    Splits investigations into those needing a report and those skipped.
+
+    A report is up to date when one already exists for the investigation's
+    latest calculation_id.
+
+    Returns:
+        (list[str], dict): pending ids and skip counts by reason
+    """
+    latest = {}
+    cursor = async_collection("calculations").find(
+        {"investigation_id": {"$in": investigation_ids}, "user_sub": user_sub},
+        {"_id": 0, "investigation_id": 1, "calculation_id": 1},
+    ).sort("computed_at", 1)
+    async for calc in cursor:
+        latest[calc["investigation_id"]] = calc.get("calculation_id")
+
+    reported = set()
+    if not force:
+        cursor = async_collection("reports").find(
+            {"investigation_id": {"$in": investigation_ids}, "user_sub": user_sub},
+            {"_id": 0, "investigation_id": 1, "calculation_id": 1},
+        )
+        async for report in cursor:
+            reported.add((report["investigation_id"], report.get("calculation_id")))
+
+    pending = []
+    skipped = {"up_to_date": 0, "no_calculation": 0}
+    for investigation_id in investigation_ids:
+        if investigation_id not in latest:
+            skipped["no_calculation"] += 1
+        elif (investigation_id, latest[investigation_id]) in reported:
+            skipped["up_to_date"] += 1
+        else:
+            pending.append(investigation_id)
+    return pending, skipped
+
+
+async def start_batch_reports(
+    user_sub,
+    investigation_ids=None,
+    created_from=None,
+    created_to=None,
+    force=False,
+):
+    """
+    Selects the user's investigations by id list and/or creation date range,
+    records a job and starts generation in the background.
+
+    Returns:
+        dict: the job document (poll get_batch_job with its job_id)
+    """
+    if investigation_ids is None and created_from is None and created_to is None:
+        raise BatchReportError("Provide investigation_ids or a created_at range")
+
+    query = {"user_sub": user_sub}
+    if investigation_ids is not None:
+        query["investigation_id"] = {"$in": list(investigation_ids)}
+    created = {}
+    if created_from is not None:
+        created["$gte"] = created_from
+    if created_to is not None:
+        created["$lte"] = created_to
+    if created:
+        query["created_at"] = created
+
+    found = await async_collection("investigations").find(
+        query, {"_id": 0, "investigation_id": 1}
+    ).sort("created_at", 1).to_list(None)
+    ids = list(dict.fromkeys(doc["investigation_id"] for doc in found))
+
+    if len(ids) > Config.REPORT_BATCH_MAX_INVESTIGATIONS:
+        raise BatchReportError(
+            f"{len(ids)} investigations selected; the limit per batch is "
+            f"{Config.REPORT_BATCH_MAX_INVESTIGATIONS}"
+        )
+
+    pending, skipped = await _select_pending(ids, user_sub, force=force)
+
+    job = {
+        "job_id": generate_report_job_id(),
+        "user_sub": user_sub,
+        "status": "RUNNING" if pending else "COMPLETED",
+        "selected": len(ids),
+        "pending": len(pending),
+        "skipped": skipped,
+        "completed": 0,
+        "failed": 0,
+        "errors": [],
+        "created_at": datetime.utcnow(),
+        "finished_at": None if pending else datetime.utcnow(),
+    }
+    await async_collection("report_jobs").insert_one(dict(job))
+
+    if pending:
+        task = asyncio.create_task(_run_batch(job["job_id"], user_sub, pending))
+        _running.add(task)
+        task.add_done_callback(_running.discard)
+
+    return job
+
+
+async def get_batch_job(job_id, user_sub):
+    job = await async_collection("report_jobs").find_one(
+        {"job_id": job_id, "user_sub": user_sub}, {"_id": 0}
+    )
+    if not job:
+        raise BatchReportError("Batch job not found")
+    return job
+
+
+async def _update_job(job_id, update):
+    await async_collection("report_jobs").update_one({"job_id": job_id}, update)
+
+
+async def _record_failure(job_id, investigation_id, error):
+    await _update_job(job_id, {
+        "$inc": {"failed": 1},
+        "$push": {"errors": {"investigation_id": investigation_id, "error": error}},
+    })
+
+
+async def _run_batch(job_id, user_sub, investigation_ids):
+    """
+    Generates reports with at most REPORT_BATCH_CONCURRENCY in flight. Each
+    investigation is admitted under "report" like an interactive report
+    (waiting and retrying when rejected), so a batch gets the user's fair
+    share of report slots rather than bypassing them; LLM calls also share
+    the worker's rate limiter with interactive reports.
+    Finished reports are buffered and written with one bulk insert per
+    REPORT_BATCH_FLUSH_SIZE.
+
+    A failure for one investigation is recorded on the job and the others
+    carry on; whatever is buffered is written even if the job fails.
+    """
+    semaphore = asyncio.Semaphore(Config.REPORT_BATCH_CONCURRENCY)
+    buffer = []
+    flush_lock = asyncio.Lock()
+
+    async def flush():
+        async with flush_lock:
+            if not buffer:
+                return
+            documents = buffer[:]
+            buffer.clear()
+            await save_reports(documents)
+            await _update_job(job_id, {"$inc": {"completed": len(documents)}})
+
+    async def admitted_report(investigation_id):
+        while True:
+            try:
+                async with admit("report", user_sub):
+                    prepared = await prepare_report(investigation_id)
+                    content, _ = await complete_report(
+                        prepared["prompt"], prepared["prompt_stats"]["estimated_tokens"]
+                    )
+                    return prepared, content
+            except AdmissionRejected as e:
+                await asyncio.sleep(e.retry_after)
+
+    async def generate(investigation_id):
+        async with semaphore:
+            try:
+                prepared, content = await admitted_report(investigation_id)
+            except ReportGenerationError as e:
+                await _record_failure(job_id, investigation_id, str(e))
+                return
+            except Exception as e:
+                print(f"[BatchReport] Job {job_id}: {investigation_id} failed:", str(e))
+                traceback.print_exc()
+                await _record_failure(job_id, investigation_id, f"Unexpected error: {e}")
+                return
+
+        buffer.append(report_document(
+            investigation_id=investigation_id,
+            report_content=content,
+            user_sub=user_sub,
+            calculation_id=prepared["calculation"].get("calculation_id"),
+        ))
+        if len(buffer) >= Config.REPORT_BATCH_FLUSH_SIZE:
+            await flush()
+
+    try:
+        try:
+            outcomes = await asyncio.gather(
+                *(generate(i) for i in investigation_ids), return_exceptions=True
+            )
+        finally:
+            await flush()
+        # Only a failed bulk write gets here; its reports are lost
+        errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if errors:
+            raise errors[0]
+        await _update_job(job_id, {"$set": {"status": "COMPLETED", "finished_at": datetime.utcnow()}})
+    except Exception as e:
+        print(f"[BatchReport] Job {job_id} failed:", str(e))
+        traceback.print_exc()
+        await _update_job(job_id, {"$set": {
+            "status": "FAILED",
+            "error": str(e),
+            "finished_at": datetime.utcnow(),
+        }})
@@ -0,0 +1,98 @@
+# services/forecast_cache.py
+# Content-addressed cache for /api/forecast responses
+
+import hashlib
+import json
+import zlib
+
+from config import Config
+from persistence.forecast_cache_repo import find_cached_forecast, save_cached_forecast
+from utils.shared_cache import shared_cache
+
+HASH_CHUNK_BYTES = 1024 * 1024
+FORECAST_NAMESPACE = "forecast"
+
+
+def hash_upload(file_obj, chunk_size=HASH_CHUNK_BYTES):
+    """
+    Streaming SHA-256 of an uploaded file; leaves the file at position 0.
+    """
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def forecast_cache_key(content_hash, user_sub, params):
+    """
+    Cache key from the upload hash, the owning user and every parameter
+    that changes the result (columns, unit, profile, smoothing, ...).
+
+    The user is part of the key because a hit returns that user's
+    investigation_id.
+    """
+    material = json.dumps(
+        {"content": content_hash, "user_sub": user_sub, "params": params},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _encode(payload):
+    return zlib.compress(json.dumps(payload).encode("utf-8"), 6)
+
+
+def _decode(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+async def get_cached_forecast(cache_key):
+    """
+    Looks up a forecast in the shared (worker/node) cache, then in Mongo.
+
+    Returns:
+        dict | None: {"tier", "investigation_id", "payload"}; entries
+        without a usable body (written before bodies were chunked, or
+        mid-rewrite) are reported as misses
+    """
+    blob = shared_cache.get(FORECAST_NAMESPACE, cache_key)
+    if blob is not None:
+        payload = _decode(blob)
+        return {
+            "tier": shared_cache.name,
+            "investigation_id": payload["investigation_id"],
+            "payload": payload,
+        }
+
+    doc = await find_cached_forecast(cache_key)
+    if not doc or doc.get("payload") is None:
+        return None
+
+    blob = bytes(doc["payload"])
+    shared_cache.set(FORECAST_NAMESPACE, cache_key, blob)
+    return {
+        "tier": "persistent",
+        "investigation_id": doc["investigation_id"],
+        "payload": _decode(blob),
+    }
+
+
+async def store_forecast(cache_key, payload, calculation_id, user_sub):
+    """
+    Stores a computed response in both tiers. In Mongo, bodies above
+    FORECAST_CACHE_MAX_DOC_BYTES (compressed) are split over several
+    documents, so a hit never has to recompute the forecast.
+    """
+    blob = _encode(payload)
+    shared_cache.set(FORECAST_NAMESPACE, cache_key, blob)
+    await save_cached_forecast(
+        cache_key=cache_key,
+        investigation_id=payload["investigation_id"],
+        calculation_id=calculation_id,
+        payload=blob,
+        user_sub=user_sub,
+        max_doc_bytes=Config.FORECAST_CACHE_MAX_DOC_BYTES,
+    )
@@ -0,0 +1,317 @@
+# services/forecast_jobs.py
+# Runs ingestion → preprocessing → run_forecast for /api/forecast in a pool
+# of worker processes, off the event loop.
+#
+# Nothing large is pickled. The upload bytes go in through a shared-memory
+# block; the worker returns two blocks of its own:
+#   series   time_ns (int64), temperature_c (float64): the canonical readings
+#   results  time_ns, sensor_temp, smoothed_temp, product_temp, potency,
+#            is_forecast: the response rows as columns
+# plus small dicts (preprocessing diagnostics, metrics, the reading facts
+# reports need). Ownership of the
+# returned blocks passes to the caller, which unlinks them via ForecastJob.
+
+import asyncio
+import io
+import multiprocessing
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker
+
+import numpy as np
+
+from config import Config
+from ingestion.readers import load_temperature_file
+from ingestion.preprocessing import preprocess_series
+from services.forecast_service import run_forecast
+from services.report_facts import summarize_readings
+from utils.shared_arrays import SharedArrays
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+RESULT_COLUMNS = ("sensor_temp", "smoothed_temp", "product_temp", "potency")
+
+
+class UploadIngestionError(Exception):
+    """Raised by a forecast job when the upload cannot be read."""
+    pass
+
+
+class _SharedBufferFile(io.RawIOBase):
+    """
+    Read-only, seekable file over a uint8 array (no copy). getbuffer()
+    lets the Arrow readers wrap the bytes directly.
+    """
+
+    def __init__(self, data):
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = min(max(offset, 0), len(self._view))
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def getbuffer(self):
+        return self._view
+
+    def close(self):
+        self._view.release()
+        super().close()
+
+
+def share_upload(file_obj):
+    """
+    Copies an upload into a new shared-memory block, chunk by chunk.
+    """
+    file_obj.seek(0, io.SEEK_END)
+    size = file_obj.tell()
+    file_obj.seek(0)
+
+    block = SharedArrays.create({"upload": (np.uint8, size)})
+    target = block["upload"]
+    position = 0
+    while position < size:
+        chunk = file_obj.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        target[position:position + len(chunk)] = np.frombuffer(chunk, dtype=np.uint8)
+        position += len(chunk)
+    del target
+    file_obj.seek(0)
+    return block
+
+
+def _isoformat(time_ns):
+    """
+    Vectorized Timestamp.isoformat(): seconds, plus microseconds or
+    nanoseconds only where the value has them.
+    """
+    stamps = time_ns.view("datetime64[ns]")
+    out = np.datetime_as_string(stamps, unit="s").astype(object)
+    fractional = time_ns % 1_000_000_000 != 0
+    if fractional.any():
+        micro = fractional & (time_ns % 1000 == 0)
+        out[micro] = np.datetime_as_string(stamps[micro], unit="us")
+        nano = fractional & ~micro
+        out[nano] = np.datetime_as_string(stamps[nano], unit="ns")
+    return out.tolist()
+
+
+def results_to_columns(results):
+    """
+    run_forecast rows → typed columns for the results block.
+    """
+    return {
+        "time_ns": np.array(
+            [row["timestamp"] for row in results], dtype="datetime64[ns]"
+        ).view(np.int64),
+        **{
+            name: np.fromiter((row[name] for row in results), dtype=np.float64, count=len(results))
+            for name in RESULT_COLUMNS
+        },
+        "is_forecast": np.fromiter(
+            (row["type"] == "forecast" for row in results), dtype=np.uint8, count=len(results)
+        ),
+    }
+
+
+def columns_to_results(columns):
+    """
+    Inverse of results_to_columns: the row dicts run_forecast returns.
+    """
+    timestamps = _isoformat(columns["time_ns"])
+    values = {name: columns[name].tolist() for name in RESULT_COLUMNS}
+    types = ["forecast" if flag else "history" for flag in columns["is_forecast"].tolist()]
+    return [
+        {
+            "timestamp": timestamp,
+            "sensor_temp": sensor,
+            "smoothed_temp": smoothed,
+            "product_temp": product,
+            "potency": potency,
+            "type": row_type,
+        }
+        for timestamp, sensor, smoothed, product, potency, row_type in zip(
+            timestamps, values["sensor_temp"], values["smoothed_temp"],
+            values["product_temp"], values["potency"], types,
+        )
+    ]
+
+
+def forecast_job(upload, filename, ingest_params, preprocess_params, forecast_params):
+    """
+    Worker entry point. Runs in a pool process, so every argument and the
+    return value is small: blocks travel as descriptors.
+
+    Returns:
+        dict: series / results descriptors (owned by the caller from now
+              on), preprocessing diagnostics, metrics and reading facts
+    """
+    with SharedArrays.attach(upload) as shared_upload:
+        source = _SharedBufferFile(shared_upload["upload"])
+        try:
+            df = load_temperature_file(file_obj=source, filename=filename, **ingest_params)
+        except Exception as e:
+            print("Document ingestion error:", str(e))
+            traceback.print_exc()
+            raise UploadIngestionError(str(e))
+        finally:
+            source.close()
+
+    # Preprocessing (de-duplication, gaps, resampling)
+    ingestion = df.attrs.get("ingestion")
+    df, preprocessing = preprocess_series(df, **preprocess_params)
+    preprocessing["ingestion"] = ingestion
+
+    results, metrics = run_forecast(
+        timestamps=df["timestamp"].tolist(),
+        sensor_temps=df["air_temp"].tolist(),
+        **forecast_params,
+    )
+
+    times = df["timestamp"].to_numpy(dtype="datetime64[ns]")
+    temps = df["air_temp"].to_numpy(dtype=np.float64)
+    reading_facts = summarize_readings(times, temps, forecast_params["stability_profile_key"])
+
+    series = SharedArrays.from_arrays({
+        "time_ns": times.view(np.int64),
+        "temperature_c": temps,
+    })
+    try:
+        output = SharedArrays.from_arrays(results_to_columns(results))
+    except BaseException:
+        series.close()
+        raise
+
+    return {
+        "series": series.hand_off(),
+        "results": output.hand_off(),
+        "preprocessing": preprocessing,
+        "metrics": metrics,
+        "reading_facts": reading_facts,
+    }
+
+
+class ForecastJob:
+    """
+    Outcome of a forecast job; owns (and on close unlinks) the series and
+    results blocks. Use as a context manager around everything that reads
+    .series.
+    """
+
+    def __init__(self, outcome):
+        self.preprocessing = outcome["preprocessing"]
+        self.metrics = outcome["metrics"]
+        self.reading_facts = outcome["reading_facts"]
+        self._series = SharedArrays.attach(outcome["series"], adopt=True)
+        try:
+            self._results = SharedArrays.attach(outcome["results"], adopt=True)
+        except BaseException:
+            self._series.close()
+            raise
+
+    @property
+    def series(self):
+        return self._series.arrays
+
+    def results(self):
+        return columns_to_results(self._results.arrays)
+
+    def close(self):
+        self._series.close()
+        self._results.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _discard_outcome(future):
+    """
+    Unlinks the blocks of a job whose caller went away (request cancelled
+    while the worker was still running).
+    """
+    if future.cancelled() or future.exception() is not None:
+        return
+    ForecastJob(future.result()).close()
+
+
+class ForecastPool:
+    """
+    Per-worker process pool for forecast jobs. processes=0 runs jobs on a
+    thread pool in this process instead (same code path, e.g. under a
+    debugger).
+    """
+
+    def __init__(self, processes, start_method="forkserver"):
+        self.processes = processes
+        self.start_method = start_method
+        self._executor = None
+
+    def start(self):
+        if self._executor is not None:
+            return
+        if self.processes <= 0:
+            self._executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+            return
+        # Workers must report shared-memory blocks to the same tracker as
+        # this process, or blocks handed back to us could be reclaimed when
+        # a worker exits
+        resource_tracker.ensure_running()
+        context = multiprocessing.get_context(self.start_method)
+        if self.start_method == "forkserver":
+            context.set_forkserver_preload(["services.forecast_jobs"])
+        self._executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=context)
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, file_obj, filename, ingest_params, preprocess_params, forecast_params):
+        """
+        Runs forecast_job on an upload and returns the ForecastJob.
+
+        Raises:
+            UploadIngestionError, ForecastModelViolation, ValueError: as
+            raised in the worker
+        """
+        self.start()
+        with share_upload(file_obj) as upload:
+            future = self._executor.submit(
+                forecast_job, upload.descriptor(), filename,
+                ingest_params, preprocess_params, forecast_params,
+            )
+            try:
+                outcome = await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                future.add_done_callback(_discard_outcome)
+                raise
+        return ForecastJob(outcome)
+
+
+forecast_pool = ForecastPool(
+    processes=Config.FORECAST_PROCESS_WORKERS,
+    start_method=Config.FORECAST_PROCESS_START_METHOD,
+)
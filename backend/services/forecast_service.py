@@ -1,15 +1,24 @@
 # services/forecast_service.py
 
-import math
 from typing import List, Tuple, Dict
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
 
 from domain.smoothing import exponential_smoothing
 from domain.thermal import update_product_temperature
-from domain.degradation import degradation_rate
+from domain.degradation import ABSOLUTE_ZERO_C, degradation_rates, profile_degradation_rates
+from domain.exposure import accumulate_exposure, finalize_exposure
+from domain.integration import integrate_adaptive, integrate_quadrature
+from domain.forecasting import fit_trend_model, project_potency
 from domain.stability_profiles import STABILITY_PROFILES
 
 
+INTEGRATION_MODES = ("exact", "adaptive", "quadrature")
+MAX_STATE_CHECKPOINTS = 512
+
+
 class ForecastModelViolation(Exception):
     """Raised when scientific model constraints are violated."""
     pass
@@ -22,12 +31,35 @@ def run_forecast(
     smoothing_alpha: float = 0.1,
     debug: bool = False,
     print_every_n: int = 60,
+    integration: str = "exact",
+    tolerance: float = 1e-6,
+    forecast_hours: float = 0.0,
+    forecast_step_hours: float = 1.0,
+    forecast_model: str = "holt",
+    quadrature_nodes: int = 4,
 ) -> Tuple[List[Dict], Dict]:
     """
     Executes the temperature → product → potency model.
 
+    integration="exact" updates the model at every sample. "adaptive"
+    coarsens steady stretches and refines excursions so that the cumulative
+    damage stays within `tolerance` of the per-sample result (step-doubling
+    error control, see integrate_adaptive). Its history rows collapse to the
+    step boundaries: a steady stretch of any length becomes a couple of
+    rows, while excursions keep one row per sample. Callers that need every
+    sample use "exact", or simulate_window, which interpolates between the
+    boundaries. The exposure aggregates still see every sample (product
+    temperatures interpolated between boundaries). "quadrature" keeps every
+    sample but integrates the Arrhenius rate along the product-temperature
+    trajectory within each interval (quadrature_nodes-point Gauss–Legendre),
+    so sparse data needs no resampling for accurate damage.
+
+    forecast_hours > 0 appends "forecast" rows every forecast_step_hours,
+    projecting the sensor trend (Holt or rolling linear) and the potency
+    under the projected product temperature.
+
     Returns:
-      results: full time-series (history)
+      results: full time-series (history, then forecast)
       metrics: aggregate summary statistics
     """
 
@@ -37,6 +69,12 @@ def run_forecast(
     if len(sensor_temps) < 2:
         raise ValueError("At least two temperature points are required")
 
+    if integration not in INTEGRATION_MODES:
+        raise ValueError(f"Unknown integration mode: {integration}")
+
+    if np.any(np.asarray(sensor_temps, dtype=float) <= ABSOLUTE_ZERO_C):
+        raise ValueError(f"Sensor temperatures must be above absolute zero ({ABSOLUTE_ZERO_C} °C)")
+
     # ---- Stability parameters ----
     profile = STABILITY_PROFILES[stability_profile_key]
     Ea = profile["Ea"]
@@ -46,62 +84,439 @@ def run_forecast(
     smoothed = exponential_smoothing(sensor_temps, alpha=smoothing_alpha)
 
     # ---- Core simulation ----
-    results = []
-    product_temp = smoothed[0]
-    cumulative_damage = 0.0
-    prev_potency = 100.0
-
-    for i in range(len(smoothed)):
-
-        if i == 0:
-            delta_hours = 0.0
-        else:
-            delta_hours = (
-                (timestamps[i] - timestamps[i - 1]).total_seconds() / 3600.0
-            )
+    if integration == "adaptive":
+        results, damages, delta_hours_series, product_temps, integration_info = (
+            _simulate_adaptive(timestamps, sensor_temps, smoothed, A, Ea, tolerance)
+        )
+    elif integration == "quadrature":
+        results, damages, delta_hours_series, product_temps, integration_info = (
+            _simulate_quadrature(timestamps, sensor_temps, smoothed, A, Ea, quadrature_nodes)
+        )
+    else:
+        results, damages, delta_hours_series, product_temps = _simulate_exact(
+            timestamps, sensor_temps, smoothed, A, Ea, debug, print_every_n,
+            profile_key=stability_profile_key,
+        )
+        integration_info = {
+            "mode": "exact",
+            "steps": len(results) - 1,
+            "error_estimate": 0.0,
+        }
+
+    # ---- Aggregate metrics (single vectorized pass) ----
+    exposure = accumulate_exposure(
+        delta_hours=delta_hours_series,
+        sensor_temps=sensor_temps,
+        product_temps=product_temps,
+        storage_min=profile["storage_min"],
+        storage_max=profile["storage_max"],
+        Ea=Ea,
+    )
+
+    metrics = {
+        "peak_sensor_temp_c": exposure["peak_sensor_temp_c"],
+        "peak_product_estimated_c": exposure["peak_product_temp_c"],
+        "min_sensor_estimated_c": exposure["min_sensor_temp_c"],
+        "min_product_estimated_c": exposure["min_product_temp_c"],
+        "final_potency_percent": results[-1]["potency"],
+        **finalize_exposure(exposure),
+        # Raw accumulators so later chunks can be merged in (merge_exposure)
+        "exposure_accumulators": exposure,
+        "integration": integration_info,
+        # Model state + damage checkpoints for warm starts and inversions
+        "state": build_calculation_state(results, damages),
+    }
+
+    # ---- Forward projection ----
+    if forecast_hours > 0:
+        forecast_rows, forecast_info = _project_forward(
+            timestamps, sensor_temps, metrics["state"], A, Ea,
+            smoothing_alpha, forecast_hours, forecast_step_hours, forecast_model,
+        )
+        results.extend(forecast_rows)
+        metrics["forecast"] = forecast_info
+
+    return results, metrics
+
 
+def _hours_since_start(timestamps):
+    """
+    Sample times as float hours from the first timestamp (vectorized).
+    """
+    t_ns = pd.DatetimeIndex(timestamps).as_unit("ns").asi8
+    return (t_ns - t_ns[0]) / 3.6e12
+
+
+def build_calculation_state(results, damages, max_checkpoints=MAX_STATE_CHECKPOINTS):
+    """
+    Summarises the simulation state for storage with the calculation.
+
+    Besides the final model state (enough to continue the simulation), up
+    to max_checkpoints evenly spaced history rows are kept with their exact
+    cumulative damage. Damage is monotone, so threshold crossings and
+    warm-start points can be located with a binary search.
+    """
+    n = len(results)
+    picks = np.unique(np.linspace(0, n - 1, min(n, max_checkpoints)).astype(np.int64))
+
+    last = results[-1]
+    return {
+        "last_timestamp": last["timestamp"],
+        "smoothed_temp": last["smoothed_temp"],
+        "product_temp": last["product_temp"],
+        "cumulative_damage": float(damages[-1]),
+        "checkpoints": {
+            "timestamp": [results[i]["timestamp"] for i in picks],
+            "smoothed_temp": [results[i]["smoothed_temp"] for i in picks],
+            "product_temp": [results[i]["product_temp"] for i in picks],
+            "cumulative_damage": [float(damages[i]) for i in picks],
+        },
+    }
+
+
+def _integrate_exact(
+    delta_hours_series, smoothed, product_temp, A, Ea, cumulative_damage=0.0, profile_key=None,
+):
+    """
+    Runs the product-temperature recurrence from a given state, then
+    evaluates rates, damage and potency for all samples at once.
+
+    With a profile_key the rates come from the cached per-profile constants
+    (profile_degradation_rates); A and Ea are then taken from the profile.
+    """
+    product_temps = []
+
+    for sensor_temp, delta_hours in zip(smoothed, np.asarray(delta_hours_series).tolist()):
         product_temp = update_product_temperature(
             prev_product_temp=product_temp,
-            sensor_temp=smoothed[i],
+            sensor_temp=sensor_temp,
             delta_hours=delta_hours,
         )
+        product_temps.append(product_temp)
+
+    product_temps = np.asarray(product_temps)
+    if profile_key is None:
+        rates = degradation_rates(product_temps, A=A, Ea=Ea)
+    else:
+        rates = profile_degradation_rates(product_temps, [profile_key])[1][0]
+    damages = cumulative_damage + np.cumsum(rates * delta_hours_series)
+    potencies = 100.0 * np.exp(-damages)
+
+    # ---- Scientific invariant ----
+    if np.any(np.diff(potencies) > 1e-9):
+        raise ForecastModelViolation(
+            "Potency increased over time — model violation"
+        )
 
-        k = degradation_rate(product_temp, A=A, Ea=Ea)
-        cumulative_damage += k * delta_hours
-        potency = 100.0 * math.exp(-cumulative_damage)
+    return product_temps, damages, potencies
+
+
+def simulate_window(
+    timestamps,
+    sensor_temps,
+    A,
+    Ea,
+    smoothing_alpha,
+    initial_state=None,
+    integration="exact",
+    tolerance=1e-6,
+    quadrature_nodes=4,
+):
+    """
+    Re-runs the model over part of a stored series with the calculation's
+    integration mode, so the window agrees with the stored result.
 
-        # ---- Scientific invariant ----
-        if potency > prev_potency + 1e-9:
+    initial_state is a checkpoint (timestamp, smoothed_temp, product_temp,
+    cumulative_damage) taken just before timestamps[0]; without one the
+    window is treated as the start of the series, like run_forecast.
+    "adaptive" values between its step boundaries are interpolated, as in
+    run_forecast's exposure series.
+
+    Returns:
+        dict: columnar arrays smoothed_temp, product_temp, potency,
+              cumulative_damage (aligned with the inputs)
+    """
+    if integration not in INTEGRATION_MODES:
+        raise ValueError(f"Unknown integration mode: {integration}")
+
+    hours = _hours_since_start(timestamps)
+
+    if initial_state is None:
+        smoothed = exponential_smoothing(list(sensor_temps), alpha=smoothing_alpha)
+        delta_hours_series = np.diff(hours, prepend=hours[0])
+        first_gap = None
+        product_temp = smoothed[0]
+        damage = 0.0
+    else:
+        # Seeding the smoother with the checkpoint value continues it exactly
+        smoothed = exponential_smoothing(
+            [initial_state["smoothed_temp"]] + list(sensor_temps), alpha=smoothing_alpha
+        )[1:]
+        start = pd.Timestamp(initial_state["timestamp"])
+        first_gap = (pd.Timestamp(timestamps[0]) - start).total_seconds() / 3600.0
+        delta_hours_series = np.diff(hours, prepend=hours[0] - first_gap)
+        product_temp = initial_state["product_temp"]
+        damage = initial_state["cumulative_damage"]
+
+    if integration == "exact":
+        product_temps, damages, potencies = _integrate_exact(
+            delta_hours_series, smoothed, product_temp, A, Ea, cumulative_damage=damage
+        )
+    else:
+        product_temps, damages = _integrate_window(
+            hours, smoothed, first_gap, product_temp, A, Ea,
+            integration, tolerance, quadrature_nodes,
+        )
+        damages = damage + damages
+        potencies = 100.0 * np.exp(-damages)
+        if np.any(np.diff(potencies) > 1e-9):
             raise ForecastModelViolation(
                 "Potency increased over time — model violation"
             )
 
-        prev_potency = potency
+    return {
+        "smoothed_temp": np.asarray(smoothed),
+        "product_temp": product_temps,
+        "potency": potencies,
+        "cumulative_damage": damages,
+    }
+
+
+def _integrate_window(
+    hours, smoothed, first_gap, product_temp, A, Ea, integration, tolerance, quadrature_nodes,
+):
+    """
+    Adaptive / quadrature integration of a window. A warm start (first_gap
+    hours after the checkpoint) is run as an extra leading sample at the
+    checkpoint, which is dropped from the output.
+
+    Returns:
+        (np.ndarray, np.ndarray): product temperatures and damage
+            accumulated within the window, per sample
+    """
+    smoothed = np.asarray(smoothed, dtype=float)
+    if first_gap is None:
+        grid, sensor, skip = hours, smoothed, 0
+    else:
+        grid = np.concatenate([[hours[0] - first_gap], hours])
+        sensor = np.concatenate([smoothed[:1], smoothed])
+        skip = 1
+    grid = grid - grid[0]
+
+    if integration == "quadrature":
+        solution = integrate_quadrature(
+            hours=grid, smoothed_temps=sensor, product_temp=product_temp,
+            A=A, Ea=Ea, nodes=quadrature_nodes,
+        )
+        product_temps = solution["product_temps"]
+        damages = solution["cumulative_damage"]
+    else:
+        solution = integrate_adaptive(
+            hours=grid, smoothed_temps=sensor, product_temp=product_temp,
+            A=A, Ea=Ea, tolerance=tolerance,
+        )
+        boundaries = grid[solution["indices"]]
+        product_temps = np.interp(grid, boundaries, solution["product_temps"])
+        damages = np.interp(grid, boundaries, solution["cumulative_damage"])
+
+    return np.asarray(product_temps)[skip:], np.asarray(damages)[skip:]
+
 
-        results.append({
-            "timestamp": timestamps[i].isoformat(),
-            "sensor_temp": float(sensor_temps[i]),
-            "smoothed_temp": float(smoothed[i]),
-            "product_temp": float(product_temp),
+def _history_rows(timestamps, sensor_temps, smoothed, product_temps, potencies):
+    """
+    One "history" row per sample.
+    """
+    return [
+        {
+            "timestamp": ts.isoformat(),
+            "sensor_temp": float(sensor),
+            "smoothed_temp": float(smooth),
+            "product_temp": float(product),
             "potency": float(potency),
             "type": "history",
-        })
+        }
+        for ts, sensor, smooth, product, potency in zip(
+            timestamps, sensor_temps, smoothed,
+            product_temps.tolist(), potencies.tolist(),
+        )
+    ]
+
+
+def _simulate_exact(
+    timestamps, sensor_temps, smoothed, A, Ea, debug, print_every_n, profile_key=None,
+):
+    """
+    Per-sample thermal → Arrhenius update (reference integration).
+
+    Only the product-temperature recurrence is sequential; rates, damage and
+    potency are evaluated for the whole series in one vectorized pass.
+    """
+    hours = _hours_since_start(timestamps)
+    delta_hours_series = np.diff(hours, prepend=hours[0])
+
+    product_temps, damages, potencies = _integrate_exact(
+        delta_hours_series, smoothed, smoothed[0], A, Ea, profile_key=profile_key
+    )
 
-        if debug and i % print_every_n == 0:
+    results = _history_rows(timestamps, sensor_temps, smoothed, product_temps, potencies)
+
+    if debug:
+        for i in range(0, len(results), print_every_n):
             print(
                 f"[HISTORY] {timestamps[i]} | "
                 f"Air={sensor_temps[i]:.2f}°C | "
-                f"Product={product_temp:.2f}°C | "
-                f"Potency={potency:.4f}%"
+                f"Product={product_temps[i]:.2f}°C | "
+                f"Potency={potencies[i]:.4f}%"
             )
 
-    # ---- Aggregate metrics ----
-    metrics = {
-        "peak_sensor_temp_c": max(sensor_temps),
-        "peak_product_estimated_c": max(r["product_temp"] for r in results),
-        "min_sensor_estimated_c": min(sensor_temps),
-        "min_product_estimated_c": min(r["product_temp"] for r in results),
-        "final_potency_percent": results[-1]["potency"],
+    return results, damages, delta_hours_series, product_temps
+
+
+def _simulate_adaptive(timestamps, sensor_temps, smoothed, A, Ea, tolerance):
+    """
+    Error-controlled integration; history rows only at step boundaries.
+    """
+    hours = _hours_since_start(timestamps)
+
+    solution = integrate_adaptive(
+        hours=hours,
+        smoothed_temps=smoothed,
+        product_temp=smoothed[0],
+        A=A,
+        Ea=Ea,
+        tolerance=tolerance,
+    )
+
+    potencies = 100.0 * np.exp(-solution["cumulative_damage"])
+    if np.any(np.diff(potencies) > 1e-9):
+        raise ForecastModelViolation(
+            "Potency increased over time — model violation"
+        )
+
+    # Rows only at step boundaries (see run_forecast)
+    boundaries = solution["indices"].tolist()
+    results = _history_rows(
+        [timestamps[i] for i in boundaries],
+        [sensor_temps[i] for i in boundaries],
+        [smoothed[i] for i in boundaries],
+        solution["product_temps"],
+        potencies,
+    )
+
+    # Per-sample series for the exposure aggregates
+    delta_hours_series = np.diff(hours, prepend=hours[0])
+    product_temps = np.interp(
+        hours, hours[solution["indices"]], solution["product_temps"]
+    )
+
+    integration_info = {
+        "mode": "adaptive",
+        "steps": solution["steps"],
+        "samples": len(timestamps),
+        "tolerance": tolerance,
+        "error_estimate": float(solution["error_estimate"]),
     }
 
-    return results, metrics
+    return (
+        results,
+        solution["cumulative_damage"],
+        delta_hours_series,
+        product_temps,
+        integration_info,
+    )
+
+
+def _simulate_quadrature(timestamps, sensor_temps, smoothed, A, Ea, nodes):
+    """
+    Per-sample rows; interval damage by quadrature along the lag trajectory.
+    """
+    hours = _hours_since_start(timestamps)
+
+    solution = integrate_quadrature(
+        hours=hours,
+        smoothed_temps=smoothed,
+        product_temp=smoothed[0],
+        A=A,
+        Ea=Ea,
+        nodes=nodes,
+    )
+
+    damages = solution["cumulative_damage"]
+    product_temps = solution["product_temps"]
+    potencies = 100.0 * np.exp(-damages)
+    if np.any(np.diff(potencies) > 1e-9):
+        raise ForecastModelViolation(
+            "Potency increased over time — model violation"
+        )
+
+    results = _history_rows(timestamps, sensor_temps, smoothed, product_temps, potencies)
+
+    integration_info = {
+        "mode": "quadrature",
+        "steps": solution["steps"],
+        "nodes": nodes,
+        "error_estimate": solution["error_estimate"],
+    }
+
+    return (
+        results,
+        damages,
+        np.diff(hours, prepend=hours[0]),
+        product_temps,
+        integration_info,
+    )
+
+
+def _project_forward(
+    timestamps, sensor_temps, state, A, Ea,
+    smoothing_alpha, forecast_hours, forecast_step_hours, forecast_model,
+):
+    """
+    Fits the trend model on the history and projects potency ahead.
+    """
+    if forecast_step_hours <= 0:
+        raise ValueError("forecast_step_hours must be positive")
+
+    hours = _hours_since_start(timestamps)
+
+    model = fit_trend_model(hours, sensor_temps, model=forecast_model, alpha=smoothing_alpha)
+
+    horizons = np.arange(1, int(np.floor(forecast_hours / forecast_step_hours)) + 1) * forecast_step_hours
+    if len(horizons) == 0 or horizons[-1] < forecast_hours:
+        horizons = np.append(horizons, forecast_hours)
+
+    sensor_projection = model.project(horizons)
+    product_projection, potency_projection = project_potency(
+        product_temp=state["product_temp"],
+        cumulative_damage=state["cumulative_damage"],
+        sensor_level=model.level,
+        sensor_slope=model.slope,
+        horizons_hours=horizons,
+        A=A,
+        Ea=Ea,
+    )
+
+    last_timestamp = timestamps[-1]
+    rows = [
+        {
+            "timestamp": (last_timestamp + timedelta(hours=float(h))).isoformat(),
+            "sensor_temp": float(sensor),
+            "smoothed_temp": float(sensor),
+            "product_temp": float(product),
+            "potency": float(potency),
+            "type": "forecast",
+        }
+        for h, sensor, product, potency in zip(
+            horizons, sensor_projection, product_projection, potency_projection
+        )
+    ]
+
+    info = {
+        "model": forecast_model,
+        "horizon_hours": float(forecast_hours),
+        "step_hours": float(forecast_step_hours),
+        "sensor_trend_c_per_hour": float(model.slope),
+        "final_potency_percent": float(potency_projection[-1]),
+    }
+
+    return rows, info
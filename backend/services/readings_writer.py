@@ -0,0 +1,326 @@
+# services/readings_writer.py
+# Write-behind persistence for raw temperature readings.
+#
+# /api/forecast commits the investigation and calculation synchronously and
+# hands the readings to this writer. Each job is first spooled to disk (.npz),
+# so queued work survives a restart, then inserted in batches by background
+# workers with retry. When every batch has landed the investigation moves
+# from COMPUTED to PERSISTED and the spool file is removed. A job that still
+# fails after max_attempts is moved to spool/quarantine for inspection and
+# its investigation is marked PERSIST_FAILED.
+#
+# Several web workers share the spool directory. Each writer holds an flock
+# on its own owner file for its lifetime and names its spool files after
+# that owner, so a file is only recovered (claimed by an atomic rename) once
+# its owner's lock is free, i.e. the owning process has exited.
+
+import asyncio
+import fcntl
+import glob
+import os
+import time
+import traceback
+import uuid
+
+import numpy as np
+import pandas as pd
+from pymongo.errors import PyMongoError
+
+from config import Config
+from persistence.investigation_repo import reading_documents
+from persistence.async_investigation_repo import (
+    insert_reading_documents,
+    set_investigation_status,
+)
+
+STATUS_PERSISTED = "PERSISTED"
+STATUS_PERSIST_FAILED = "PERSIST_FAILED"
+STALE_TMP_SECONDS = 600
+MAX_RETRY_DELAY_SECONDS = 300
+
+
+class ReadingsWriter:
+    """
+    Bounded queue of spooled reading jobs drained by a few worker tasks.
+
+    Enqueueing waits when the queue is full, which pushes back on uploads
+    instead of letting pending readings grow without limit in memory.
+    """
+
+    def __init__(
+        self,
+        spool_dir,
+        max_jobs=64,
+        workers=2,
+        batch_size=5000,
+        retries=5,
+        retry_base_seconds=0.5,
+        max_attempts=10,
+    ):
+        self.spool_dir = spool_dir
+        self.max_jobs = max_jobs
+        self.workers = workers
+        self.batch_size = batch_size
+        self.retries = retries
+        self.retry_base_seconds = retry_base_seconds
+        self.max_attempts = max_attempts
+        self._queue = None
+        self._tasks = []
+        self._retries = set()
+        self._owner = None
+        self._owner_lock = None
+
+    # ---- Spool ----
+
+    def _owners_dir(self):
+        return os.path.join(self.spool_dir, "owners")
+
+    def _quarantine_dir(self):
+        return os.path.join(self.spool_dir, "quarantine")
+
+    def _spool_path(self, investigation_id, owner=None):
+        return os.path.join(self.spool_dir, f"{investigation_id}.{owner or self._owner}.npz")
+
+    @staticmethod
+    def _spool_owner(path):
+        """
+        (investigation_id, owner) from a spool file name; owner is None for
+        files spooled before owners were recorded.
+        """
+        name = os.path.basename(path)[:-len(".npz")]
+        investigation_id, _, owner = name.rpartition(".")
+        return (investigation_id, owner) if investigation_id else (name, None)
+
+    def _write_spool(self, investigation_id, timestamps, temps, user_sub):
+        path = self._spool_path(investigation_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                time=pd.DatetimeIndex(timestamps).as_unit("ns").asi8,
+                temperature_c=np.asarray(temps, dtype=float),
+                investigation_id=np.array(investigation_id),
+                user_sub=np.array(user_sub),
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return path
+
+    @staticmethod
+    def _read_spool(path):
+        with np.load(path, allow_pickle=False) as data:
+            return {
+                "investigation_id": str(data["investigation_id"]),
+                "user_sub": str(data["user_sub"]),
+                "timestamps": pd.to_datetime(data["time"]),
+                "temps": data["temperature_c"],
+            }
+
+    # ---- Lifecycle ----
+
+    async def start(self):
+        """
+        Takes an owner lock, starts the workers and re-queues jobs left in
+        the spool by processes that have exited.
+        """
+        os.makedirs(self._owners_dir(), exist_ok=True)
+        os.makedirs(self._quarantine_dir(), exist_ok=True)
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._owner_lock = open(os.path.join(self._owners_dir(), f"{self._owner}.lock"), "w")
+        fcntl.flock(self._owner_lock, fcntl.LOCK_EX)
+        self._queue = asyncio.Queue(maxsize=self.max_jobs)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._recover()))
+
+    async def stop(self, timeout=None):
+        """
+        Waits up to timeout seconds for queued jobs, then cancels the
+        workers. Unfinished jobs stay in the spool for the next start.
+        """
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"[ReadingsWriter] {self._queue.qsize()} job(s) left in spool at shutdown")
+        tasks = self._tasks + list(self._retries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue = None
+        self._tasks = []
+        self._retries = set()
+        # Our spool files become recoverable by the other workers
+        os.remove(self._owner_lock.name)
+        self._owner_lock.close()
+        self._owner_lock = None
+
+    def _owner_alive(self, owner):
+        """
+        True while the owner's process holds its lock.
+        """
+        if owner == self._owner:
+            return True
+        try:
+            lock = open(os.path.join(self._owners_dir(), f"{owner}.lock"), "r")
+        except FileNotFoundError:
+            return False
+        with lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            # Left by a process that died; forget it
+            try:
+                os.remove(lock.name)
+            except FileNotFoundError:
+                pass
+            return False
+
+    def _claim_orphans(self):
+        """
+        Renames spool files of exited owners to our owner; the rename is
+        atomic, so each file is claimed by exactly one worker.
+        """
+        # Partial writes from a crashed process (live ones are recent)
+        for stale in glob.glob(os.path.join(self.spool_dir, "*.tmp")):
+            if time.time() - os.path.getmtime(stale) > STALE_TMP_SECONDS:
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+
+        claimed = []
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, "*.npz"))):
+            investigation_id, owner = self._spool_owner(path)
+            if owner is not None and self._owner_alive(owner):
+                continue
+            target = self._spool_path(investigation_id)
+            try:
+                os.rename(path, target)
+            except FileNotFoundError:
+                continue  # claimed by another worker
+            claimed.append(target)
+        return claimed
+
+    async def _recover(self):
+        for path in await asyncio.to_thread(self._claim_orphans):
+            await self._queue.put((path, 0))
+
+    # ---- Producer ----
+
+    async def enqueue(self, investigation_id, timestamps, temps, user_sub):
+        """
+        Spools the readings durably and queues them for insertion.
+        """
+        if self._queue is None:
+            raise RuntimeError("ReadingsWriter is not running")
+        path = await asyncio.to_thread(
+            self._write_spool, investigation_id, timestamps, temps, user_sub
+        )
+        await self._queue.put((path, 0))
+
+    def pending(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # ---- Consumer ----
+
+    async def _worker(self):
+        while True:
+            path, attempt = await self._queue.get()
+            try:
+                await self._persist(path)
+            except Exception as e:
+                traceback.print_exc()
+                if attempt + 1 >= self.max_attempts:
+                    print(
+                        f"[ReadingsWriter] {os.path.basename(path)} failed "
+                        f"{attempt + 1} times, quarantining:", str(e)
+                    )
+                    await self._quarantine(path)
+                else:
+                    delay = min(self.retry_base_seconds * 2 ** attempt, MAX_RETRY_DELAY_SECONDS)
+                    print(
+                        f"[ReadingsWriter] {os.path.basename(path)} failed "
+                        f"(attempt {attempt + 1}), retrying in {delay:.1f}s:", str(e)
+                    )
+                    self._retry_later(path, attempt + 1, delay)
+            finally:
+                self._queue.task_done()
+
+    def _retry_later(self, path, attempt, delay):
+        """
+        Re-queues a failed job after a delay. The file stays in the spool
+        meanwhile, so a job still pending at shutdown is recovered later.
+        """
+        async def retry():
+            await asyncio.sleep(delay)
+            await self._queue.put((path, attempt))
+
+        task = asyncio.create_task(retry())
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _quarantine(self, path):
+        """
+        Gives up on a job: moves its spool file out of the spool (so it is
+        neither retried nor recovered) and marks the investigation failed.
+        """
+        investigation_id, _ = self._spool_owner(path)
+        target = os.path.join(self._quarantine_dir(), os.path.basename(path))
+        try:
+            await asyncio.to_thread(os.replace, path, target)
+        except FileNotFoundError:
+            return  # written or claimed meanwhile
+        try:
+            await set_investigation_status(investigation_id, STATUS_PERSIST_FAILED)
+        except PyMongoError as e:
+            print(f"[ReadingsWriter] Could not mark {investigation_id} as failed:", str(e))
+
+    async def _persist(self, path):
+        try:
+            job = await asyncio.to_thread(self._read_spool, path)
+        except FileNotFoundError:
+            return  # already written
+        total = len(job["temps"])
+
+        # Documents are built per batch, off the event loop
+        for start in range(0, total, self.batch_size):
+            stop = start + self.batch_size
+            batch = await asyncio.to_thread(
+                reading_documents,
+                job["investigation_id"],
+                job["timestamps"][start:stop],
+                job["temps"][start:stop],
+                job["user_sub"],
+                start,
+            )
+            await self._insert_with_retry(batch)
+
+        await set_investigation_status(job["investigation_id"], STATUS_PERSISTED)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    async def _insert_with_retry(self, batch):
+        for attempt in range(self.retries + 1):
+            try:
+                await insert_reading_documents(batch)
+                return
+            except PyMongoError:
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(self.retry_base_seconds * 2 ** attempt)
+
+
+readings_writer = ReadingsWriter(
+    spool_dir=Config.READINGS_SPOOL_DIR,
+    max_jobs=Config.READINGS_QUEUE_MAX_JOBS,
+    workers=Config.READINGS_WRITER_WORKERS,
+    batch_size=Config.MONGO_INSERT_BATCH_SIZE,
+    retries=Config.READINGS_WRITE_RETRIES,
+    retry_base_seconds=Config.READINGS_RETRY_BASE_SECONDS,
+    max_attempts=Config.READINGS_MAX_JOB_ATTEMPTS,
+)
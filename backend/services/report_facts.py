@@ -0,0 +1,157 @@
+# services/report_facts.py
+# Compact, cached summary facts for report generation.
+#
+# The reading-derived part (count, period, excursions) is computed by the
+# forecast job from the full series and stored on the calculation, so a
+# report never has to page the readings back in; only calculations stored
+# before that are rebuilt from the readings collection.
+
+import numpy as np
+import pandas as pd
+
+from domain.exposure import excursion_intervals
+from domain.stability_profiles import STABILITY_PROFILES
+from persistence.async_investigation_repo import (
+    iter_temperature_readings,
+    save_report_facts,
+)
+
+# Bump when the facts layout changes so cached copies are rebuilt
+REPORT_FACTS_VERSION = 2
+
+# Only the most severe excursions are kept on the calculation document
+MAX_STORED_EXCURSIONS = 200
+
+EXPOSURE_FIELDS = (
+    "mean_kinetic_temp_c",
+    "total_duration_hours",
+    "time_in_range_hours",
+    "time_above_range_hours",
+    "time_below_range_hours",
+    "time_in_range_percent",
+    "degree_hours_above_limit",
+    "degree_hours_below_limit",
+)
+
+
+async def _load_readings(investigation_id, user_sub):
+    times, temps = [], []
+    async for batch_times, batch_temps in iter_temperature_readings(investigation_id, user_sub):
+        times.append(batch_times)
+        temps.append(batch_temps)
+    if not times:
+        return np.empty(0, dtype="datetime64[ns]"), np.empty(0)
+    return np.concatenate(times), np.concatenate(temps)
+
+
+def summarize_excursions(times, temps, storage_min, storage_max):
+    """
+    Excursion intervals with ISO timestamps, most severe (degree-hours)
+    first, capped at MAX_STORED_EXCURSIONS.
+    """
+    if len(times) == 0:
+        return 0, []
+    hours = (times - times[0]) / np.timedelta64(1, "h")
+    intervals = excursion_intervals(hours, temps, storage_min, storage_max)
+
+    excursions = []
+    for item in intervals:
+        i = item["start_index"]
+        start = times[i - 1] if i > 0 else times[i]
+        excursions.append({
+            "direction": item["direction"],
+            "start": pd.Timestamp(start).isoformat(),
+            "end": pd.Timestamp(times[item["end_index"]]).isoformat(),
+            "duration_hours": item["duration_hours"],
+            "extreme_temp_c": item["extreme_temp_c"],
+            "degree_hours": item["degree_hours"],
+        })
+    excursions.sort(key=lambda e: -e["degree_hours"])
+    return len(intervals), excursions[:MAX_STORED_EXCURSIONS]
+
+
+def summarize_readings(times, temps, stability_profile):
+    """
+    The facts that need the whole series: reading count, period and the
+    excursions outside the profile's storage range.
+
+    Args:
+        times (np.ndarray): datetime64[ns], increasing
+        temps (np.ndarray): temperatures (°C)
+        stability_profile (str): key into STABILITY_PROFILES
+    """
+    profile = STABILITY_PROFILES.get(stability_profile, {})
+    storage_min = profile.get("storage_min")
+    storage_max = profile.get("storage_max")
+    excursion_count, excursions = (
+        summarize_excursions(times, temps, storage_min, storage_max)
+        if storage_min is not None else (None, [])
+    )
+    return {
+        "readings": int(len(temps)),
+        "period_start": pd.Timestamp(times[0]).isoformat() if len(times) else None,
+        "period_end": pd.Timestamp(times[-1]).isoformat() if len(times) else None,
+        "excursion_count": excursion_count,
+        "excursions": excursions,
+    }
+
+
+def has_reading_facts(calculation):
+    cached = calculation.get("report_facts")
+    return bool(cached and cached.get("version") == REPORT_FACTS_VERSION) or (
+        calculation.get("reading_facts") is not None
+    )
+
+
+async def get_report_facts(investigation, calculation):
+    """
+    Facts for the report prompt, read from the calculation document when a
+    current copy is cached there; otherwise built from the stored results and
+    the reading facts stored by the forecast, and cached.
+
+    Calculations without stored reading facts fall back to the readings
+    collection; callers must check the investigation is PERSISTED first
+    (see has_reading_facts), or the excursions would be incomplete.
+    """
+    cached = calculation.get("report_facts")
+    if cached and cached.get("version") == REPORT_FACTS_VERSION:
+        return cached
+
+    inputs = calculation["inputs"]
+    results = calculation["results"]
+    profile = STABILITY_PROFILES.get(inputs["stability_profile"], {})
+
+    reading_facts = calculation.get("reading_facts")
+    if reading_facts is None:
+        times, temps = await _load_readings(
+            investigation["investigation_id"], investigation.get("user_sub")
+        )
+        reading_facts = summarize_readings(times, temps, inputs["stability_profile"])
+
+    facts = {
+        "version": REPORT_FACTS_VERSION,
+        "investigation_id": investigation["investigation_id"],
+        "calculation_id": calculation.get("calculation_id"),
+        "stability_profile": inputs["stability_profile"],
+        "Ea": inputs["Ea"],
+        "A": inputs["A"],
+        "smoothing_alpha": inputs["smoothing_alpha"],
+        "storage_min_c": profile.get("storage_min"),
+        "storage_max_c": profile.get("storage_max"),
+        "readings": reading_facts["readings"],
+        "period_start": reading_facts["period_start"],
+        "period_end": reading_facts["period_end"],
+        "peak_sensor_temp_c": results.get("peak_sensor_temp_c"),
+        "peak_product_temp_c": results.get("peak_product_estimated_c"),
+        "min_sensor_temp_c": results.get("min_sensor_estimated_c"),
+        "min_product_temp_c": results.get("min_product_estimated_c"),
+        "final_potency_percent": results.get("final_potency_percent"),
+        **{field: results.get(field) for field in EXPOSURE_FIELDS},
+        "excursion_count": reading_facts["excursion_count"],
+        "excursions": reading_facts["excursions"],
+    }
+
+    if calculation.get("calculation_id"):
+        await save_report_facts(calculation["calculation_id"], facts)
+
+    return facts
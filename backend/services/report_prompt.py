@@ -0,0 +1,222 @@
+# services/report_prompt.py
+# Report prompt assembly from summary facts under a token budget
+
+import math
+from string import Template
+
+from config import Config
+
+# Rough average for English prose with numbers; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+NOT_AVAILABLE = "Data not available for assessment."
+
+# Parsed once at import; only the facts block changes per report
+REPORT_TEMPLATE = Template("""
+SYSTEM ROLE:
+You are a Senior Quality Assurance (QA) Manager preparing a scientific, decision-support document.
+You do NOT approve, reject, or release product.
+
+DOCUMENT TYPE:
+Temperature Deviation Investigation Report
+
+REGULATORY CONTEXT (INFORMATIONAL ALIGNMENT ONLY):
+- FDA 21 CFR Part 11 (Data Integrity)
+- ICH Q1A(R2) (Stability)
+- ICH Q9 (Quality Risk Management)
+- GxP Documentation Principles
+
+BOUNDARY CONDITIONS (STRICT):
+- Use ONLY the data explicitly provided below.
+- Do NOT invent, infer, or estimate missing values.
+- Do NOT make release, rejection, or disposition decisions.
+- Do NOT recommend discard, rework, or market action.
+- Maintain neutral, evidence-based language.
+- If data is unavailable, state exactly: "Data not available for assessment."
+
+$facts
+
+MANDATORY OUTPUT FORMAT:
+The generated report MUST follow the exact structure below, including headings and order.
+Do NOT add sections or conclusions beyond numerical interpretation.
+
+TEMPERATURE DEVIATION INVESTIGATION REPORT  
+
+Investigation ID: $investigation_id  
+Stability Profile: $stability_profile
+
+
+1. PURPOSE AND SCOPE  
+- State the purpose of this temperature deviation assessment  
+- Define the scope as a quantitative evaluation of temperature-driven degradation  
+- Explicitly state that kinetic modeling outputs are provided to support, but not replace, QA decision-making  
+- State that labeled storage conditions are referenced for context only
+
+---
+
+2. DEVIATION OVERVIEW  
+- Describe the observed temperature excursion using recorded sensor data  
+- Identify the primary monitoring reference (air temperature vs estimated product temperature)  
+- Report worst-case observed air and product temperatures  
+- Summarize the listed excursion intervals (timing, duration, extreme temperature)  
+- Define the temporal and analytical boundaries of the assessed event
+
+---
+
+3. SCIENTIFIC ANALYSIS AND RESULTS  
+- Describe the Arrhenius-based degradation model applied  
+- Explicitly list kinetic parameters used (Activation Energy and Frequency Factor)  
+- Describe how temperature-time data was processed, including smoothing methodology  
+- Compare observed air temperature to estimated product temperature profiles  
+- Present calculated potency outcomes derived from modeled degradation kinetics  
+- If applicable, compare observed temperatures to the labeled stability range for contextual reference only
+
+---
+
+4. DATA INTEGRITY AND METHODOLOGY  
+- Describe source and handling of raw temperature time-series data  
+- Confirm exponential smoothing methodology and parameter values  
+- Confirm that calculations were performed using validated algorithms  
+- Confirm alignment with 21 CFR Part 11 data integrity principles  
+- State explicitly that no external data, assumptions, or stability extrapolations were introduced
+
+---
+
+5. INTERPRETIVE GUIDANCE (NON-BINDING)  
+- Explain what the calculated potency and temperature data indicate in quantitative terms  
+- Clarify that degradation estimates are driven by observed temperature exposure and kinetic parameters  
+- Describe known limitations of model-based estimation, including sensitivity to parameter selection  
+- Reiterate that final quality disposition decisions require authorized QA review and approved procedures
+
+---
+
+DISCLAIMER:
+"This report provides quantitative scientific analysis to support quality review activities. Final disposition decisions must be made by authorized quality personnel in accordance with approved procedures."
+""")
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _fmt(value, digits=2, unit=""):
+    if value is None:
+        return NOT_AVAILABLE
+    if isinstance(value, float):
+        value = f"{value:.{digits}f}"
+    return f"{value}{unit}"
+
+
+def _required_lines(facts):
+    potency = facts["final_potency_percent"]
+    return [
+        "INVESTIGATION METADATA:",
+        f"- Investigation ID: {facts['investigation_id']}",
+        f"- Stability Profile Applied: {facts['stability_profile']}",
+        f"- Activation Energy (Ea): {facts['Ea']} J/mol",
+        f"- Frequency Factor (A): {facts['A']}",
+        "- Kinetic Model: Arrhenius-based degradation",
+        "- Temperature Smoothing Method: Exponential",
+        f"- Smoothing Parameter (α): {facts['smoothing_alpha']}",
+        "",
+        "ANALYTICAL RESULTS (SOURCE DATA):",
+        f"- Worst-Case Air Temperature: {_fmt(facts['peak_sensor_temp_c'], unit=' °C')}",
+        f"- Worst-Case Estimated Product Temperature: {_fmt(facts['peak_product_temp_c'], unit=' °C')}",
+        f"- Calculated Final Potency: {_fmt(potency, 4, ' %')}",
+        f"- Calculated Total Potency Loss: {_fmt(100 - potency if potency is not None else None, 4, ' %')}",
+    ]
+
+
+def _exposure_lines(facts):
+    return [
+        f"- Labeled Storage Range: {_fmt(facts['storage_min_c'])} to {_fmt(facts['storage_max_c'], unit=' °C')}",
+        f"- Monitoring Period: {facts['period_start'] or NOT_AVAILABLE} to {facts['period_end'] or NOT_AVAILABLE}",
+        f"- Recorded Readings: {facts['readings']}",
+        f"- Total Duration: {_fmt(facts['total_duration_hours'], unit=' h')}",
+        f"- Mean Kinetic Temperature (air): {_fmt(facts['mean_kinetic_temp_c'], unit=' °C')}",
+        f"- Time In Range: {_fmt(facts['time_in_range_percent'], unit=' %')}",
+        f"- Time Above Range: {_fmt(facts['time_above_range_hours'], unit=' h')}",
+        f"- Time Below Range: {_fmt(facts['time_below_range_hours'], unit=' h')}",
+        f"- Degree-Hours Above Upper Limit: {_fmt(facts['degree_hours_above_limit'], unit=' °C·h')}",
+        f"- Degree-Hours Below Lower Limit: {_fmt(facts['degree_hours_below_limit'], unit=' °C·h')}",
+        f"- Lowest Air / Product Temperature: {_fmt(facts['min_sensor_temp_c'])} / {_fmt(facts['min_product_temp_c'], unit=' °C')}",
+    ]
+
+
+def _excursion_line(excursion):
+    return (
+        f"- {excursion['start']} to {excursion['end']}: {excursion['direction']} range, "
+        f"{excursion['duration_hours']:.2f} h, extreme {excursion['extreme_temp_c']:.2f} °C, "
+        f"{excursion['degree_hours']:.2f} °C·h"
+    )
+
+
+def build_report_prompt(facts, max_tokens=None):
+    """
+    Renders the report prompt from precomputed facts.
+
+    Metadata and headline results are always included. Exposure summary
+    lines and then excursion intervals (most severe first) are added while
+    the estimated prompt size stays within max_tokens; excursions that do
+    not fit are counted in a closing note instead of being listed.
+
+    Returns:
+        (str, dict): prompt and a summary of what was included
+    """
+    max_tokens = max_tokens or Config.REPORT_PROMPT_MAX_TOKENS
+
+    def render(lines):
+        return REPORT_TEMPLATE.substitute(
+            facts="\n".join(lines),
+            investigation_id=facts["investigation_id"],
+            stability_profile=facts["stability_profile"],
+        )
+
+    lines = _required_lines(facts)
+    used = estimate_tokens(render(lines))
+
+    def add(section, candidates):
+        nonlocal used
+        kept = []
+        # Section header and blank line cost roughly one line of budget
+        overhead = estimate_tokens(section) + 1
+        for line in candidates:
+            cost = estimate_tokens(line) + 1
+            if used + overhead + cost > max_tokens:
+                break
+            kept.append(line)
+            used += cost
+        if kept:
+            used += overhead
+        return kept
+
+    exposure = add("EXPOSURE SUMMARY:", _exposure_lines(facts))
+    if exposure:
+        lines += ["", "EXPOSURE SUMMARY:", *exposure]
+
+    excursions = facts.get("excursions") or []
+    listed = add(
+        "EXCURSION INTERVALS (outside labeled storage range):",
+        [_excursion_line(e) for e in excursions],
+    )
+    total = facts.get("excursion_count")
+    if total == 0:
+        lines += ["", "EXCURSION INTERVALS (outside labeled storage range):", "- None recorded"]
+    elif listed or excursions:
+        chronological = sorted(excursions[:len(listed)], key=lambda e: e["start"])
+        lines += [
+            "", "EXCURSION INTERVALS (outside labeled storage range):",
+            *(_excursion_line(e) for e in chronological),
+        ]
+        omitted = (total or len(excursions)) - len(listed)
+        if omitted > 0:
+            lines.append(f"- {omitted} further lower-severity excursion interval(s) not listed")
+
+    prompt = render(lines)
+    return prompt, {
+        "estimated_tokens": estimate_tokens(prompt),
+        "max_tokens": max_tokens,
+        "exposure_lines": len(exposure),
+        "excursions_listed": len(listed),
+        "excursions_total": total,
+    }
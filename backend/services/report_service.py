@@ -1,171 +1,135 @@
 # services/report_service.py
+import asyncio
 from datetime import datetime
-from config import openai_client, Config
-from persistence.mongo import investigations, calculations, reports
+from config import get_openai_client, Config
+from persistence.async_mongo import async_collection
+from persistence.async_investigation_repo import find_investigation
+from services.report_facts import get_report_facts, has_reading_facts
+from services.report_prompt import build_report_prompt
+from utils.rate_limit import RateLimiter
+from utils.shared_cache import shared_cache
 import uuid
 
+REPORT_NAMESPACE = "report"
+
+# One budget per web worker for every LLM call (interactive and batch), so
+# concurrent batch jobs and single reports cannot add up past the limits
+openai_limiter = RateLimiter(Config.OPENAI_REQUESTS_PER_MINUTE, Config.OPENAI_TOKENS_PER_MINUTE)
+
 
 class ReportGenerationError(Exception):
     pass
 
 
-def generate_investigation_report(investigation_id: str, user_sub: str = None) -> str:
+class ReportNotReady(ReportGenerationError):
+    """Raised while the readings a report needs are still being written."""
+    pass
+
+
+async def prepare_report(investigation_id: str):
     """
-    Generates a Temperature Deviation Investigation Report and saves it to MongoDB.
+    Loads the investigation and its latest calculation and builds the prompt.
+
+    Returns:
+        dict: investigation, calculation, prompt and prompt_stats
     """
     # ---- Fetch authoritative data ----
-    investigation = investigations.find_one({"investigation_id": investigation_id})
+    investigation = await find_investigation(investigation_id)
     if not investigation:
         raise ReportGenerationError("Investigation not found")
 
-    calculation = calculations.find_one({"investigation_id": investigation_id})
+    calculation = await async_collection("calculations").find_one(
+        {"investigation_id": investigation_id},
+        sort=[("computed_at", -1)],
+    )
     if not calculation:
         raise ReportGenerationError("Calculation not found")
+    if investigation.get("status") == "COMPUTED" and not has_reading_facts(calculation):
+        raise ReportNotReady("Readings are still being stored; try again shortly")
+    if investigation.get("status") == "PERSIST_FAILED" and not has_reading_facts(calculation):
+        raise ReportGenerationError("Readings could not be stored; upload the data again")
+
+    # ---- Prompt construction (cached summary facts, bounded size) ----
+    facts = await get_report_facts(investigation, calculation)
+    prompt, prompt_stats = build_report_prompt(facts)
+    print(
+        f"[Report] Prompt for {investigation_id}: ~{prompt_stats['estimated_tokens']} tokens, "
+        f"{prompt_stats['excursions_listed']}/{prompt_stats['excursions_total']} excursions listed"
+    )
 
-    inputs = calculation["inputs"]
-    results = calculation["results"]
-
-    # ---- Prompt construction ----
-    prompt = f"""
-SYSTEM ROLE:
-You are a Senior Quality Assurance (QA) Manager preparing a scientific, decision-support document.
-You do NOT approve, reject, or release product.
-
-DOCUMENT TYPE:
-Temperature Deviation Investigation Report
-
-REGULATORY CONTEXT (INFORMATIONAL ALIGNMENT ONLY):
-- FDA 21 CFR Part 11 (Data Integrity)
-- ICH Q1A(R2) (Stability)
-- ICH Q9 (Quality Risk Management)
-- GxP Documentation Principles
-
-BOUNDARY CONDITIONS (STRICT):
-- Use ONLY the data explicitly provided below.
-- Do NOT invent, infer, or estimate missing values.
-- Do NOT make release, rejection, or disposition decisions.
-- Do NOT recommend discard, rework, or market action.
-- Maintain neutral, evidence-based language.
-- If data is unavailable, state exactly: "Data not available for assessment."
-
-INVESTIGATION METADATA:
-- Investigation ID: {investigation_id}
-- Stability Profile Applied: {inputs['stability_profile']}
-- Activation Energy (Ea): {inputs['Ea']} J/mol
-- Frequency Factor (A): {inputs['A']}
-- Kinetic Model: Arrhenius-based degradation
-- Temperature Smoothing Method: Exponential
-- Smoothing Parameter (α): {inputs['smoothing_alpha']}
-
-ANALYTICAL RESULTS (SOURCE DATA):
-- Worst-Case Air Temperature: {results['peak_sensor_temp_c']} °C
-- Worst-Case Estimated Product Temperature: {results['peak_product_estimated_c']} °C
-- Calculated Final Potency: {results['final_potency_percent']} %
-- Calculated Total Potency Loss: {100 - results['final_potency_percent']:.4f} %
-
-MANDATORY OUTPUT FORMAT:
-The generated report MUST follow the exact structure below, including headings and order.
-Do NOT add sections or conclusions beyond numerical interpretation.
-
-TEMPERATURE DEVIATION INVESTIGATION REPORT  
-
-Investigation ID: {investigation_id}  
-Stability Profile: {inputs['stability_profile']}
-
-
-1. PURPOSE AND SCOPE  
-- State the purpose of this temperature deviation assessment  
-- Define the scope as a quantitative evaluation of temperature-driven degradation  
-- Explicitly state that kinetic modeling outputs are provided to support, but not replace, QA decision-making  
-- State that labeled storage conditions are referenced for context only
-
----
-
-2. DEVIATION OVERVIEW  
-- Describe the observed temperature excursion using recorded sensor data  
-- Identify the primary monitoring reference (air temperature vs estimated product temperature)  
-- Report worst-case observed air and product temperatures  
-- Define the temporal and analytical boundaries of the assessed event
-
----
-
-3. SCIENTIFIC ANALYSIS AND RESULTS  
-- Describe the Arrhenius-based degradation model applied  
-- Explicitly list kinetic parameters used (Activation Energy and Frequency Factor)  
-- Describe how temperature-time data was processed, including smoothing methodology  
-- Compare observed air temperature to estimated product temperature profiles  
-- Present calculated potency outcomes derived from modeled degradation kinetics  
-- If applicable, compare observed temperatures to the labeled stability range for contextual reference only
-
----
-
-4. DATA INTEGRITY AND METHODOLOGY  
-- Describe source and handling of raw temperature time-series data  
-- Confirm exponential smoothing methodology and parameter values  
-- Confirm that calculations were performed using validated algorithms  
-- Confirm alignment with 21 CFR Part 11 data integrity principles  
-- State explicitly that no external data, assumptions, or stability extrapolations were introduced
-
----
-
-5. INTERPRETIVE GUIDANCE (NON-BINDING)  
-- Explain what the calculated potency and temperature data indicate in quantitative terms  
-- Clarify that degradation estimates are driven by observed temperature exposure and kinetic parameters  
-- Describe known limitations of model-based estimation, including sensitivity to parameter selection  
-- Reiterate that final quality disposition decisions require authorized QA review and approved procedures
-
----
+    return {
+        "investigation": investigation,
+        "calculation": calculation,
+        "prompt": prompt,
+        "prompt_stats": prompt_stats,
+    }
 
-DISCLAIMER:
-"This report provides quantitative scientific analysis to support quality review activities. Final disposition decisions must be made by authorized quality personnel in accordance with approved procedures."
 
-"""
+async def complete_report(prompt: str, prompt_tokens: int):
+    """
+    Runs the LLM on a prepared prompt within the shared rate limits.
 
+    Args:
+        prompt (str): prompt from prepare_report
+        prompt_tokens (int): its estimated size (prompt_stats["estimated_tokens"])
 
+    Returns:
+        (str, int | None): report content and total tokens used (if reported)
+    """
+    estimated = prompt_tokens + Config.REPORT_MAX_COMPLETION_TOKENS
+    await openai_limiter.acquire(estimated)
 
-    # ---- OpenAI call ----
+    # ---- OpenAI call (sync client, kept off the event loop) ----
     try:
-        response = openai_client.chat.completions.create(
+        response = await asyncio.to_thread(
+            get_openai_client().chat.completions.create,
             model=Config.AZURE_OPENAI_DEPLOYMENT,
             messages=[
                 {"role": "system", "content": "You are a helpful scientific assistant."},
                 {"role": "user", "content": prompt}
             ],
-            max_completion_tokens=2000
+            max_completion_tokens=Config.REPORT_MAX_COMPLETION_TOKENS
         )
     except Exception as e:
         raise ReportGenerationError(f"OpenAI call failed: {str(e)}")
 
-    report_content = response.choices[0].message.content
+    usage = getattr(response, "usage", None)
+    used = getattr(usage, "total_tokens", None)
+    openai_limiter.settle(estimated, used)
+    return response.choices[0].message.content, used
+
+
+async def generate_investigation_report(investigation_id: str, user_sub: str = None) -> str:
+    """
+    Generates a Temperature Deviation Investigation Report and saves it to MongoDB.
+    """
+    prepared = await prepare_report(investigation_id)
+    report_content, _ = await complete_report(
+        prepared["prompt"], prepared["prompt_stats"]["estimated_tokens"]
+    )
 
     # ---- Save to MongoDB ----
     if user_sub is None:
         raise ReportGenerationError("user_sub is required to save the report")
 
-    save_report(
+    await save_report(
         investigation_id=investigation_id,
         report_content=report_content,
         user_sub=user_sub,
-        calculation_id=calculation.get("calculation_id")
+        calculation_id=prepared["calculation"].get("calculation_id")
     )
 
     return report_content
 
 
-
-def save_report(
+def report_document(
     investigation_id: str,
     report_content: str,
     user_sub: str,
     calculation_id: str | None = None,
 ):
-    """
-    Stores the generated report in MongoDB.
-    """
-    report_id = f"REP-{uuid.uuid4().hex[:8]}"
-
-    reports.insert_one({
-        "report_id": report_id,
+    return {
+        "report_id": f"REP-{uuid.uuid4().hex[:8]}",
         "investigation_id": investigation_id,
         "calculation_id": calculation_id,
         "user_sub": user_sub,
@@ -175,6 +139,69 @@ def save_report(
         },
         "status": "GENERATED",
         "created_at": datetime.utcnow()
-    })
+    }
+
+
+async def save_report(
+    investigation_id: str,
+    report_content: str,
+    user_sub: str,
+    calculation_id: str | None = None,
+):
+    """
+    Stores the generated report in MongoDB.
+    """
+    document = report_document(investigation_id, report_content, user_sub, calculation_id)
+    await async_collection("reports").insert_one(document)
+    _cache_report(document)
+    return document["report_id"]
+
+
+async def save_reports(documents: list[dict]):
+    """
+    Stores several report documents (see report_document) in one bulk write.
+    """
+    if documents:
+        await async_collection("reports").insert_many(documents, ordered=False)
+    for document in documents:
+        _cache_report(document)
+    return [doc["report_id"] for doc in documents]
+
+
+def _report_cache_key(user_sub, report_id, investigation_id):
+    return f"{user_sub}|{report_id}|{investigation_id}"
+
+
+def _cache_report(document):
+    # Reports are immutable once saved, so entries never need invalidating
+    shared_cache.set(
+        REPORT_NAMESPACE,
+        _report_cache_key(document["user_sub"], document["report_id"], document["investigation_id"]),
+        document["content"].encode("utf-8"),
+    )
+
+
+async def get_report_content(report_id: str, investigation_id: str, user_sub: str):
+    """
+    Content of a report owned by user_sub (None if not found), served from
+    the shared cache when possible.
+    """
+    key = _report_cache_key(user_sub, report_id, investigation_id)
+    cached = shared_cache.get(REPORT_NAMESPACE, key)
+    if cached is not None:
+        return cached.decode("utf-8")
+
+    report_data = await async_collection("reports").find_one(
+        {
+            "user_sub": user_sub,
+            "report_id": report_id,
+            "investigation_id": investigation_id
+        },
+        {"_id": 0, "content": 1}
+    )
+    if not report_data:
+        return None
 
-    return report_id
+    content = report_data.get("content", "")
+    shared_cache.set(REPORT_NAMESPACE, key, content.encode("utf-8"))
+    return content
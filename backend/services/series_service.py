@@ -0,0 +1,172 @@
+# services/series_service.py
+# Windowed, downsampled re-hydration of a stored investigation
+
+import math
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from persistence.async_investigation_repo import (
+    find_calculation,
+    count_temperature_readings,
+    iter_temperature_readings,
+)
+from services.forecast_service import simulate_window
+
+READINGS_BATCH_SIZE = 10000
+SERIES_COLUMNS = ("sensor_temp", "smoothed_temp", "product_temp", "potency")
+
+
+class SeriesQueryError(Exception):
+    """Raised when a stored investigation cannot be re-hydrated."""
+    pass
+
+
+def minmax_bucket_indices(bucket_ids, values):
+    """
+    Index of the minimum and maximum value inside each bucket.
+
+    One lexsort orders samples by (bucket, value); the first and last
+    position of every bucket are its min and max. Keeps excursions visible
+    when downsampling, unlike plain striding.
+    """
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int64)
+    order = np.lexsort((values, bucket_ids))
+    sorted_buckets = bucket_ids[order]
+    starts = np.flatnonzero(np.diff(sorted_buckets, prepend=sorted_buckets[0] - 1))
+    ends = np.append(starts[1:] - 1, len(order) - 1)
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def _select_checkpoint(state, start):
+    """
+    Latest stored checkpoint strictly before start (None = cold start).
+    """
+    if start is None or not state:
+        return None
+    checkpoints = state["checkpoints"]
+    times = np.array(
+        [datetime.fromisoformat(t) for t in checkpoints["timestamp"]],
+        dtype="datetime64[ns]",
+    )
+    i = int(np.searchsorted(times, np.datetime64(start, "ns"), side="left")) - 1
+    if i < 0:
+        return None
+    return {key: checkpoints[key][i] for key in checkpoints}
+
+
+async def get_investigation_series(investigation_id, user_sub, start=None, end=None, max_points=2000):
+    """
+    Returns a time window of a stored investigation as columns.
+
+    Readings are streamed from Mongo in batches. The model is warm-started
+    from the nearest stored checkpoint before the window (or from the first
+    reading), so only the window plus a short warm-up is simulated. Each
+    batch is reduced to per-bucket min/max candidates immediately, so memory
+    stays bounded by max_points rather than the window length.
+    """
+    if max_points < 2:
+        raise ValueError("max_points must be at least 2")
+    if start is not None and end is not None and end < start:
+        raise ValueError("end must not be before start")
+
+    calculation = await find_calculation(
+        investigation_id, user_sub,
+        {"_id": 0, "calculation_id": 1, "inputs": 1, "results.state": 1},
+    )
+    if not calculation:
+        raise SeriesQueryError("Calculation not found")
+
+    inputs = calculation["inputs"]
+    if inputs.get("Ea") is None or inputs.get("A") is None:
+        raise SeriesQueryError("Calculation has no kinetic parameters; re-run the forecast")
+
+    total = await count_temperature_readings(investigation_id, user_sub, start, end)
+    if total == 0:
+        raise SeriesQueryError("No readings in the requested window")
+
+    n_buckets = max_points // 2
+    bucket_size = math.ceil(total / n_buckets) if total > max_points else 1
+
+    checkpoint = _select_checkpoint(calculation.get("results", {}).get("state"), start)
+    batches = iter_temperature_readings(
+        investigation_id,
+        user_sub,
+        after=pd.Timestamp(checkpoint["timestamp"]).to_pydatetime() if checkpoint else None,
+        end=end,
+        batch_size=READINGS_BATCH_SIZE,
+    )
+
+    state = checkpoint
+    position = 0
+    kept = {"timestamp": [], "bucket": [], **{c: [] for c in SERIES_COLUMNS}}
+    start_ns = np.datetime64(start, "ns") if start is not None else None
+
+    # Calculations stored before the mode was recorded used "exact"
+    integration = inputs.get("integration") or {"mode": "exact"}
+
+    async for times, temps in batches:
+        window = simulate_window(
+            pd.DatetimeIndex(times),
+            temps,
+            A=inputs["A"],
+            Ea=inputs["Ea"],
+            smoothing_alpha=inputs.get("smoothing_alpha", 0.1),
+            initial_state=state,
+            integration=integration["mode"],
+            tolerance=integration.get("tolerance", 1e-6),
+            quadrature_nodes=integration.get("quadrature_nodes", 4),
+        )
+        state = {
+            "timestamp": pd.Timestamp(times[-1]).isoformat(),
+            "smoothed_temp": float(window["smoothed_temp"][-1]),
+            "product_temp": float(window["product_temp"][-1]),
+            "cumulative_damage": float(window["cumulative_damage"][-1]),
+        }
+
+        # Drop warm-up rows between the checkpoint and the window start
+        first = int(np.searchsorted(times, start_ns)) if start_ns is not None else 0
+        if first >= len(times):
+            continue
+
+        columns = {
+            "sensor_temp": temps[first:],
+            "smoothed_temp": window["smoothed_temp"][first:],
+            "product_temp": window["product_temp"][first:],
+            "potency": window["potency"][first:],
+        }
+        buckets = (position + np.arange(len(times) - first)) // bucket_size
+        position += len(times) - first
+
+        picks = (
+            minmax_bucket_indices(buckets, columns["sensor_temp"])
+            if bucket_size > 1 else np.arange(len(buckets))
+        )
+        kept["timestamp"].append(times[first:][picks])
+        kept["bucket"].append(buckets[picks])
+        for c in SERIES_COLUMNS:
+            kept[c].append(columns[c][picks])
+
+    merged = {key: np.concatenate(parts) if parts else np.empty(0) for key, parts in kept.items()}
+
+    # Buckets that straddled a batch boundary have up to four candidates
+    if bucket_size > 1 and len(merged["bucket"]):
+        picks = minmax_bucket_indices(merged["bucket"], merged["sensor_temp"])
+        merged = {key: values[picks] for key, values in merged.items()}
+
+    return {
+        "investigation_id": investigation_id,
+        "calculation_id": calculation.get("calculation_id"),
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "total_points": int(total),
+        "returned_points": int(len(merged["timestamp"])),
+        "downsampled": bucket_size > 1,
+        "warm_start_from": checkpoint["timestamp"] if checkpoint else None,
+        "columns": {
+            "timestamp": [pd.Timestamp(t).isoformat() for t in merged["timestamp"]],
+            **{c: merged[c].tolist() for c in SERIES_COLUMNS},
+        },
+    }
@@ -0,0 +1,205 @@
+# services/shelf_life_service.py
+# Threshold-crossing and remaining-budget queries on a stored calculation
+
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from domain.degradation import degradation_rate, degradation_rates
+from domain.forecasting import projected_damage
+from persistence.async_investigation_repo import find_calculation
+
+# Past ~6 time constants (k = 0.25/h) the product is within 0.25% of the
+# ambient temperature and the remaining damage rate is effectively constant.
+EQUILIBRATION_TIME_CONSTANTS = 6.0
+THERMAL_K = 0.25
+
+
+class ShelfLifeQueryError(Exception):
+    """Raised when a stored calculation cannot answer a shelf-life query."""
+    pass
+
+
+def damage_budget(threshold_percent):
+    """
+    Cumulative damage at which potency reaches threshold_percent.
+    """
+    if not (0 < threshold_percent < 100):
+        raise ValueError("threshold_percent must be in (0, 100)")
+    return -math.log(threshold_percent / 100.0)
+
+
+def hours_until_threshold(
+    cumulative_damage,
+    threshold_percent,
+    temperature_c,
+    A,
+    Ea,
+    product_temp=None,
+    include_thermal_lag=False,
+):
+    """
+    Remaining hours at a constant ambient temperature before potency drops
+    below threshold_percent.
+
+    Without thermal lag the product is assumed to be at temperature_c
+    immediately, giving the closed form
+        hours = (D_threshold - D_now) / k(T)
+    which is conservative whenever temperature_c is above the current product
+    temperature. With include_thermal_lag the first-order approach from
+    product_temp is integrated over a fixed equilibration window (constant
+    cost) and the constant-rate closed form is used beyond it.
+
+    Returns:
+        float: hours remaining (0 if the threshold is already crossed)
+    """
+    remaining = damage_budget(threshold_percent) - cumulative_damage
+    if remaining <= 0:
+        return 0.0
+
+    rate = degradation_rate(temperature_c, A=A, Ea=Ea)
+
+    if not include_thermal_lag or product_temp is None:
+        return remaining / rate
+
+    window = EQUILIBRATION_TIME_CONSTANTS / THERMAL_K
+    grid = np.linspace(0.0, window, 241)
+    transient = projected_damage(
+        product_temp, temperature_c, 0.0, grid, A, Ea, k=THERMAL_K
+    )
+
+    if transient[-1] >= remaining:
+        i = int(np.searchsorted(transient, remaining))
+        frac = (remaining - transient[i - 1]) / (transient[i] - transient[i - 1])
+        return float(grid[i - 1] + frac * (grid[i] - grid[i - 1]))
+
+    return float(window + (remaining - transient[-1]) / rate)
+
+
+def scenario_crossing(cumulative_damage, threshold_percent, segments, A, Ea):
+    """
+    Time at which a piecewise-constant temperature scenario crosses the
+    threshold.
+
+    Segment damages are accumulated once (vectorized); the crossing segment
+    is found by binary search on the monotone cumulative damage array and
+    solved exactly inside it.
+
+    Args:
+        segments (list[dict]): [{"hours": float, "temperature_c": float}, ...]
+
+    Returns:
+        dict: crossing hour (None if not reached) and end-of-scenario potency
+    """
+    hours = np.array([seg["hours"] for seg in segments], dtype=float)
+    temps = np.array([seg["temperature_c"] for seg in segments], dtype=float)
+    if np.any(hours < 0):
+        raise ValueError("Scenario segment hours must be non-negative")
+
+    rates = degradation_rates(temps, A=A, Ea=Ea)
+    cumulative = cumulative_damage + np.cumsum(rates * hours)
+    starts = np.concatenate([[0.0], np.cumsum(hours)[:-1]])
+    budget = damage_budget(threshold_percent)
+
+    final_potency = 100.0 * math.exp(-cumulative[-1]) if len(cumulative) else (
+        100.0 * math.exp(-cumulative_damage)
+    )
+
+    if cumulative_damage >= budget:
+        return {"crossing_hours": 0.0, "final_potency_percent": final_potency}
+
+    i = int(np.searchsorted(cumulative, budget))
+    if i >= len(cumulative):
+        return {"crossing_hours": None, "final_potency_percent": final_potency}
+
+    damage_before = cumulative[i - 1] if i > 0 else cumulative_damage
+    crossing = starts[i] + (budget - damage_before) / rates[i]
+    return {"crossing_hours": float(crossing), "final_potency_percent": final_potency}
+
+
+def historical_crossing(checkpoints, threshold_percent):
+    """
+    Timestamp at which the recorded history crossed the threshold, located
+    by binary search on the stored damage checkpoints and interpolated
+    linearly between them.
+
+    Returns:
+        str | None: ISO timestamp, or None if never crossed
+    """
+    damage = np.asarray(checkpoints["cumulative_damage"], dtype=float)
+    budget = damage_budget(threshold_percent)
+
+    i = int(np.searchsorted(damage, budget))
+    if i >= len(damage):
+        return None
+    if i == 0:
+        return checkpoints["timestamp"][0]
+
+    t0 = datetime.fromisoformat(checkpoints["timestamp"][i - 1])
+    t1 = datetime.fromisoformat(checkpoints["timestamp"][i])
+    frac = (budget - damage[i - 1]) / (damage[i] - damage[i - 1])
+    return (t0 + (t1 - t0) * frac).isoformat()
+
+
+async def shelf_life_query(
+    investigation_id,
+    user_sub,
+    threshold_percent=95.0,
+    temperature_c=None,
+    segments=None,
+    include_thermal_lag=False,
+):
+    """
+    Answers threshold and remaining-budget questions for a stored
+    calculation without re-running the simulation.
+    """
+    calculation = await find_calculation(
+        investigation_id, user_sub,
+        {"_id": 0, "calculation_id": 1, "inputs": 1, "results.state": 1},
+    )
+    if not calculation:
+        raise ShelfLifeQueryError("Calculation not found")
+
+    state = calculation.get("results", {}).get("state")
+    inputs = calculation.get("inputs", {})
+    if not state or inputs.get("Ea") is None or inputs.get("A") is None:
+        raise ShelfLifeQueryError(
+            "Calculation predates stored model state; re-run the forecast"
+        )
+
+    A = inputs["A"]
+    Ea = inputs["Ea"]
+    damage = state["cumulative_damage"]
+    budget = damage_budget(threshold_percent)
+
+    response = {
+        "investigation_id": investigation_id,
+        "calculation_id": calculation.get("calculation_id"),
+        "threshold_percent": threshold_percent,
+        "as_of": state["last_timestamp"],
+        "current_potency_percent": 100.0 * math.exp(-damage),
+        "remaining_damage_budget": max(budget - damage, 0.0),
+        "threshold_crossed_at": historical_crossing(state["checkpoints"], threshold_percent),
+    }
+
+    if temperature_c is not None:
+        hours = hours_until_threshold(
+            damage, threshold_percent, temperature_c, A, Ea,
+            product_temp=state["product_temp"],
+            include_thermal_lag=include_thermal_lag,
+        )
+        as_of = datetime.fromisoformat(state["last_timestamp"])
+        response["constant_temperature"] = {
+            "temperature_c": temperature_c,
+            "include_thermal_lag": include_thermal_lag,
+            "hours_remaining": hours,
+            "threshold_reached_at": (as_of + timedelta(hours=hours)).isoformat(),
+        }
+
+    if segments:
+        response["scenario"] = scenario_crossing(
+            damage, threshold_percent, segments, A, Ea
+        )
+
+    return response
@@ -1,41 +1,64 @@
 import azure.cognitiveservices.speech as speechsdk
 from fastapi import HTTPException
-import os
+import hashlib
 
-def synthesize_speech(text: str) -> bytes:
-    
-    print("[TTS] Starting speech synthesis...")
-    try:
-        speech_config = speechsdk.SpeechConfig(
-            subscription=os.getenv("AZURE_SPEECH_KEY"),
-            region=os.getenv("AZURE_SPEECH_REGION"),
-        )
-        speech_config.speech_synthesis_voice_name = "en-US-RyanMultilingualNeural"
-
-        # Use an in-memory stream to capture WAV output
-        audio_stream = speechsdk.audio.AudioOutputConfig(filename="report.wav")  # temporary file
-        synthesizer = speechsdk.SpeechSynthesizer(
-            speech_config=speech_config,
-            audio_config=audio_stream
-        )
-
-        result = synthesizer.speak_text_async(text).get()
-        print(f"[TTS] Synthesis completed with reason: {result.reason}")
-
-        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            # read the file bytes
-            with open("report.wav", "rb") as f:
-                audio_bytes = f.read()
-            print("[TTS] Audio bytes length:", len(audio_bytes))
-            return audio_bytes
-
-        elif result.reason == speechsdk.ResultReason.Canceled:
-            details = result.cancellation_details
-            raise HTTPException(
-                status_code=500,
-                detail=f"TTS canceled: {details.reason} - {details.error_details}",
+from config import Config, get_speech_config, client_overrides
+from utils.shared_cache import shared_cache
+
+TTS_NAMESPACE = "tts"
+
+
+class AzureSpeechSynthesizer:
+    """
+    Text → WAV bytes with Azure Speech.
+    """
+
+    def synthesize(self, text: str) -> bytes:
+        print("[TTS] Starting speech synthesis...")
+        try:
+            # audio_config=None keeps the WAV in memory (no shared temp file
+            # for concurrent requests or workers to overwrite)
+            synthesizer = speechsdk.SpeechSynthesizer(
+                speech_config=get_speech_config(),
+                audio_config=None
             )
 
-    except Exception as e:
-        print("[TTS] Exception occurred:", str(e))
-        raise HTTPException(status_code=500, detail=f"TTS failed: {str(e)}")
\ No newline at end of file
+            result = synthesizer.speak_text_async(text).get()
+            print(f"[TTS] Synthesis completed with reason: {result.reason}")
+
+            if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
+                audio_bytes = bytes(result.audio_data)
+                print("[TTS] Audio bytes length:", len(audio_bytes))
+                return audio_bytes
+
+            elif result.reason == speechsdk.ResultReason.Canceled:
+                details = result.cancellation_details
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"TTS canceled: {details.reason} - {details.error_details}",
+                )
+
+        except Exception as e:
+            print("[TTS] Exception occurred:", str(e))
+            raise HTTPException(status_code=500, detail=f"TTS failed: {str(e)}")
+
+
+_azure_synthesizer = AzureSpeechSynthesizer()
+
+
+def get_speech_synthesizer():
+    return client_overrides.get("speech") or _azure_synthesizer
+
+
+def synthesize_speech(text: str) -> bytes:
+
+    # Same report text → same audio; shared across workers on the node
+    cache_key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    cached = shared_cache.get(TTS_NAMESPACE, cache_key)
+    if cached is not None:
+        print("[TTS] Audio served from cache, length:", len(cached))
+        return cached
+
+    audio_bytes = get_speech_synthesizer().synthesize(text)
+    shared_cache.set(TTS_NAMESPACE, cache_key, audio_bytes, ttl=Config.TTS_CACHE_TTL_SECONDS)
+    return audio_bytes
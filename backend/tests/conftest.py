@@ -0,0 +1,11 @@
+# tests/conftest.py
+# Settings read by config at import time: tests use the in-process Mongo
+# backend and placeholder Azure endpoints, never real services.
+
+import os
+
+os.environ.setdefault("MONGO_BACKEND", "memory")
+os.environ.setdefault("MONGO_DB", "tests")
+os.environ.setdefault("AZURE_ADI_ENDPOINT", "https://adi.example.invalid/")
+os.environ.setdefault("AZURE_ADI_KEY", "test")
+os.environ.setdefault("SHARED_CACHE_BACKEND", "memory")
@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("config")
+
+from services.admission import AdmissionRejected, FairScheduler  # noqa: E402
+
+
+def _scheduler(**overrides):
+    settings = {
+        "slots": 1,
+        "per_user": 1,
+        "rate_per_minute": 600,
+        "burst": 10,
+        "max_queue_per_user": 8,
+        "max_queue": 64,
+        "max_wait_seconds": 5,
+    }
+    settings.update(overrides)
+    return FairScheduler("test", **settings)
+
+
+async def _hold(scheduler, sub, started, release, cost=1.0):
+    async with scheduler.admit(sub, cost):
+        started.append(sub)
+        await release.wait()
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_backlogged_users_are_served_in_fair_order():
+    async def scenario():
+        scheduler = _scheduler()
+        order = []
+        release = asyncio.Event()
+        blocker = asyncio.create_task(_hold(scheduler, "holder", [], release))
+        await _settle()
+
+        async def run(sub):
+            async with scheduler.admit(sub):
+                order.append(sub)
+
+        tasks = [asyncio.create_task(run(sub)) for sub in ("a", "a", "a", "b")]
+        await _settle()
+        release.set()
+        await asyncio.gather(blocker, *tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["a", "b", "a", "a"]
+
+
+def test_per_user_cap_leaves_free_slots_to_other_users():
+    async def scenario():
+        scheduler = _scheduler(slots=2, per_user=1)
+        started = []
+        release = asyncio.Event()
+        tasks = [
+            asyncio.create_task(_hold(scheduler, sub, started, release))
+            for sub in ("a", "a", "b")
+        ]
+        await _settle()
+        snapshot = scheduler.snapshot("a")
+        release.set()
+        await asyncio.gather(*tasks)
+        return started, snapshot
+
+    started, snapshot = asyncio.run(scenario())
+
+    assert started[:2] == ["a", "b"]
+    assert snapshot["running"] == 2
+    assert snapshot["user"] == {"running": 1, "queued": 1, "tokens_available": pytest.approx(8, abs=0.1), "weight": 1.0}
+
+
+def test_rate_limited_requests_get_retry_after():
+    async def scenario():
+        scheduler = _scheduler(rate_per_minute=6, burst=1)
+        async with scheduler.admit("a"):
+            pass
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with scheduler.admit("a"):
+                pass
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+
+    assert rejected.reason == "rate_limited"
+    assert 9.0 < rejected.retry_after <= 10.0
+
+
+def test_queue_full_rejections_do_not_spend_tokens():
+    async def scenario():
+        scheduler = _scheduler(rate_per_minute=0.001, burst=3, max_queue_per_user=1)
+        started = []
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(_hold(scheduler, "a", started, release)) for _ in range(2)]
+        await _settle()
+        rejections = []
+        for _ in range(3):
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with scheduler.admit("a"):
+                    pass
+            rejections.append(rejected.value.reason)
+        tokens = scheduler.snapshot("a")["user"]["tokens_available"]
+        release.set()
+        await asyncio.gather(*tasks)
+        return rejections, tokens
+
+    rejections, tokens = asyncio.run(scenario())
+
+    assert rejections == ["user_queue_full"] * 3
+    assert tokens == pytest.approx(1.0, abs=0.01)
+
+
+def test_class_queue_full_is_rejected_with_retry_after():
+    async def scenario():
+        scheduler = _scheduler(max_queue=1)
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(_hold(scheduler, sub, [], release)) for sub in ("a", "b")]
+        await _settle()
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with scheduler.admit("c"):
+                pass
+        release.set()
+        await asyncio.gather(*tasks)
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+
+    assert rejected.reason == "queue_full"
+    assert rejected.retry_after >= 1.0
+
+
+def test_wait_timeout_gives_back_the_queue_position():
+    async def scenario():
+        scheduler = _scheduler(max_wait_seconds=0.05)
+        release = asyncio.Event()
+        blocker = asyncio.create_task(_hold(scheduler, "holder", [], release))
+        await _settle()
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with scheduler.admit("a"):
+                pass
+        snapshot = scheduler.snapshot("a")
+        release.set()
+        await blocker
+        return rejected.value, snapshot
+
+    rejected, snapshot = asyncio.run(scenario())
+
+    assert rejected.reason == "wait_timeout"
+    assert snapshot["queued"] == 0
+    assert snapshot["user"]["queued"] == 0
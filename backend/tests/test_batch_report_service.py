@@ -0,0 +1,151 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("config")
+
+from persistence.async_mongo import async_collection  # noqa: E402
+from services import batch_report_service as brs  # noqa: E402
+from services.admission import AdmissionRejected  # noqa: E402
+from services.report_service import ReportGenerationError  # noqa: E402
+
+
+class FakeReports:
+    """prepare/complete/admit stand-ins; fails chosen investigations."""
+
+    def __init__(self, failing=(), rejections=0):
+        self.failing = set(failing)
+        self.rejections = rejections
+        self.admitted = []
+
+    @asynccontextmanager
+    async def admit(self, work_class, sub, cost=1.0):
+        if self.rejections:
+            self.rejections -= 1
+            raise AdmissionRejected("Report queue is full", retry_after=0, reason="queue_full")
+        self.admitted.append((work_class, sub))
+        yield
+
+    async def prepare(self, investigation_id):
+        if investigation_id in self.failing:
+            raise ReportGenerationError("Calculation not found")
+        calculation = await async_collection("calculations").find_one({"investigation_id": investigation_id})
+        return {
+            "calculation": calculation,
+            "prompt": f"prompt for {investigation_id}",
+            "prompt_stats": {"estimated_tokens": 10},
+        }
+
+    async def complete(self, prompt, prompt_tokens):
+        return f"report from {prompt}", None
+
+
+@pytest.fixture
+def reports(monkeypatch):
+    reports = FakeReports()
+    monkeypatch.setattr(brs, "admit", reports.admit)
+    monkeypatch.setattr(brs, "prepare_report", reports.prepare)
+    monkeypatch.setattr(brs, "complete_report", reports.complete)
+    return reports
+
+
+def _user(investigations=3, calculated=3):
+    """Stores a fresh user's investigations; the first `calculated` have a calculation."""
+    user_sub = f"user-{uuid.uuid4().hex[:8]}"
+    ids = [f"INV-{uuid.uuid4().hex[:8]}" for _ in range(investigations)]
+
+    async def store():
+        for i, investigation_id in enumerate(ids):
+            await async_collection("investigations").insert_one({
+                "investigation_id": investigation_id,
+                "user_sub": user_sub,
+                "created_at": datetime(2025, 1, 1 + i),
+            })
+            if i < calculated:
+                await async_collection("calculations").insert_one({
+                    "investigation_id": investigation_id,
+                    "calculation_id": f"CALC-{investigation_id}",
+                    "user_sub": user_sub,
+                    "computed_at": datetime(2025, 2, 1),
+                })
+
+    asyncio.run(store())
+    return user_sub, ids
+
+
+async def _start_and_finish(user_sub, **selection):
+    job = await brs.start_batch_reports(user_sub, **selection)
+    await asyncio.gather(*brs._running)
+    return job, await brs.get_batch_job(job["job_id"], user_sub)
+
+
+def test_job_runs_to_completed_and_records_failures(reports):
+    user_sub, ids = _user(investigations=4, calculated=3)
+    reports.failing = {ids[1]}
+    reports.rejections = 2
+
+    started, finished = asyncio.run(_start_and_finish(user_sub, investigation_ids=ids))
+
+    assert started["status"] == "RUNNING"
+    assert (started["selected"], started["pending"]) == (4, 3)
+    assert started["skipped"] == {"up_to_date": 0, "no_calculation": 1}
+    assert started["finished_at"] is None
+
+    assert finished["status"] == "COMPLETED"
+    assert (finished["completed"], finished["failed"]) == (2, 1)
+    assert finished["errors"] == [{"investigation_id": ids[1], "error": "Calculation not found"}]
+    assert finished["finished_at"] is not None
+    # Rejected admissions were retried
+    assert len(reports.admitted) == 3
+
+    stored = asyncio.run(async_collection("reports").find({"user_sub": user_sub}).to_list(None))
+    assert sorted((r["investigation_id"], r["calculation_id"]) for r in stored) == [
+        (ids[0], f"CALC-{ids[0]}"), (ids[2], f"CALC-{ids[2]}"),
+    ]
+
+
+def test_up_to_date_investigations_complete_without_running(reports):
+    user_sub, ids = _user(investigations=2, calculated=2)
+    asyncio.run(_start_and_finish(user_sub, created_from=datetime(2025, 1, 1)))
+
+    started, finished = asyncio.run(_start_and_finish(user_sub, investigation_ids=ids))
+
+    assert started["status"] == "COMPLETED"
+    assert started["pending"] == 0
+    assert started["skipped"] == {"up_to_date": 2, "no_calculation": 0}
+    assert started["finished_at"] is not None
+    assert finished["completed"] == 0
+
+    _, forced = asyncio.run(_start_and_finish(user_sub, investigation_ids=ids, force=True))
+    assert (forced["status"], forced["completed"]) == ("COMPLETED", 2)
+
+
+def test_failed_bulk_write_fails_the_job(reports, monkeypatch):
+    user_sub, ids = _user(investigations=2, calculated=2)
+
+    async def failing_save(documents):
+        raise RuntimeError("bulk write failed")
+
+    monkeypatch.setattr(brs, "save_reports", failing_save)
+
+    started, finished = asyncio.run(_start_and_finish(user_sub, investigation_ids=ids))
+
+    assert started["status"] == "RUNNING"
+    assert finished["status"] == "FAILED"
+    assert finished["error"] == "bulk write failed"
+    assert finished["completed"] == 0
+    assert finished["finished_at"] is not None
+
+
+def test_selection_is_required_and_jobs_are_per_user(reports):
+    user_sub, ids = _user(investigations=1, calculated=1)
+
+    with pytest.raises(brs.BatchReportError):
+        asyncio.run(brs.start_batch_reports(user_sub))
+
+    job, _ = asyncio.run(_start_and_finish(user_sub, investigation_ids=ids))
+    with pytest.raises(brs.BatchReportError):
+        asyncio.run(brs.get_batch_job(job["job_id"], "someone-else"))
@@ -0,0 +1,34 @@
+import io
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("config")
+
+from ingestion.csv_loader import CSVSchemaError, load_temperature_csv  # noqa: E402
+
+
+def _mixed_iso_csv(n, bad=None):
+    lines = ["timestamp,temperature"]
+    for i, t in enumerate(pd.date_range("2025-01-01", periods=n, freq="1min")):
+        # Alternate whole-second, fractional and offset variants of ISO 8601
+        value = [t.isoformat(), f"{t.isoformat()}.250", f"{t.isoformat()}+00:00"][i % 3]
+        lines.append(f"{bad.get(i, value) if bad else value},5.0")
+    return io.StringIO("\n".join(lines) + "\n")
+
+
+def test_mixed_iso_timestamps_are_all_parsed():
+    df = load_temperature_csv(_mixed_iso_csv(600))
+
+    assert len(df) == 600
+    assert df.attrs["ingestion"]["timestamp_format"] == {"format": "mixed"}
+    assert df["timestamp"].iloc[1] == pd.Timestamp("2025-01-01 00:01:00.250")
+
+
+def test_unparseable_mixed_timestamps_are_rejected_with_examples():
+    with pytest.raises(CSVSchemaError) as error:
+        load_temperature_csv(_mixed_iso_csv(600, bad={400: "not a time", 500: "2025-13-45"}))
+
+    message = str(error.value)
+    assert message.startswith("2 timestamp(s)")
+    assert "'not a time'" in message and "'2025-13-45'" in message
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from domain.degradation import degradation_rate, degradation_rates, profile_degradation_rates
+from domain.stability_profiles import STABILITY_PROFILES
+from services.forecast_service import run_forecast
+
+
+@pytest.mark.parametrize("temp", [-273.15, -300.0])
+def test_rates_reject_temperatures_at_or_below_absolute_zero(temp):
+    with pytest.raises(ValueError):
+        degradation_rate(temp)
+    with pytest.raises(ValueError):
+        degradation_rates([5.0, temp])
+
+
+def test_forecast_rejects_temperatures_below_absolute_zero():
+    timestamps = list(pd.date_range("2025-01-01", periods=4, freq="1min"))
+
+    with pytest.raises(ValueError):
+        run_forecast(timestamps, [5.0, 5.0, -280.0, 5.0], "Refrigerated")
+
+
+def test_profile_rates_match_direct_evaluation():
+    temps = np.linspace(-70.0, 40.0, 23)
+
+    keys, rates = profile_degradation_rates(temps)
+
+    assert rates.shape == (len(STABILITY_PROFILES), len(temps))
+    for key, row in zip(keys, rates):
+        profile = STABILITY_PROFILES[key]
+        np.testing.assert_array_equal(row, degradation_rates(temps, A=profile["A"], Ea=profile["Ea"]))
+
+
+def test_profile_rate_cache_follows_profile_edits(monkeypatch):
+    profile_degradation_rates([5.0])
+    monkeypatch.setitem(STABILITY_PROFILES, "Refrigerated", {**STABILITY_PROFILES["Refrigerated"], "A": 2e13})
+
+    _, rates = profile_degradation_rates([5.0], ["Refrigerated"])
+
+    assert rates[0, 0] == pytest.approx(degradation_rate(5.0, A=2e13, Ea=90000), rel=1e-12)
+
+
+def test_profile_rates_reject_unknown_profiles():
+    with pytest.raises(ValueError):
+        profile_degradation_rates([5.0], ["Ambient"])
+
+
+def test_exact_forecast_uses_profile_rates():
+    timestamps = list(pd.date_range("2025-01-01", periods=50, freq="10min"))
+    temps = [5.0 + 0.1 * i for i in range(50)]
+    profile = STABILITY_PROFILES["Room Temperature"]
+
+    results, _ = run_forecast(timestamps, temps, "Room Temperature")
+
+    product_temps = np.array([row["product_temp"] for row in results])
+    damage = np.sum(degradation_rates(product_temps, A=profile["A"], Ea=profile["Ea"])[1:] / 6.0)
+    assert results[-1]["potency"] == pytest.approx(100.0 * np.exp(-damage), rel=1e-9)
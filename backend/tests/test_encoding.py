@@ -0,0 +1,150 @@
+import gzip
+import json
+import struct
+
+import numpy as np
+import pytest
+
+pytest.importorskip("config")
+
+from starlette.requests import Request  # noqa: E402
+
+from api import encoding  # noqa: E402
+from api.encoding import (  # noqa: E402
+    MEDIA_ARROW,
+    MEDIA_F32,
+    MEDIA_JSON,
+    MEDIA_MSGPACK,
+    encode_response,
+    negotiate_format,
+)
+from config import Config  # noqa: E402
+
+META = {"investigation_id": "INV-1"}
+COLUMNS = {
+    "timestamp": ["2025-01-01T00:00:00", "2025-01-01T00:10:00", "2025-01-01T00:20:00"],
+    "type": ["history", "history", "forecast"],
+    "potency": [100.0, 99.5, 99.25],
+}
+
+
+def _request(accept=None, accept_encoding=None):
+    headers = []
+    if accept is not None:
+        headers.append((b"accept", accept.encode()))
+    if accept_encoding is not None:
+        headers.append((b"accept-encoding", accept_encoding.encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def _json_body(rows=3):
+    return {**META, "results": [{"potency": 99.0, "n": i} for i in range(rows)]}
+
+
+@pytest.mark.parametrize("accept,expected", [
+    (None, "json"),
+    ("*/*", "json"),
+    (MEDIA_JSON, "json"),
+    (MEDIA_ARROW, "arrow"),
+    (MEDIA_MSGPACK, "msgpack"),
+    ("application/x-msgpack", "msgpack"),
+    (MEDIA_F32, "f32"),
+    # Highest q wins; ties keep header order; q=0 is a refusal
+    (f"{MEDIA_JSON};q=0.5, {MEDIA_ARROW}", "arrow"),
+    (f"{MEDIA_MSGPACK}, {MEDIA_F32}", "msgpack"),
+    (f"{MEDIA_ARROW};q=0, {MEDIA_F32};q=0.1", "f32"),
+    (f"{MEDIA_ARROW};q=oops, text/html", "json"),
+])
+def test_accept_header_negotiation(accept, expected):
+    assert negotiate_format(accept) == expected
+
+
+def test_unavailable_encoder_falls_back(monkeypatch):
+    monkeypatch.setattr(encoding, "msgpack", None)
+
+    assert negotiate_format(f"{MEDIA_MSGPACK}, {MEDIA_F32};q=0.9") == "f32"
+    assert negotiate_format(MEDIA_MSGPACK) == "json"
+
+
+def test_json_response_keeps_the_json_body():
+    response = encode_response(_request(), META, COLUMNS, _json_body())
+
+    assert response.media_type == MEDIA_JSON
+    assert json.loads(response.body) == _json_body()
+    assert response.headers["vary"] == "Accept, Accept-Encoding"
+
+
+def test_f32_buffers_are_aligned_and_typed():
+    body = encode_response(_request(MEDIA_F32), META, COLUMNS, _json_body()).body
+
+    (header_length,) = struct.unpack_from("<I", body)
+    header = json.loads(body[4:4 + header_length])
+    start = -(-(4 + header_length) // 8) * 8
+    columns = {}
+    for column in header["columns"]:
+        assert column["offset"] % 8 == 0
+        columns[column["name"]] = np.frombuffer(
+            body, dtype=column["dtype"], count=column["length"], offset=start + column["offset"]
+        )
+
+    assert header["investigation_id"] == "INV-1"
+    assert columns["timestamp"].tolist() == [1735689600000.0, 1735690200000.0, 1735690800000.0]
+    assert [header["row_types"][code] for code in columns["type"]] == COLUMNS["type"]
+    assert columns["potency"].dtype == np.float32
+    np.testing.assert_allclose(columns["potency"], COLUMNS["potency"])
+
+
+def test_msgpack_and_arrow_carry_meta_and_columns():
+    msgpack = pytest.importorskip("msgpack")
+    pa = pytest.importorskip("pyarrow")
+
+    packed = msgpack.unpackb(encode_response(_request(MEDIA_MSGPACK), META, COLUMNS, _json_body()).body)
+    potency = packed["columns"]["potency"]
+    np.testing.assert_allclose(np.frombuffer(potency["data"], dtype=potency["dtype"]), COLUMNS["potency"])
+    assert packed["investigation_id"] == "INV-1"
+
+    body = encode_response(_request(MEDIA_ARROW), META, COLUMNS, _json_body()).body
+    table = pa.ipc.open_stream(body).read_all()
+    assert table.column_names == ["timestamp", "type", "potency"]
+    assert table.column("type").to_pylist() == COLUMNS["type"]
+    assert json.loads(table.schema.metadata[b"meta"]) == META
+
+
+def test_compression_starts_at_the_threshold(monkeypatch):
+    assert Config.RESPONSE_COMPRESSION_MIN_BYTES == 64 * 1024
+
+    small = {"data": "x" * 1000}
+    below = encode_response(_request(accept_encoding="gzip"), META, COLUMNS, small)
+    monkeypatch.setattr(Config, "RESPONSE_COMPRESSION_MIN_BYTES", len(below.body))
+    at = encode_response(_request(accept_encoding="gzip"), META, COLUMNS, small)
+    monkeypatch.setattr(Config, "RESPONSE_COMPRESSION_MIN_BYTES", len(below.body) + 1)
+    under = encode_response(_request(accept_encoding="gzip"), META, COLUMNS, small)
+
+    assert "content-encoding" not in below.headers
+    assert at.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(at.body)) == small
+    assert "content-encoding" not in under.headers
+
+
+@pytest.mark.parametrize("accept_encoding,coding", [
+    ("gzip", "gzip"),
+    ("br", "br"),
+    ("gzip;q=0.5, br", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("deflate", None),
+    (None, None),
+])
+def test_large_bodies_are_compressed_per_accept_encoding(accept_encoding, coding):
+    if coding == "br" and encoding.brotli is None:
+        pytest.skip("brotli not installed")
+    body = _json_body(rows=5000)
+    response = encode_response(_request(accept_encoding=accept_encoding), META, COLUMNS, body)
+
+    assert response.headers.get("content-encoding") == coding
+    raw = response.body
+    if coding == "gzip":
+        raw = gzip.decompress(raw)
+    elif coding == "br":
+        raw = encoding.brotli.decompress(raw)
+    assert len(raw) >= Config.RESPONSE_COMPRESSION_MIN_BYTES
+    assert json.loads(raw) == body
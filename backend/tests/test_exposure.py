@@ -0,0 +1,105 @@
+import math
+
+import numpy as np
+import pytest
+
+from domain.exposure import (
+    accumulate_exposure,
+    empty_exposure,
+    excursion_intervals,
+    finalize_exposure,
+    merge_exposure,
+)
+
+R = 8.314
+
+
+def _exposure(hours, temps, storage_min=2.0, storage_max=8.0, Ea=90000):
+    dt = np.diff(hours, prepend=hours[0])
+    return accumulate_exposure(dt, temps, temps, storage_min, storage_max, Ea)
+
+
+def _closed_form_mkt(temps_c, Ea):
+    """MKT of equally long intervals, via log-sum-exp."""
+    logs = np.array([-Ea / (R * (t + 273.15)) for t in temps_c])
+    log_mean = logs.max() + math.log(np.exp(logs - logs.max()).mean())
+    return (Ea / R) / -log_mean - 273.15
+
+
+def test_mkt_of_a_constant_temperature_is_that_temperature():
+    hours = np.arange(0.0, 48.25, 0.25)
+
+    metrics = finalize_exposure(_exposure(hours, np.full(len(hours), 5.0)))
+
+    assert metrics["mean_kinetic_temp_c"] == pytest.approx(5.0, abs=1e-9)
+    assert metrics["total_duration_hours"] == pytest.approx(48.0)
+    assert metrics["time_in_range_percent"] == pytest.approx(100.0)
+
+
+def test_mkt_of_two_levels_matches_closed_form():
+    hours = np.arange(0.0, 21.0)
+    temps = np.where(np.arange(21) <= 10, 5.0, 25.0)
+
+    metrics = finalize_exposure(_exposure(hours, temps))
+
+    # 10 hours at each level (the first sample covers no time)
+    assert metrics["mean_kinetic_temp_c"] == pytest.approx(_closed_form_mkt([5.0, 25.0], 90000), abs=1e-9)
+    assert metrics["time_above_range_hours"] == pytest.approx(10.0)
+    assert metrics["degree_hours_above_limit"] == pytest.approx(170.0)
+
+
+@pytest.mark.parametrize("Ea", [90000, 1.5e6])
+def test_merged_chunks_equal_a_single_pass(Ea):
+    rng = np.random.default_rng(7)
+    hours = np.cumsum(rng.uniform(0.1, 0.5, 400))
+    hours -= hours[0]
+    temps = np.concatenate([rng.normal(-75.0, 2.0, 200), rng.normal(-62.0, 2.0, 200)])
+    dt = np.diff(hours, prepend=hours[0])
+
+    whole = accumulate_exposure(dt, temps, temps, -80.0, -60.0, Ea)
+    # Chunks with different log shifts, merged in both orders
+    first = accumulate_exposure(dt[:150], temps[:150], temps[:150], -80.0, -60.0, Ea)
+    second = accumulate_exposure(dt[150:], temps[150:], temps[150:], -80.0, -60.0, Ea)
+    merged = merge_exposure(merge_exposure(empty_exposure(Ea), first), second)
+    reversed_merge = merge_exposure(second, first)
+
+    expected = finalize_exposure(whole)
+    assert math.isfinite(expected["mean_kinetic_temp_c"])
+    for result in (merged, reversed_merge):
+        assert result["samples"] == 400
+        assert result["mkt_log_shift"] == whole["mkt_log_shift"]
+        assert finalize_exposure(result) == pytest.approx(expected, rel=1e-12)
+
+
+def test_merge_rejects_different_activation_energies():
+    with pytest.raises(ValueError):
+        merge_exposure(empty_exposure(90000), empty_exposure(75000))
+
+
+def test_excursion_intervals_boundaries():
+    hours = [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+    # Limits themselves are in range; above → below back to back are two runs
+    temps = [9.0, 8.0, 2.0, 10.0, 12.0, 1.0, 5.0, 9.5]
+
+    intervals = excursion_intervals(hours, temps, storage_min=2.0, storage_max=8.0)
+
+    assert [(i["direction"], i["start_index"], i["end_index"]) for i in intervals] == [
+        ("above", 0, 0),
+        ("above", 3, 4),
+        ("below", 5, 5),
+        ("above", 7, 7),
+    ]
+    # A run at the first sample covers no time; later runs start at the
+    # previous sample
+    assert (intervals[0]["start_hours"], intervals[0]["duration_hours"]) == (0.0, 0.0)
+    assert (intervals[1]["start_hours"], intervals[1]["end_hours"]) == (2.0, 4.0)
+    assert intervals[1]["extreme_temp_c"] == 12.0
+    assert intervals[1]["degree_hours"] == pytest.approx(2.0 + 4.0)
+    assert intervals[2]["extreme_temp_c"] == 1.0
+    assert intervals[2]["degree_hours"] == pytest.approx(1.0)
+    assert intervals[3]["end_hours"] == 7.0
+
+
+def test_excursion_intervals_in_range_and_empty():
+    assert excursion_intervals([0.0, 1.0], [2.0, 8.0], storage_min=2.0, storage_max=8.0) == []
+    assert excursion_intervals([], [], storage_min=2.0, storage_max=8.0) == []
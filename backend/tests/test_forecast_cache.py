@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import io
+import uuid
+
+import pytest
+
+pytest.importorskip("config")
+
+from config import Config  # noqa: E402
+from persistence.async_mongo import async_collection  # noqa: E402
+from persistence.forecast_cache_repo import find_cached_forecast, save_cached_forecast  # noqa: E402
+from services.forecast_cache import (  # noqa: E402
+    FORECAST_NAMESPACE,
+    forecast_cache_key,
+    get_cached_forecast,
+    hash_upload,
+    store_forecast,
+)
+from utils.shared_cache import shared_cache  # noqa: E402
+
+PARAMS = {"stability_profile": "Refrigerated", "smoothing_alpha": 0.1, "integration": "exact"}
+
+
+def _payload(n=10):
+    return {
+        "investigation_id": f"INV-{uuid.uuid4().hex[:8]}",
+        "results": [{"potency": 100.0 - i * 0.01, "n": i} for i in range(n)],
+    }
+
+
+def _key():
+    return forecast_cache_key(uuid.uuid4().hex, "user-1", PARAMS)
+
+
+def test_upload_hash_streams_and_rewinds():
+    data = b"timestamp,temperature\n" * 1000
+    upload = io.BytesIO(data)
+    upload.seek(17)
+
+    assert hash_upload(upload, chunk_size=100) == hashlib.sha256(data).hexdigest()
+    assert upload.tell() == 0
+
+
+def test_cache_key_is_stable_and_covers_every_input():
+    key = forecast_cache_key("abc", "user-1", PARAMS)
+
+    assert key == forecast_cache_key("abc", "user-1", dict(reversed(list(PARAMS.items()))))
+    assert key != forecast_cache_key("abd", "user-1", PARAMS)
+    assert key != forecast_cache_key("abc", "user-2", PARAMS)
+    assert key != forecast_cache_key("abc", "user-1", {**PARAMS, "smoothing_alpha": 0.2})
+
+
+def test_lookup_falls_back_from_memory_to_mongo():
+    async def scenario():
+        key, payload = _key(), _payload()
+        await store_forecast(key, payload, "CALC-1", "user-1")
+        first = await get_cached_forecast(key)
+
+        shared_cache.delete(FORECAST_NAMESPACE, key)
+        second = await get_cached_forecast(key)
+        # The Mongo hit refills the shared cache
+        third = await get_cached_forecast(key)
+        return payload, first, second, third
+
+    payload, first, second, third = asyncio.run(scenario())
+
+    assert first["tier"] == shared_cache.name
+    assert second["tier"] == "persistent"
+    assert third["tier"] == shared_cache.name
+    for hit in (first, second, third):
+        assert hit["investigation_id"] == payload["investigation_id"]
+        assert hit["payload"] == payload
+
+
+def test_unknown_key_is_a_miss():
+    assert asyncio.run(get_cached_forecast(_key())) is None
+
+
+def test_large_bodies_are_chunked_and_reassembled(monkeypatch):
+    monkeypatch.setattr(Config, "FORECAST_CACHE_MAX_DOC_BYTES", 256)
+
+    async def scenario():
+        key, payload = _key(), _payload(500)
+        await store_forecast(key, payload, "CALC-1", "user-1")
+        shared_cache.delete(FORECAST_NAMESPACE, key)
+        doc = await async_collection("forecast_cache").find_one({"cache_key": key})
+        return payload, doc, await get_cached_forecast(key)
+
+    payload, doc, hit = asyncio.run(scenario())
+
+    assert doc["chunks"] > 1
+    assert doc["payload"] is None
+    assert hit["tier"] == "persistent"
+    assert hit["payload"] == payload
+
+
+def test_rewrite_switches_generation_and_drops_old_chunks():
+    async def scenario():
+        key = _key()
+        await save_cached_forecast(key, "INV-1", "CALC-1", b"a" * 1000, "user-1", max_doc_bytes=300)
+        first = await async_collection("forecast_cache").find_one({"cache_key": key})
+        await save_cached_forecast(key, "INV-1", "CALC-2", b"b" * 700, "user-1", max_doc_bytes=300)
+        chunks = await async_collection("forecast_cache_chunks").find({"cache_key": key}).to_list(None)
+        return first, chunks, await find_cached_forecast(key)
+
+    first, chunks, doc = asyncio.run(scenario())
+
+    assert doc["generation"] != first["generation"]
+    assert {chunk["generation"] for chunk in chunks} == {doc["generation"]}
+    assert sorted(chunk["n"] for chunk in chunks) == [0, 1, 2]
+    assert doc["calculation_id"] == "CALC-2"
+    assert doc["payload"] == b"b" * 700
+
+
+def test_entry_with_incomplete_generation_has_no_payload():
+    async def scenario():
+        key = _key()
+        await save_cached_forecast(key, "INV-1", "CALC-1", b"a" * 1000, "user-1", max_doc_bytes=300)
+        # A rewrite that has switched the entry but not yet written all its chunks
+        await async_collection("forecast_cache").update_one(
+            {"cache_key": key}, {"$set": {"generation": uuid.uuid4().hex}}
+        )
+        return key, await find_cached_forecast(key)
+
+    key, doc = asyncio.run(scenario())
+
+    assert doc["payload"] is None
+    shared_cache.delete(FORECAST_NAMESPACE, key)
+    assert asyncio.run(get_cached_forecast(key)) is None
@@ -0,0 +1,145 @@
+import asyncio
+import io
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("config")
+
+from services import forecast_jobs  # noqa: E402
+from services.forecast_jobs import (  # noqa: E402
+    ForecastJob,
+    ForecastPool,
+    UploadIngestionError,
+    _discard_outcome,
+    forecast_job,
+    share_upload,
+)
+from utils.shared_arrays import SharedArrays  # noqa: E402
+
+INGEST = {"time_column": None, "temperature_column": None, "temperature_unit": "C"}
+PREPROCESS = {"resolution_minutes": None, "max_gap_minutes": 60, "interpolate_gaps": False}
+FORECAST = {"stability_profile_key": "Refrigerated", "smoothing_alpha": 0.1, "integration": "exact"}
+
+
+def _exists(name):
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    return True
+
+
+def _csv_bytes(n=48):
+    frame = pd.DataFrame({
+        "Time": pd.date_range("2025-01-01", periods=n, freq="10min").strftime("%Y-%m-%d %H:%M:%S"),
+        "Temp (C)": np.linspace(4.0, 6.0, n),
+    })
+    return frame.to_csv(index=False).encode()
+
+
+@pytest.fixture
+def created_blocks(monkeypatch):
+    """Names of every block the job code allocates."""
+    names = []
+    create = SharedArrays.create.__func__
+
+    def recording_create(cls, spec):
+        block = create(cls, spec)
+        names.append(block.descriptor()["name"])
+        return block
+
+    monkeypatch.setattr(SharedArrays, "create", classmethod(recording_create))
+    return names
+
+
+def test_upload_is_copied_in_chunks_and_rewound(monkeypatch):
+    monkeypatch.setattr(forecast_jobs, "UPLOAD_CHUNK_BYTES", 100)
+    data = _csv_bytes()
+    upload = io.BytesIO(data)
+
+    with share_upload(upload) as block:
+        assert block["upload"].tobytes() == data
+    assert upload.tell() == 0
+
+
+def test_job_outcome_is_adopted_and_unlinked_on_close(created_blocks):
+    with share_upload(io.BytesIO(_csv_bytes())) as upload:
+        outcome = forecast_job(upload.descriptor(), "readings.csv", INGEST, PREPROCESS, FORECAST)
+
+    # The upload is gone; the two handed-off blocks outlive the job
+    assert [_exists(name) for name in created_blocks] == [False, True, True]
+
+    with ForecastJob(outcome) as job:
+        assert len(job.series["time_ns"]) == 48
+        rows = job.results()
+        assert rows[0]["potency"] == pytest.approx(100.0)
+    assert not any(_exists(name) for name in created_blocks)
+
+
+def test_series_is_unlinked_when_results_cannot_be_built(monkeypatch, created_blocks):
+    def failing_columns(results):
+        raise MemoryError("no room for results")
+
+    monkeypatch.setattr(forecast_jobs, "results_to_columns", failing_columns)
+
+    with share_upload(io.BytesIO(_csv_bytes())) as upload:
+        with pytest.raises(MemoryError):
+            forecast_job(upload.descriptor(), "readings.csv", INGEST, PREPROCESS, FORECAST)
+
+    assert len(created_blocks) == 2
+    assert not any(_exists(name) for name in created_blocks)
+
+
+def test_unreadable_upload_raises_and_leaves_no_blocks(created_blocks):
+    with share_upload(io.BytesIO(b"not,a\nvalid,upload\n")) as upload:
+        with pytest.raises(UploadIngestionError):
+            forecast_job(upload.descriptor(), "readings.csv", INGEST, PREPROCESS, FORECAST)
+
+    assert not any(_exists(name) for name in created_blocks)
+
+
+def test_series_is_unlinked_when_results_cannot_be_adopted():
+    series = SharedArrays.from_arrays({"time_ns": np.arange(3, dtype=np.int64)})
+    descriptor = series.hand_off()
+    outcome = {
+        "series": descriptor,
+        "results": {"name": "missing-block", "layout": []},
+        "preprocessing": {},
+        "metrics": {},
+        "reading_facts": {},
+    }
+
+    with pytest.raises(FileNotFoundError):
+        ForecastJob(outcome)
+    assert not _exists(descriptor["name"])
+
+
+def test_outcome_of_an_abandoned_job_is_discarded(created_blocks):
+    with share_upload(io.BytesIO(_csv_bytes())) as upload:
+        outcome = forecast_job(upload.descriptor(), "readings.csv", INGEST, PREPROCESS, FORECAST)
+    future = Future()
+    future.set_result(outcome)
+
+    _discard_outcome(future)
+
+    assert not any(_exists(name) for name in created_blocks)
+
+
+def test_thread_pool_runs_the_same_lifecycle(created_blocks):
+    pool = ForecastPool(processes=0)
+
+    async def scenario():
+        with await pool.run(io.BytesIO(_csv_bytes()), "readings.csv", INGEST, PREPROCESS, FORECAST) as job:
+            return len(job.results())
+
+    try:
+        assert asyncio.run(scenario()) == 48
+    finally:
+        pool.stop()
+    assert len(created_blocks) == 3
+    assert not any(_exists(name) for name in created_blocks)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from domain.forecasting import fit_trend_model
+from services.forecast_service import run_forecast
+
+
+@pytest.mark.parametrize("step_seconds", [1, 60])
+def test_holt_trend_flat_input_has_no_trend(step_seconds):
+    rng = np.random.default_rng(0)
+    n = int(24 * 3600 / step_seconds)
+    hours = np.arange(n) * step_seconds / 3600.0
+    temps = 5.0 + rng.normal(0.0, 0.1, n)
+
+    model = fit_trend_model(hours, temps, model="holt")
+
+    assert abs(model.slope) < 0.01
+    assert abs(float(model.project([24.0])[0]) - 5.0) < 0.5
+
+
+@pytest.mark.parametrize("step", ["1s", "60s"])
+def test_flat_forecast_stays_flat(step):
+    rng = np.random.default_rng(1)
+    n = 24 * 3600 if step == "1s" else 24 * 60
+    timestamps = list(pd.date_range("2025-01-01", periods=n, freq=step))
+    temps = (5.0 + rng.normal(0.0, 0.1, n)).tolist()
+
+    results, _ = run_forecast(
+        timestamps, temps, "Refrigerated", forecast_hours=24, integration="adaptive"
+    )
+
+    forecast = [row["sensor_temp"] for row in results if row["type"] == "forecast"]
+    assert forecast
+    assert max(abs(temp - 5.0) for temp in forecast) < 0.5
+
+
+def test_holt_trend_follows_a_ramp():
+    hours = np.arange(72 * 60) / 60.0
+    model = fit_trend_model(hours, 5.0 + 0.5 * hours, model="holt")
+
+    assert model.slope == pytest.approx(0.5, rel=0.05)
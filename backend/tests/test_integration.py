@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from domain.stability_profiles import STABILITY_PROFILES
+from services.forecast_service import run_forecast, simulate_window
+
+
+def _random_walk(n, step="1min", seed=1):
+    rng = np.random.default_rng(seed)
+    timestamps = list(pd.date_range("2025-01-01", periods=n, freq=step))
+    temps = (5.0 + np.cumsum(rng.normal(0.0, 0.05, n))).tolist()
+    return timestamps, temps
+
+
+@pytest.mark.parametrize("tolerance", [1e-4, 1e-6, 1e-8])
+def test_adaptive_damage_within_tolerance_of_exact(tolerance):
+    timestamps, temps = _random_walk(5000)
+
+    _, exact = run_forecast(timestamps, temps, "Refrigerated", integration="exact")
+    _, adaptive = run_forecast(
+        timestamps, temps, "Refrigerated", integration="adaptive", tolerance=tolerance
+    )
+
+    deviation = abs(
+        adaptive["state"]["cumulative_damage"] - exact["state"]["cumulative_damage"]
+    )
+    assert deviation <= tolerance
+    assert adaptive["integration"]["error_estimate"] <= tolerance
+
+
+def test_adaptive_excursion_within_tolerance_of_exact():
+    timestamps, temps = _random_walk(3000)
+    temps[1000:1200] = [25.0] * 200
+
+    _, exact = run_forecast(timestamps, temps, "Refrigerated", integration="exact")
+    _, adaptive = run_forecast(
+        timestamps, temps, "Refrigerated", integration="adaptive", tolerance=1e-7
+    )
+
+    assert abs(
+        adaptive["state"]["cumulative_damage"] - exact["state"]["cumulative_damage"]
+    ) <= 1e-7
+
+
+def test_adaptive_coarsens_steady_stretches_and_keeps_excursion_rows():
+    timestamps = list(pd.date_range("2025-01-01", periods=20000, freq="1min"))
+    temps = [5.0] * 20000
+    temps[10000:10100] = [25.0] * 100
+
+    results, metrics = run_forecast(
+        timestamps, temps, "Refrigerated", integration="adaptive", tolerance=1e-6
+    )
+
+    assert metrics["integration"]["steps"] < 2000
+    rows = {row["timestamp"] for row in results}
+    # Every sample while the smoothed sensor ramps up and back down
+    edges = timestamps[10000:10040] + timestamps[10100:10140]
+    assert all(ts.isoformat() in rows for ts in edges)
+    assert len(results) == metrics["integration"]["steps"] + 1
+
+
+@pytest.mark.parametrize("integration,tolerance", [("quadrature", 0.0), ("adaptive", 1e-7)])
+def test_window_recompute_matches_stored_mode(integration, tolerance):
+    timestamps, temps = _random_walk(3000, step="5min")
+    temps[1000:1100] = [20.0] * 100
+    _, metrics = run_forecast(
+        timestamps, temps, "Refrigerated", integration=integration, tolerance=tolerance or 1e-6
+    )
+    profile = STABILITY_PROFILES["Refrigerated"]
+
+    checkpoints = metrics["state"]["checkpoints"]
+    i = len(checkpoints["timestamp"]) // 2
+    checkpoint = {key: values[i] for key, values in checkpoints.items()}
+    start = timestamps.index(pd.Timestamp(checkpoint["timestamp"])) + 1
+
+    window = simulate_window(
+        pd.DatetimeIndex(timestamps[start:]),
+        temps[start:],
+        A=profile["A"],
+        Ea=profile["Ea"],
+        smoothing_alpha=0.1,
+        initial_state=checkpoint,
+        integration=integration,
+        tolerance=tolerance or 1e-6,
+    )
+
+    assert window["cumulative_damage"][-1] == pytest.approx(
+        metrics["state"]["cumulative_damage"], abs=2 * tolerance, rel=1e-12
+    )
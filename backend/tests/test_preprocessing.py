@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingestion.preprocessing import preprocess_series
+
+
+def _frame(minutes, temps):
+    return pd.DataFrame({
+        "timestamp": pd.Timestamp("2025-01-01") + pd.to_timedelta(minutes, unit="min"),
+        "air_temp": np.asarray(temps, dtype=float),
+    })
+
+
+def test_duplicate_timestamps_are_averaged():
+    df = _frame([0, 10, 10, 10, 20], [4.0, 5.0, 6.0, 10.0, 4.0])
+
+    out, diagnostics = preprocess_series(df)
+
+    assert out["air_temp"].tolist() == [4.0, 7.0, 4.0]
+    assert out["timestamp"].is_monotonic_increasing
+    assert diagnostics["duplicate_timestamps_removed"] == 2
+    assert diagnostics["output_rows"] == 3
+
+
+def test_gaps_are_flagged_strictly_above_the_threshold():
+    # 10-minute samples, then a 60-minute interval (at the threshold) and a
+    # 70-minute one (a gap)
+    minutes = [0, 10, 20, 80, 90, 160, 170]
+    df = _frame(minutes, [5.0] * 7)
+
+    out, diagnostics = preprocess_series(df, max_gap_minutes=60)
+
+    assert diagnostics["gaps_detected"] == 1
+    assert diagnostics["gaps"] == [{
+        "start": "2025-01-01T01:30:00",
+        "end": "2025-01-01T02:40:00",
+        "duration_minutes": pytest.approx(70.0),
+    }]
+    assert diagnostics["longest_gap_minutes"] == pytest.approx(70.0)
+    # Without interpolation the gap is only reported
+    assert diagnostics["interpolated_points"] == 0
+    assert len(out) == 7
+
+
+def test_flagged_gaps_are_interpolated_at_the_median_interval():
+    minutes = [0, 10, 20, 80, 90, 160, 170]
+    temps = [5.0, 5.0, 5.0, 5.0, 5.0, 12.0, 12.0]
+    df = _frame(minutes, temps)
+
+    out, diagnostics = preprocess_series(df, max_gap_minutes=60, interpolate_gaps=True)
+
+    # Only the 70-minute gap is filled, every 10 minutes in between
+    assert diagnostics["interpolated_points"] == 6
+    filled = out[(out["timestamp"] > "2025-01-01 01:30") & (out["timestamp"] < "2025-01-01 02:40")]
+    assert (filled["timestamp"].diff().dropna() == pd.Timedelta(minutes=10)).all()
+    assert filled["air_temp"].tolist() == pytest.approx([6.0, 7.0, 8.0, 9.0, 10.0, 11.0])
+    # The interval at the threshold is left alone
+    assert not ((out["timestamp"] > "2025-01-01 00:20") & (out["timestamp"] < "2025-01-01 01:20")).any()
+
+
+def test_irregular_series_is_resampled_time_weighted():
+    # Sample i holds over (t[i-1], t[i]]
+    minutes = [0, 1, 4, 5, 7, 10]
+    temps = [3.0, 10.0, 4.0, 7.0, 6.0, 1.0]
+    df = _frame(minutes, temps)
+
+    out, diagnostics = preprocess_series(df, resolution_minutes=5)
+
+    assert diagnostics["resampled"]
+    assert out["timestamp"].tolist() == [
+        pd.Timestamp("2025-01-01 00:00"),
+        pd.Timestamp("2025-01-01 00:05"),
+        pd.Timestamp("2025-01-01 00:10"),
+    ]
+    assert out["air_temp"].tolist() == pytest.approx([
+        3.0,
+        (10.0 * 1 + 4.0 * 3 + 7.0 * 1) / 5,
+        (6.0 * 2 + 1.0 * 3) / 5,
+    ])
+
+
+def test_series_sampled_at_or_below_resolution_is_not_resampled():
+    df = _frame([0, 15, 30, 45], [5.0, 6.0, 7.0, 8.0])
+
+    out, diagnostics = preprocess_series(df, resolution_minutes=10)
+
+    assert not diagnostics["resampled"]
+    assert out["air_temp"].tolist() == [5.0, 6.0, 7.0, 8.0]
+
+
+def test_rejects_non_positive_settings():
+    df = _frame([0, 1], [5.0, 5.0])
+
+    with pytest.raises(ValueError):
+        preprocess_series(df, resolution_minutes=0)
+    with pytest.raises(ValueError):
+        preprocess_series(df, max_gap_minutes=0)
@@ -0,0 +1,129 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("config")
+pa = pytest.importorskip("pyarrow")
+
+import pyarrow.ipc as ipc  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+
+from ingestion.readers import (  # noqa: E402
+    UnsupportedFormatError,
+    _read_arrow_table,
+    detect_format,
+    load_temperature_file,
+)
+
+TIMESTAMPS = pd.date_range("2025-01-01", periods=50, freq="5min")
+TEMPS = np.linspace(4.0, 6.0, 50)
+
+
+def _csv_bytes():
+    frame = pd.DataFrame({"Time": TIMESTAMPS.strftime("%Y-%m-%d %H:%M:%S"), "Temp (C)": TEMPS})
+    return frame.to_csv(index=False).encode()
+
+
+def _table():
+    # Extra columns the readers must not load
+    return pa.table({
+        "device": ["logger-1"] * 50,
+        "timestamp": pa.array(TIMESTAMPS.to_numpy(), type=pa.timestamp("ns")),
+        "humidity": np.full(50, 40.0),
+        "temperature": TEMPS,
+    })
+
+
+def _parquet_bytes():
+    buffer = io.BytesIO()
+    pq.write_table(_table(), buffer)
+    return buffer.getvalue()
+
+
+def _arrow_bytes(stream=False):
+    sink = io.BytesIO()
+    table = _table()
+    writer = ipc.new_stream if stream else ipc.new_file
+    with writer(sink, table.schema) as out:
+        for batch in table.to_batches(max_chunksize=20):
+            out.write_batch(batch)
+    return sink.getvalue()
+
+
+def _zstd_bytes(data):
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+
+def _assert_canonical(df):
+    assert list(df.columns) == ["timestamp", "air_temp"]
+    assert df["timestamp"].tolist() == TIMESTAMPS.tolist()
+    np.testing.assert_allclose(df["air_temp"].to_numpy(), TEMPS)
+
+
+@pytest.mark.parametrize("payload,expected", [
+    (lambda: _parquet_bytes(), "parquet"),
+    (lambda: _arrow_bytes(), "arrow"),
+    (lambda: _arrow_bytes(stream=True), "arrow"),
+    (lambda: gzip.compress(_csv_bytes()), "csv_gzip"),
+    (lambda: _zstd_bytes(_csv_bytes()), "csv_zstd"),
+])
+def test_magic_bytes_win_over_the_file_name(payload, expected):
+    assert detect_format(io.BytesIO(payload()), "upload.csv") == expected
+
+
+@pytest.mark.parametrize("filename,expected", [
+    ("readings.CSV", "csv"),
+    ("readings.csv.gz", "csv_gzip"),
+    ("readings.csv.zst", "csv_zstd"),
+    ("readings.pq", "parquet"),
+    ("readings.feather", "arrow"),
+])
+def test_extension_is_the_fallback(filename, expected):
+    assert detect_format(io.BytesIO(b"Time,Temp\n"), filename) == expected
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(UnsupportedFormatError):
+        detect_format(io.BytesIO(b"Time,Temp\n"), "readings.xlsx")
+
+
+def test_detection_leaves_the_stream_at_the_start():
+    upload = io.BytesIO(_parquet_bytes())
+    detect_format(upload)
+    assert upload.tell() == 0
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, _zstd_bytes])
+def test_compressed_csv_is_decompressed(compress):
+    df = load_temperature_file(io.BytesIO(compress(_csv_bytes())), "readings.bin")
+
+    _assert_canonical(df)
+
+
+@pytest.mark.parametrize("payload,fmt", [
+    (lambda: _parquet_bytes(), "parquet"),
+    (lambda: _arrow_bytes(), "arrow"),
+    (lambda: _arrow_bytes(stream=True), "arrow"),
+])
+def test_columnar_uploads_read_only_the_two_columns(payload, fmt):
+    table, time_column, temperature_column = _read_arrow_table(
+        io.BytesIO(payload()), fmt, None, None
+    )
+
+    assert (time_column, temperature_column) == ("timestamp", "temperature")
+    assert table.column_names == ["timestamp", "temperature"]
+    _assert_canonical(load_temperature_file(io.BytesIO(payload())))
+
+
+def test_parquet_file_on_disk_is_read(tmp_path):
+    path = tmp_path / "readings.parquet"
+    path.write_bytes(_parquet_bytes())
+
+    with open(path, "rb") as upload:
+        df = load_temperature_file(upload, "readings.parquet", "timestamp", "temperature")
+
+    _assert_canonical(df)
@@ -0,0 +1,138 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+from pymongo.errors import PyMongoError
+
+pytest.importorskip("config")
+
+from services import readings_writer as rw  # noqa: E402
+
+
+class FakeStore:
+    """Records inserted reading ids and status updates; fails on demand."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.inserted = []
+        self.statuses = []
+
+    async def insert(self, documents):
+        if self.failures:
+            self.failures -= 1
+            raise PyMongoError("server unavailable")
+        self.inserted.extend(doc["_id"] for doc in documents)
+
+    async def set_status(self, investigation_id, status):
+        self.statuses.append((investigation_id, status))
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeStore()
+    monkeypatch.setattr(rw, "insert_reading_documents", store.insert)
+    monkeypatch.setattr(rw, "set_investigation_status", store.set_status)
+    return store
+
+
+def _writer(spool_dir, **overrides):
+    settings = {"workers": 1, "batch_size": 3, "retries": 0, "retry_base_seconds": 0.01}
+    settings.update(overrides)
+    return rw.ReadingsWriter(str(spool_dir), **settings)
+
+
+def _readings(n=7):
+    return np.arange(n, dtype=np.int64) * 60 * 10**9, np.linspace(4.0, 6.0, n)
+
+
+def _spool_files(spool_dir):
+    return sorted(name for name in os.listdir(spool_dir) if name.endswith(".npz"))
+
+
+async def _wait_until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.01)
+
+
+def test_enqueued_readings_are_written_and_unspooled(tmp_path, store):
+    async def scenario():
+        writer = _writer(tmp_path)
+        await writer.start()
+        await writer.enqueue("INV-1", *_readings(), "user-1")
+        await writer.stop(timeout=2)
+
+    asyncio.run(scenario())
+
+    assert len(set(store.inserted)) == 7
+    assert store.statuses == [("INV-1", rw.STATUS_PERSISTED)]
+    assert _spool_files(tmp_path) == []
+
+
+def test_spool_left_by_an_exited_writer_is_recovered(tmp_path, store):
+    async def scenario():
+        store.failures = 1
+        crashed = _writer(tmp_path, retry_base_seconds=60)
+        await crashed.start()
+        await crashed.enqueue("INV-1", *_readings(), "user-1")
+        await _wait_until(lambda: store.failures == 0)
+        await crashed.stop(timeout=0)
+        assert len(_spool_files(tmp_path)) == 1
+
+        writer = _writer(tmp_path)
+        await writer.start()
+        await _wait_until(lambda: store.statuses)
+        await writer.stop(timeout=2)
+
+    asyncio.run(scenario())
+
+    assert len(set(store.inserted)) == 7
+    assert store.statuses == [("INV-1", rw.STATUS_PERSISTED)]
+    assert _spool_files(tmp_path) == []
+
+
+def test_files_of_a_live_writer_are_not_claimed(tmp_path, store):
+    async def scenario():
+        store.failures = 1
+        owner = _writer(tmp_path, retry_base_seconds=60)
+        await owner.start()
+        await owner.enqueue("INV-1", *_readings(), "user-1")
+        await _wait_until(lambda: store.failures == 0)
+
+        other = _writer(tmp_path)
+        await other.start()
+        claimed_while_alive = await asyncio.to_thread(other._claim_orphans)
+
+        await owner.stop(timeout=0)
+        claimed_after_exit = await asyncio.to_thread(other._claim_orphans)
+        claimed_again = await asyncio.to_thread(other._claim_orphans)
+        await other.stop(timeout=0)
+        return owner._owner, other._owner, claimed_while_alive, claimed_after_exit, claimed_again
+
+    owner, other, while_alive, after_exit, again = asyncio.run(scenario())
+
+    assert while_alive == []
+    assert [os.path.basename(path) for path in after_exit] == [f"INV-1.{other}.npz"]
+    assert again == []
+    assert owner != other
+
+
+def test_poison_job_is_quarantined_after_max_attempts(tmp_path, store):
+    async def scenario():
+        store.failures = 100
+        writer = _writer(tmp_path, max_attempts=3)
+        await writer.start()
+        await writer.enqueue("INV-1", *_readings(), "user-1")
+        await _wait_until(lambda: store.statuses)
+        await writer.stop(timeout=2)
+        return writer._owner
+
+    owner = asyncio.run(scenario())
+
+    assert store.failures == 100 - 3
+    assert store.statuses == [("INV-1", rw.STATUS_PERSIST_FAILED)]
+    assert _spool_files(tmp_path) == []
+    assert os.listdir(tmp_path / "quarantine") == [f"INV-1.{owner}.npz"]
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("config")
+
+from services.report_facts import EXPOSURE_FIELDS, summarize_readings  # noqa: E402
+from services.report_prompt import (  # noqa: E402
+    NOT_AVAILABLE,
+    build_report_prompt,
+    estimate_tokens,
+)
+
+HEADER = "EXCURSION INTERVALS (outside labeled storage range):"
+
+
+def _facts(spikes=40):
+    # One-hour spikes above range, each hotter than the one before
+    times = pd.date_range("2025-01-01", periods=spikes * 24, freq="1h").to_numpy()
+    temps = np.full(len(times), 5.0)
+    for i in range(spikes):
+        temps[i * 24 + 12] = 9.0 + 0.25 * i
+
+    return {
+        "investigation_id": "INV-1",
+        "stability_profile": "Refrigerated",
+        "Ea": 90000,
+        "A": 1e13,
+        "smoothing_alpha": 0.1,
+        "storage_min_c": 2,
+        "storage_max_c": 8,
+        "peak_sensor_temp_c": float(temps.max()),
+        "peak_product_temp_c": 7.5,
+        "min_sensor_temp_c": 5.0,
+        "min_product_temp_c": 5.0,
+        "final_potency_percent": 99.9,
+        **{field: 1.0 for field in EXPOSURE_FIELDS},
+        **summarize_readings(times, temps, "Refrigerated"),
+    }
+
+
+def _listed(prompt):
+    section = prompt.split(HEADER, 1)[1].split("\n\n", 1)[0]
+    return [line for line in section.strip().splitlines() if line.startswith("- 2025")]
+
+
+def test_everything_is_listed_within_a_generous_budget():
+    facts = _facts()
+
+    prompt, stats = build_report_prompt(facts, max_tokens=20000)
+
+    assert stats["excursions_total"] == stats["excursions_listed"] == 40
+    assert stats["exposure_lines"] == 11
+    assert stats["estimated_tokens"] == estimate_tokens(prompt)
+    listed = _listed(prompt)
+    assert len(listed) == 40
+    assert listed == sorted(listed)
+    assert "not listed" not in prompt
+
+
+def test_tight_budget_keeps_the_most_severe_excursions():
+    facts = _facts()
+    full, _ = build_report_prompt(facts, max_tokens=20000)
+    budget = estimate_tokens(full) - 300
+
+    prompt, stats = build_report_prompt(facts, max_tokens=budget)
+
+    assert stats["estimated_tokens"] <= budget
+    assert 0 < stats["excursions_listed"] < 40
+    assert stats["exposure_lines"] == 11
+    omitted = 40 - stats["excursions_listed"]
+    assert f"- {omitted} further lower-severity excursion interval(s) not listed" in prompt
+    # The hottest spikes are the latest ones; they are listed in time order
+    listed = _listed(prompt)
+    kept = facts["excursions"][:stats["excursions_listed"]]
+    assert listed == sorted(listed)
+    assert {line.split(" to ")[0][2:] for line in listed} == {e["start"] for e in kept}
+    assert min(e["extreme_temp_c"] for e in kept) > max(e["extreme_temp_c"] for e in facts["excursions"][len(kept):])
+
+
+def test_required_lines_survive_a_budget_below_them():
+    prompt, stats = build_report_prompt(_facts(), max_tokens=10)
+
+    assert stats["exposure_lines"] == 0
+    assert stats["excursions_listed"] == 0
+    assert "- Investigation ID: INV-1" in prompt
+    assert "- Calculated Final Potency: 99.9000 %" in prompt
+    assert "EXPOSURE SUMMARY:" not in prompt
+    assert "- 40 further lower-severity excursion interval(s) not listed" in prompt
+
+
+def test_no_excursions_and_missing_values():
+    facts = {**_facts(spikes=1), "excursion_count": 0, "excursions": [], "peak_product_temp_c": None}
+
+    prompt, stats = build_report_prompt(facts, max_tokens=20000)
+
+    assert stats["excursions_total"] == 0
+    assert f"{HEADER}\n- None recorded" in prompt
+    assert f"- Worst-Case Estimated Product Temperature: {NOT_AVAILABLE}" in prompt
@@ -0,0 +1,150 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("config")
+
+from domain.stability_profiles import STABILITY_PROFILES  # noqa: E402
+from services import series_service  # noqa: E402
+from services.forecast_service import run_forecast  # noqa: E402
+from services.series_service import (  # noqa: E402
+    _select_checkpoint,
+    get_investigation_series,
+    minmax_bucket_indices,
+)
+
+N = 3000
+TIMES = pd.date_range("2025-01-01", periods=N, freq="10min")
+TEMPS = 5.0 + 0.5 * np.sin(np.arange(N) / 50.0)
+TEMPS[1200:1230] = 14.0
+TEMPS[2500] = -1.0
+
+
+class FakeReadings:
+    """In-memory stand-in for the calculation and readings repository."""
+
+    def __init__(self, calculation):
+        self.calculation = calculation
+        self.afters = []
+
+    def _mask(self, after=None, start=None, end=None):
+        mask = np.ones(N, dtype=bool)
+        if after is not None:
+            mask &= TIMES > pd.Timestamp(after)
+        if start is not None:
+            mask &= TIMES >= pd.Timestamp(start)
+        if end is not None:
+            mask &= TIMES <= pd.Timestamp(end)
+        return mask
+
+    async def find_calculation(self, investigation_id, user_sub, projection=None):
+        return self.calculation
+
+    async def count_temperature_readings(self, investigation_id, user_sub, start=None, end=None):
+        return int(self._mask(start=start, end=end).sum())
+
+    async def iter_temperature_readings(self, investigation_id, user_sub, after=None, start=None, end=None,
+                                        batch_size=10000):
+        self.afters.append(after)
+        mask = self._mask(after, start, end)
+        times = TIMES[mask].to_numpy(dtype="datetime64[ns]")
+        temps = TEMPS[mask]
+        for i in range(0, len(times), batch_size):
+            yield times[i:i + batch_size], temps[i:i + batch_size]
+
+
+@pytest.fixture(scope="module")
+def forecast():
+    return run_forecast(list(TIMES), TEMPS.tolist(), stability_profile_key="Refrigerated")
+
+
+@pytest.fixture
+def readings(monkeypatch, forecast):
+    _, metrics = forecast
+    profile = STABILITY_PROFILES["Refrigerated"]
+    store = FakeReadings({
+        "calculation_id": "CALC-1",
+        "inputs": {
+            "A": profile["A"],
+            "Ea": profile["Ea"],
+            "smoothing_alpha": 0.1,
+            "integration": {"mode": "exact"},
+        },
+        "results": {"state": metrics["state"]},
+    })
+    monkeypatch.setattr(series_service, "READINGS_BATCH_SIZE", 700)
+    for name in ("find_calculation", "count_temperature_readings", "iter_temperature_readings"):
+        monkeypatch.setattr(series_service, name, getattr(store, name))
+    return store
+
+
+def test_minmax_buckets_keep_each_extreme():
+    buckets = np.array([0, 0, 0, 1, 1, 1, 2])
+    values = np.array([5.0, 9.0, 1.0, 6.0, 4.0, 3.0, 7.0])
+
+    assert minmax_bucket_indices(buckets, values).tolist() == [1, 2, 3, 5, 6]
+    assert minmax_bucket_indices(buckets[:0], values[:0]).tolist() == []
+
+
+def test_checkpoint_is_the_latest_strictly_before_start():
+    state = {"checkpoints": {
+        "timestamp": ["2025-01-01T00:00:00", "2025-01-01T01:00:00", "2025-01-01T02:00:00"],
+        "cumulative_damage": [0.0, 0.1, 0.2],
+    }}
+
+    assert _select_checkpoint(state, pd.Timestamp("2025-01-01 01:30").to_pydatetime())["cumulative_damage"] == 0.1
+    assert _select_checkpoint(state, pd.Timestamp("2025-01-01 01:00").to_pydatetime())["cumulative_damage"] == 0.0
+    assert _select_checkpoint(state, pd.Timestamp("2025-01-01 00:00").to_pydatetime()) is None
+    assert _select_checkpoint(state, None) is None
+
+
+def test_window_is_warm_started_from_a_checkpoint(readings, forecast):
+    results, _ = forecast
+    start = TIMES[1500].to_pydatetime()
+    end = TIMES[1899].to_pydatetime()
+
+    series = asyncio.run(get_investigation_series("INV-1", "user-1", start, end, max_points=1000))
+
+    assert not series["downsampled"]
+    assert series["returned_points"] == series["total_points"] == 400
+    # Only readings after the checkpoint were streamed
+    assert series["warm_start_from"] is not None
+    assert pd.Timestamp(series["warm_start_from"]) < pd.Timestamp(start)
+    assert readings.afters == [pd.Timestamp(series["warm_start_from"]).to_pydatetime()]
+    # ... and the window agrees with the full run
+    window = results[1500:1900]
+    assert series["columns"]["timestamp"][0] == TIMES[1500].isoformat()
+    for column in ("smoothed_temp", "product_temp", "potency"):
+        assert series["columns"][column] == pytest.approx([row[column] for row in window], rel=1e-9)
+
+
+def test_long_window_is_downsampled_keeping_excursions(readings, forecast):
+    results, _ = forecast
+
+    series = asyncio.run(get_investigation_series("INV-1", "user-1", max_points=100))
+
+    assert series["downsampled"]
+    assert series["warm_start_from"] is None
+    assert series["total_points"] == N
+    assert series["returned_points"] <= 100
+    timestamps = pd.DatetimeIndex(series["columns"]["timestamp"])
+    assert timestamps.is_monotonic_increasing
+    assert timestamps.isin(TIMES).all()
+    # Min/max buckets keep the spike and the single cold reading
+    assert max(series["columns"]["sensor_temp"]) == 14.0
+    assert min(series["columns"]["sensor_temp"]) == -1.0
+    # Picked rows carry the full-resolution model values
+    by_time = {row["timestamp"]: row["potency"] for row in results}
+    picked = [by_time[t] for t in series["columns"]["timestamp"]]
+    assert series["columns"]["potency"] == pytest.approx(picked, rel=1e-9)
+
+
+def test_rejects_invalid_windows(readings):
+    with pytest.raises(ValueError):
+        asyncio.run(get_investigation_series("INV-1", "user-1", max_points=1))
+    with pytest.raises(ValueError):
+        asyncio.run(get_investigation_series(
+            "INV-1", "user-1", TIMES[10].to_pydatetime(), TIMES[5].to_pydatetime()
+        ))
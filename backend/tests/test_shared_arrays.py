@@ -0,0 +1,74 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from utils.shared_arrays import ALIGNMENT, SharedArrays
+
+
+def _exists(name):
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    return True
+
+
+def test_create_aligns_every_array():
+    with SharedArrays.create({"flags": (np.uint8, 3), "values": (np.float64, (2, 5))}) as block:
+        assert [entry[3] % ALIGNMENT for entry in block.layout] == [0, 0]
+        assert block["flags"].shape == (3,)
+        assert block["values"].shape == (2, 5)
+        assert block.nbytes >= ALIGNMENT + 80
+
+
+def test_attach_maps_the_same_memory_without_owning_it():
+    owner = SharedArrays.from_arrays({"time_ns": np.arange(4, dtype=np.int64), "temp": [4.0, 5.0, 6.0, 7.0]})
+    name = owner.descriptor()["name"]
+
+    reader = SharedArrays.attach(owner.descriptor())
+    assert not reader.owner
+    assert reader["temp"].tolist() == [4.0, 5.0, 6.0, 7.0]
+    owner["temp"][0] = 9.0
+    assert reader["temp"][0] == 9.0
+
+    # Closing a non-owning handle only unmaps
+    reader.close()
+    assert _exists(name)
+    owner.close()
+    assert not _exists(name)
+
+
+def test_hand_off_passes_ownership_to_the_adopter():
+    block = SharedArrays.from_arrays({"values": np.linspace(0.0, 1.0, 8)})
+    descriptor = block.hand_off()
+
+    assert not block.owner
+    assert block.arrays == {}
+    assert _exists(descriptor["name"])
+
+    with SharedArrays.attach(descriptor, adopt=True) as adopted:
+        np.testing.assert_array_equal(adopted["values"], np.linspace(0.0, 1.0, 8))
+    assert not _exists(descriptor["name"])
+
+
+def test_close_is_idempotent_and_tolerates_live_views():
+    block = SharedArrays.from_arrays({"values": np.ones(4)})
+    name = block.descriptor()["name"]
+    view = block["values"]
+
+    block.close()
+    block.close()
+
+    assert not _exists(name)
+    del view
+
+
+def test_context_manager_unlinks_on_error():
+    with pytest.raises(RuntimeError):
+        with SharedArrays.create({"values": (np.float64, 4)}) as block:
+            name = block.descriptor()["name"]
+            raise RuntimeError("boom")
+
+    assert not _exists(name)
@@ -4,22 +4,69 @@ from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import requests
 import os
+import json
 from dotenv import load_dotenv
+from config import Config, client_overrides
+from utils.shared_cache import shared_cache
 load_dotenv()
 
 AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
 API_AUDIENCE = os.getenv("AUTH0_AUDIENCE")
 ALGORITHMS = ["RS256"]
 
+JWKS_NAMESPACE = "auth"
+
 security = HTTPBearer()
 
-def get_rsa_key(token):
+def get_jwks(refresh=False):
+    """
+    JWKS document, cached in the shared cache for JWKS_CACHE_TTL_SECONDS so
+    workers do not fetch it on every request.
+    """
     jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-    jwks = requests.get(jwks_url).json()
+    if not refresh:
+        cached = shared_cache.get(JWKS_NAMESPACE, jwks_url)
+        if cached is not None:
+            return json.loads(cached)
+
+    jwks = requests.get(jwks_url, timeout=10).json()
+    shared_cache.set(
+        JWKS_NAMESPACE, jwks_url, json.dumps(jwks).encode("utf-8"),
+        ttl=Config.JWKS_CACHE_TTL_SECONDS,
+    )
+    return jwks
+
+def _refetch_allowed():
+    """
+    At most one forced JWKS refetch per JWKS_MIN_REFETCH_SECONDS (across
+    workers sharing the cache).
+    """
+    if shared_cache.get(JWKS_NAMESPACE, "refetched") is not None:
+        return False
+    shared_cache.set(JWKS_NAMESPACE, "refetched", b"1", ttl=Config.JWKS_MIN_REFETCH_SECONDS)
+    return True
+
+
+def get_rsa_key(token):
     unverified_header = jwt.get_unverified_header(token)
+    kid = unverified_header.get("kid")
+    if kid is None or shared_cache.get(JWKS_NAMESPACE, f"unknown-kid|{kid}") is not None:
+        raise HTTPException(status_code=401, detail="Invalid token header")
+
+    jwks = get_jwks()
+    if not any(key["kid"] == kid for key in jwks["keys"]):
+        # Unknown kid: the signing keys may have rotated since caching.
+        # Only a fresh JWKS that still lacks it is remembered as unknown.
+        if _refetch_allowed():
+            jwks = get_jwks(refresh=True)
+            if not any(key["kid"] == kid for key in jwks["keys"]):
+                shared_cache.set(
+                    JWKS_NAMESPACE, f"unknown-kid|{kid}", b"1",
+                    ttl=Config.JWKS_UNKNOWN_KID_TTL_SECONDS,
+                )
 
     for key in jwks["keys"]:
-        if key["kid"] == unverified_header["kid"]:
+        if key["kid"] == kid:
             return {
                 "kty": key["kty"],
                 "kid": key["kid"],
@@ -29,19 +76,34 @@ def get_rsa_key(token):
             }
     raise HTTPException(status_code=401, detail="Invalid token header")
 
+class Auth0Verifier:
+    """
+    Verifies Auth0-issued RS256 access tokens against the tenant JWKS.
+    """
+
+    def verify(self, token):
+        print(jwt.get_unverified_header(token))
+
+        rsa_key = get_rsa_key(token)
+        try:
+            payload = jwt.decode(
+                token,
+                rsa_key,
+                algorithms=ALGORITHMS,
+                audience=API_AUDIENCE,
+                issuer=f"https://{AUTH0_DOMAIN}/"
+            )
+            return payload  # contains user info like email and sub
+        except Exception as e:
+            raise HTTPException(status_code=401, detail=f"Token verification failed: {e}")
+
+
+_auth0_verifier = Auth0Verifier()
+
+
+def get_token_verifier():
+    return client_overrides.get("auth") or _auth0_verifier
+
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)):
-    token = credentials.credentials
-    print(jwt.get_unverified_header(token))
-
-    rsa_key = get_rsa_key(token)
-    try:
-        payload = jwt.decode(
-            token,
-            rsa_key,
-            algorithms=ALGORITHMS,
-            audience=API_AUDIENCE,
-            issuer=f"https://{AUTH0_DOMAIN}/"
-        )
-        return payload  # contains user info like email and sub
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Token verification failed: {e}")
+    return get_token_verifier().verify(credentials.credentials)
@@ -19,4 +19,13 @@ def generate_calculation_id() -> str:
     Example:
       CALC-4b92fd
     """
-    return f"CALC-{uuid.uuid4().hex[:6]}"
\ No newline at end of file
+    return f"CALC-{uuid.uuid4().hex[:6]}"
+
+def generate_report_job_id() -> str:
+    """
+    Example:
+      RJOB-20251229-5c1e7a
+    """
+    date_part = datetime.utcnow().strftime("%Y%m%d")
+    rand_part = uuid.uuid4().hex[:6]
+    return f"RJOB-{date_part}-{rand_part}"
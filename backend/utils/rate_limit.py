@@ -0,0 +1,84 @@
+# utils/rate_limit.py
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at rate_per_minute.
+
+    acquire() waits until the requested amount is available. Requests larger
+    than the capacity are clamped to it so they can still proceed once the
+    bucket is full. debit() charges or refunds after the fact (e.g. actual
+    vs. estimated LLM token usage) and may drive the balance negative.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate_per_second
+        )
+        self._updated = now
+
+    async def acquire(self, amount=1.0):
+        amount = min(float(amount), self.capacity)
+        # One waiter at a time keeps acquisition first-come, first-served
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate_per_second)
+
+    def try_acquire(self, amount=1.0):
+        """
+        Non-blocking acquire: takes the tokens and returns 0, or leaves the
+        bucket untouched and returns the seconds until they are available.
+        """
+        amount = min(float(amount), self.capacity)
+        self._refill()
+        if self._tokens >= amount:
+            self._tokens -= amount
+            return 0.0
+        return (amount - self._tokens) / self.rate_per_second
+
+    def debit(self, amount):
+        self._refill()
+        self._tokens -= amount
+
+    @property
+    def available(self):
+        self._refill()
+        return self._tokens
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits applied together.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    async def acquire(self, estimated_tokens):
+        await self.requests.acquire(1)
+        await self.tokens.acquire(estimated_tokens)
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """
+        Corrects the token bucket once actual usage is known.
+        """
+        if actual_tokens is not None:
+            self.tokens.debit(actual_tokens - estimated_tokens)
@@ -0,0 +1,113 @@
+# utils/shared_arrays.py
+# Named numpy arrays packed into one multiprocessing.shared_memory block.
+# Only the descriptor (block name + layout) crosses a process boundary; the
+# data itself is mapped, never pickled.
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+ALIGNMENT = 64
+
+
+class SharedArrays:
+    """
+    A shared-memory block holding named, 64-byte aligned arrays.
+
+    Lifecycle: the owner of a block unlinks it on close(); other processes
+    only unmap it. A block created on behalf of another process (e.g. a
+    worker's output) is handed over with hand_off() and adopted by the
+    receiver with attach(descriptor, adopt=True).
+
+    Views taken from .arrays are only valid until close(); copy anything
+    that must outlive the block.
+    """
+
+    def __init__(self, shm, layout, owner):
+        self._shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for name, dtype, shape, offset in layout
+        }
+
+    @classmethod
+    def create(cls, spec):
+        """
+        Allocates a block for the given arrays.
+
+        Args:
+            spec (dict): name → (dtype, shape)
+        """
+        layout = []
+        size = 0
+        for name, (dtype, shape) in spec.items():
+            dtype = np.dtype(dtype)
+            shape = (int(shape),) if np.isscalar(shape) else tuple(int(s) for s in shape)
+            size = -(-size // ALIGNMENT) * ALIGNMENT
+            layout.append((name, dtype.str, shape, size))
+            size += dtype.itemsize * int(np.prod(shape))
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        return cls(shm, layout, owner=True)
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Allocates a block and copies the given arrays into it.
+        """
+        arrays = {name: np.asarray(values) for name, values in arrays.items()}
+        block = cls.create({name: (a.dtype, a.shape) for name, a in arrays.items()})
+        for name, values in arrays.items():
+            block.arrays[name][...] = values
+        return block
+
+    @classmethod
+    def attach(cls, descriptor, adopt=False):
+        """
+        Maps a block created elsewhere. adopt=True takes over ownership
+        (the block is unlinked when this handle is closed).
+        """
+        shm = shared_memory.SharedMemory(name=descriptor["name"])
+        return cls(shm, [tuple(entry) for entry in descriptor["layout"]], owner=adopt)
+
+    def descriptor(self):
+        return {"name": self._shm.name, "layout": self.layout}
+
+    def hand_off(self):
+        """
+        Unmaps the block without unlinking it and returns its descriptor;
+        the receiver becomes responsible for unlinking.
+        """
+        self.owner = False
+        descriptor = self.descriptor()
+        self.close()
+        return descriptor
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    @property
+    def nbytes(self):
+        return self._shm.size
+
+    def close(self):
+        self.arrays = {}
+        try:
+            self._shm.close()
+        except BufferError:
+            # A caller still holds a view; the mapping goes with it
+            pass
+        if self.owner:
+            self.owner = False
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,187 @@
+# utils/shared_cache.py
+# Pluggable byte cache shared by the forecast, report, TTS and auth caches.
+#
+#   memory  in-process LRU (one copy per worker)
+#   sqlite  local-disk SQLite file in WAL mode, shared by every worker on
+#           the node and kept warm across restarts
+
+import os
+import sqlite3
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+
+_EXPIRY = struct.Struct("<d")
+
+
+class LRUByteCache:
+    """
+    Thread-safe LRU of bytes values, evicted by total size rather than count.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def pop(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+
+    @property
+    def size_bytes(self):
+        return self._size
+
+
+class MemoryCache:
+    """
+    In-process backend. Entries carry their expiry time as an 8-byte prefix
+    so the LRU accounts for them by size alone.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_bytes):
+        self._lru = LRUByteCache(max_bytes)
+
+    def get(self, namespace, key):
+        entry = self._lru.get(f"{namespace}:{key}")
+        if entry is None:
+            return None
+        (expires_at,) = _EXPIRY.unpack_from(entry)
+        if expires_at and expires_at < time.time():
+            self._lru.pop(f"{namespace}:{key}")
+            return None
+        return entry[_EXPIRY.size:]
+
+    def set(self, namespace, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else 0.0
+        self._lru.put(f"{namespace}:{key}", _EXPIRY.pack(expires_at) + bytes(value))
+
+    def delete(self, namespace, key):
+        self._lru.pop(f"{namespace}:{key}")
+
+
+class SQLiteCache:
+    """
+    Node-local backend on a single SQLite file.
+
+    Connections are opened per process and thread (never inherited across a
+    fork). Expired entries are dropped on read; every PRUNE_EVERY writes the
+    oldest entries beyond max_bytes are removed in one statement.
+    """
+
+    name = "node"
+    PRUNE_EVERY = 64
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " expires_at REAL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_created ON cache (created_at)")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, namespace, key):
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            self.delete(namespace, key)
+            return None
+        return bytes(value)
+
+    def set(self, namespace, key, value, ttl=None):
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+            (namespace, key, sqlite3.Binary(value), len(value), now, now + ttl if ttl else None),
+        )
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def delete(self, namespace, key):
+        self._connection().execute(
+            "DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+
+    def prune(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM cache WHERE rowid IN ("
+            " SELECT rowid FROM ("
+            "  SELECT rowid, SUM(size) OVER (ORDER BY created_at DESC) AS running FROM cache"
+            " ) WHERE running > ?)",
+            (self.max_bytes,),
+        )
+
+
+def create_shared_cache(backend=None, path=None, max_bytes=None):
+    backend = backend or Config.SHARED_CACHE_BACKEND
+    max_bytes = max_bytes or Config.SHARED_CACHE_MAX_BYTES
+    if backend == "memory":
+        return MemoryCache(max_bytes)
+    if backend == "sqlite":
+        return SQLiteCache(path or Config.SHARED_CACHE_PATH, max_bytes)
+    raise ValueError(f"Unknown shared cache backend: {backend}")
+
+
+shared_cache = create_shared_cache()